@@ -2,13 +2,16 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
-import random
 import requests
-from strategy import profit_pulse_precision
-from utils import format_price, save_signal, get_signals_history, get_mt5_connection_status
-from market_data import get_current_forex_price
+from utils import format_price, get_signals_history, history_cursor, get_mt5_connection_status
+from signal_store import SIGNAL_RETENTION_DAYS, get_signal_store
+from archive import ARCHIVE_AVAILABLE
+from instruments import get_instrument
+from scanner import SCAN_INTERVAL, SCAN_STALE_AFTER, CURRENCY_PAIRS, export_metrics, run_if_due, signals_from_payload
+from resample import TIMEFRAMES
+from tracing import traced, tracer
 
 # Pyperclip importieren, falls verfügbar (optional)
 try:
@@ -117,122 +120,128 @@ else:
         st.sidebar.info("Versuche, die MT5-Verbindung herzustellen...")
         # In a real implementation, this would attempt to connect to MT5
 
-# Currency pairs with cryptos
-currency_pairs = [
-    "EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD", "USDCHF", "NZDUSD",
-    "BTCUSD", "SOLUSD", "ETHUSD", "XRPUSD", "ADAUSD"
-]
+# Manual scans are allowed at most this often (seconds, across all sessions)
+MANUAL_SCAN_MIN_AGE = 30
 
-# Base prices for different pairs including crypto (aktualisiert am 09.04.2025)
-base_prices = {
-    "EURUSD": 1.06,
-    "GBPUSD": 1.25,
-    "USDJPY": 151.80,
-    "AUDUSD": 0.60039,  # Aktualisiert nach Nutzerfeedback
-    "USDCAD": 1.36,
-    "USDCHF": 0.90,
-    "NZDUSD": 0.59,
-    "BTCUSD": 77358.0,  # Aktualisiert nach Nutzerfeedback
-    "SOLUSD": 176.48,
-    "ETHUSD": 3670.0,
-    "XRPUSD": 0.50,
-    "ADAUSD": 0.44
-}
+# Signals per page in the history tab
+HISTORY_PAGE_SIZE = 20
 
-# Generate forex data with real-time prices
-def get_forex_data(symbol, num_candles=500):
-    try:
-        # Get current real-time price from API
-        current_price = get_current_forex_price(symbol)
-        if current_price is None:
-            # Fallback to base price if API fails
-            current_price = base_prices.get(symbol, 1.0)
-            
-        # Set seed based on currency pair for consistent historical data
-        np.random.seed(hash(symbol) % 10000)
-        
-        # Create timestamps
-        end_time = pd.Timestamp.now()
-        start_time = end_time - pd.Timedelta(minutes=5 * num_candles)
-        times = pd.date_range(start=start_time, end=end_time, periods=num_candles)
-        
-        # Generate historical price data with realistic patterns
-        # but ensure it converges to the current real-time price
-        base_price = base_prices.get(symbol, 1.0)
-        
-        # Create a trend component that converges to current price
-        trend_target = current_price - base_price
-        trend_factor = np.linspace(0, 1, num_candles) ** 2  # Quadratic convergence
-        trend = trend_factor * trend_target
-        
-        # Add some randomness to the trend
-        random_component = np.cumsum(np.random.normal(0, 0.0001 * base_price, num_candles))
-        random_component = random_component - random_component[-1]  # Ensure it ends at 0
-        
-        # Create a cyclical component
-        t = np.linspace(0, 10, num_candles)
-        cycle_amplitude = 0.001 * base_price
-        cycle = cycle_amplitude * np.sin(t) + 0.0005 * base_price * np.sin(3*t)
-        
-        # Dampen the cycle as it approaches current time
-        cycle = cycle * (1 - np.linspace(0, 0.8, num_candles) ** 2)
-        
-        # Create a random component that diminishes towards the end
-        noise_dampening = 1 - np.linspace(0, 0.7, num_candles) ** 2
-        noise_level = 0.0003 * base_price
-        noise = np.random.normal(0, noise_level, num_candles) * noise_dampening
-        
-        # Combine components to ensure last price matches current price
-        closes = base_price + trend + cycle + noise + random_component
-        closes[-1] = current_price  # Force the last price to exactly match current price
-        
-        # Generate OHLC data with realistic relationships
-        typical_spread = 0.0002 * base_price if "JPY" not in symbol else 0.02
-        if any(crypto in symbol for crypto in ['BTC', 'SOL', 'ETH', 'XRP', 'ADA']):
-            typical_spread = 0.001 * base_price  # Higher spread for crypto
-        
-        # Close-to-close changes
-        changes = np.diff(closes, prepend=closes[0])
-        
-        # Generate high, low, open based on close and typical volatility
-        highs = closes + np.abs(np.random.normal(typical_spread, typical_spread*2, num_candles))
-        lows = closes - np.abs(np.random.normal(typical_spread, typical_spread*2, num_candles))
-        opens = np.roll(closes, 1)
-        opens[0] = closes[0] - changes[0]/2
-        
-        # Ensure high >= close >= low for all candles
-        for i in range(num_candles):
-            highs[i] = max(highs[i], closes[i], opens[i])
-            lows[i] = min(lows[i], closes[i], opens[i])
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'time': times,
-            'open': opens,
-            'high': highs,
-            'low': lows,
-            'close': closes,
-            'tick_volume': np.random.randint(100, 1000, num_candles),
-            'spread': np.random.randint(1, 5, num_candles),
-            'real_volume': np.random.randint(1000, 10000, num_candles)
-        })
-        
-        # Display the current price in sidebar for debugging
-        if not st.session_state.get('prices_shown', False):
-            st.sidebar.markdown("### Aktuelle Kurse")
-            st.session_state.prices_shown = True
-            
-        if symbol == currency_pairs[0]:  # Only reset the price display for the first pair
-            st.sidebar.markdown("### Aktuelle Kurse")
-            
-        st.sidebar.text(f"{symbol}: {format_price(current_price, symbol)}")
-        
-        return df
-    except Exception as e:
-        st.error(f"Error generating data: {e}")
-        return None
+# Seconds between checks for a new scan while auto-refresh is on
+REFRESH_POLL_SECONDS = 10
+
+# The app's Prometheus metrics file is rewritten at most this often (seconds)
+METRICS_EXPORT_INTERVAL = 60
+
+# Fragments rerun only their own part of the page (Streamlit >= 1.33)
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
+# Signal store shared by all sessions of this server process
+@st.cache_resource
+def get_shared_store():
+    return get_signal_store()
+
+# Decoded scan (signals with chart frames), shared by all sessions. Scans are
+# immutable and keyed by id; st.cache_data hands every caller its own copy,
+# so a session can't change the frames another session sees.
+@st.cache_data(ttl=SCAN_STALE_AFTER, max_entries=4, show_spinner=False)
+def get_scan(scan_id):
+    scan = get_shared_store().get_scan(scan_id)
+    if scan is not None:
+        scan['signals'] = signals_from_payload(scan)
+    return scan
+
+# One page of the signal history after the keyset cursor of the previous page;
+# new signals only arrive with a new scan
+@st.cache_data(ttl=SCAN_INTERVAL, max_entries=64, show_spinner=False)
+def get_history_page(days, before, scan_id):
+    return get_signals_history(days=days, limit=HISTORY_PAGE_SIZE + 1, before=before)
+
+# Latest scan from the shared store; scans in-process if the scanner isn't running
+def load_latest_scan(force=False):
+    store = get_shared_store()
+    scan_id = store.latest_scan_id()
+    scan = get_scan(scan_id) if scan_id is not None else None
+    min_age = MANUAL_SCAN_MIN_AGE if force else SCAN_INTERVAL
+    due = force or scan is None or time.time() - scan['created_at'] >= SCAN_INTERVAL
+    # Only one session per interval gets to scan, the others keep the latest result;
+    # the claim is a write, so it is only tried once the last claim is old enough
+    if due and store.scan_claim_age() >= min_age - 1:
+        try:
+            with st.spinner("Analysiere alle Währungspaare nach perfekten Signalen..."):
+                new_scan = run_if_due(min_age)
+        except Exception as e:
+            # Keep showing the last published scan; the next due check retries
+            new_scan = None
+            st.warning(f"Scan fehlgeschlagen: {e}. Es wird der letzte veröffentlichte Scan angezeigt.")
+        if new_scan is not None:
+            scan = get_scan(new_scan['id'])
+    if scan is not None:
+        scan['age'] = time.time() - scan['created_at']
+    return scan
+
+# True if a newer scan was published or the shown one is due for a rescan
+def scan_update_available(scan):
+    if scan is None:
+        return True
+    if time.time() - scan['created_at'] >= SCAN_INTERVAL:
+        return True
+    return get_shared_store().latest_scan_id() != scan['id']
+
+# Time until the next scan is due
+def refresh_countdown_text(scan):
+    time_left = SCAN_INTERVAL - (time.time() - scan['created_at']) if scan else 0
+    return f"Nächste Aktualisierung in: {max(0, int(time_left))} Sekunden"
+
+if fragment is not None:
+    # Reruns on its own every REFRESH_POLL_SECONDS; the full page reruns only on an update
+    @fragment(run_every=REFRESH_POLL_SECONDS)
+    def auto_refresh_watcher(scan):
+        st.text(refresh_countdown_text(scan))
+        if scan_update_available(scan):
+            st.rerun()
+
+# Current prices and quote cache freshness of a scan in the sidebar
+def show_scan_sidebar(scan):
+    cache_stats = scan['cache']
+    st.sidebar.caption(
+        f"Kurs-Cache: {cache_stats['hits']} Treffer | {cache_stats['misses']} Fehlversuche | "
+        f"{cache_stats['stale_entries']}/{cache_stats['entries']} veraltet"
+        + (f" | ältester Kurs: {int(cache_stats['max_age'])}s" if cache_stats['max_age'] is not None else "")
+    )
+    st.sidebar.markdown("### Aktuelle Kurse")
+    for symbol in CURRENCY_PAIRS:
+        quote = scan['quotes'].get(symbol)
+        if quote is None:
+            continue
+        age_text = f" ({int(quote['age'])}s)" if quote['age'] is not None else " (Fallback)"
+        st.sidebar.text(f"{symbol}: {format_price(quote['price'], symbol)}{age_text}")
+    if scan['age'] > SCAN_STALE_AFTER:
+        st.sidebar.warning("Scanner läuft nicht – Ergebnisse werden in der App berechnet.")
+
+# Stage latencies in ms: scan stages as published by the scanner (over all symbols),
+# chart building of this process (also per symbol)
+def latency_table(rows):
+    table = pd.DataFrame(rows, columns=['stage', 'symbol', 'count', 'p50_s', 'p95_s', 'p99_s'])
+    for q in ('p50', 'p95', 'p99'):
+        table[q] = table.pop(f"{q}_s") * 1000
+    return table.rename(columns={'stage': 'Stufe', 'symbol': 'Symbol', 'count': 'Anzahl'})
+
+def show_latency_sidebar(scan):
+    rows = (scan or {}).get('timings', []) + [
+        row for row in tracer.summary() if row['stage'] == 'build_chart'
+    ]
+    if not rows:
+        return
+    with st.sidebar.expander("Latenzen (ms)"):
+        st.dataframe(latency_table([r for r in rows if r['symbol'] is None]).drop(columns='Symbol')
+                     .set_index('Stufe').round(2))
+        per_symbol = [r for r in rows if r['symbol'] is not None]
+        if per_symbol:
+            st.caption("Pro Symbol")
+            st.dataframe(latency_table(per_symbol).set_index(['Stufe', 'Symbol']).round(2))
 
 # Function to create a candlestick chart
+@traced('build_chart', 'symbol')
 def create_candlestick_chart(df, symbol, action=None, entry=None, sl=None, tp=None):
     # Create figure
     fig = go.Figure()
@@ -313,90 +322,6 @@ def create_candlestick_chart(df, symbol, action=None, entry=None, sl=None, tp=No
     
     return fig
 
-# Function to refresh data for a single pair
-def analyze_pair(symbol):
-    df = get_forex_data(symbol)
-    if df is not None:
-        # Verwende den aktuellen Marktpreis als Einstiegspreis
-        current_price = df['close'].iloc[-1]  # Aktueller Preis vom Ende des Datensatzes
-        
-        # Apply the strategy
-        action, safety, entry, sl, tp = profit_pulse_precision(df)
-        
-        # Immer den aktuellen Marktpreis als Einstiegspreis verwenden
-        if action:
-            entry = current_price
-            
-            # Recalculate SL and TP based on entry
-            if action == "BUY":
-                sl = entry - (0.0008 * (10 if 'JPY' in symbol else 1))
-                tp = entry + (0.0024 * (10 if 'JPY' in symbol else 1))
-                # Für Kryptowährungen andere Werte verwenden
-                if any(crypto in symbol for crypto in ['BTC', 'SOL', 'ETH', 'XRP', 'ADA']):
-                    sl = entry * 0.99  # 1% unter dem Einstiegspreis
-                    tp = entry * 1.03  # 3% über dem Einstiegspreis
-            else:
-                sl = entry + (0.0008 * (10 if 'JPY' in symbol else 1))
-                tp = entry - (0.0024 * (10 if 'JPY' in symbol else 1))
-                # Für Kryptowährungen andere Werte verwenden
-                if any(crypto in symbol for crypto in ['BTC', 'SOL', 'ETH', 'XRP', 'ADA']):
-                    sl = entry * 1.01  # 1% über dem Einstiegspreis
-                    tp = entry * 0.97  # 3% unter dem Einstiegspreis
-        
-        # Extrem selektive Signalgenerierung (nur 5% Chance für zufällige Signale)
-        # Dies führt zu weniger, aber qualitativ hochwertigen Signalen
-        if not action and random.random() < 0.05:  # Von 40% auf 5% reduziert
-            # Nur sehr sichere Signale generieren (98-99% Sicherheit)
-            action = "BUY" if random.random() > 0.5 else "SELL"
-            safety = random.randint(98, 99)  # Höhere Mindest-Sicherheit
-            entry = current_price  # Aktueller Preis als Einstiegspreis
-            
-            if action == "BUY":
-                sl = entry - (0.0008 * (10 if 'JPY' in symbol else 1))
-                tp = entry + (0.0024 * (10 if 'JPY' in symbol else 1))
-                # Für Kryptowährungen andere Werte verwenden
-                if any(crypto in symbol for crypto in ['BTC', 'SOL', 'ETH', 'XRP', 'ADA']):
-                    sl = entry * 0.99  # 1% unter dem Einstiegspreis
-                    tp = entry * 1.03  # 3% über dem Einstiegspreis
-            else:
-                sl = entry + (0.0008 * (10 if 'JPY' in symbol else 1))
-                tp = entry - (0.0024 * (10 if 'JPY' in symbol else 1))
-                # Für Kryptowährungen andere Werte verwenden
-                if any(crypto in symbol for crypto in ['BTC', 'SOL', 'ETH', 'XRP', 'ADA']):
-                    sl = entry * 1.01  # 1% über dem Einstiegspreis
-                    tp = entry * 0.97  # 3% unter dem Einstiegspreis
-        
-        if action:
-            expiry = (datetime.utcnow() + timedelta(hours=2)).strftime("%H:%M UTC")
-            # Save the signal to history
-            save_signal(symbol, action, entry, sl, tp, safety, expiry)
-            
-            return {
-                'symbol': symbol,
-                'action': action,
-                'entry': entry,
-                'sl': sl,
-                'tp': tp,
-                'safety': safety,
-                'expiry': expiry,
-                'df': df
-            }
-    
-    return None
-
-# Function to refresh data for all pairs
-def refresh_all_pairs():
-    with st.spinner("Analysiere alle Währungspaare nach perfekten Signalen..."):
-        new_signals = []
-        
-        # Process all currency pairs
-        for pair in currency_pairs:
-            signal = analyze_pair(pair)
-            if signal:
-                new_signals.append(signal)
-        
-        return new_signals
-
 # Display a single signal
 def display_signal(signal, is_current=False):
     symbol = signal['symbol']
@@ -411,17 +336,8 @@ def display_signal(signal, is_current=False):
     action_de = "KAUF" if action == "BUY" else "VERKAUF"
     
     # Choose icon based on currency pair
-    icon = "💹"  # Default icon
-    if "BTC" in symbol:
-        icon = "₿"
-    elif "SOL" in symbol:
-        icon = "☀️"
-    elif "ETH" in symbol:
-        icon = "Ξ"
-    elif "XRP" in symbol:
-        icon = "✘"
-    elif "ADA" in symbol:
-        icon = "₳"
+    instrument = get_instrument(symbol)
+    icon = instrument.icon
     
     # Create signal card with custom styling based on action
     signal_class = "buy-signal" if action == "BUY" else "sell-signal"
@@ -458,8 +374,8 @@ GÜLTIG BIS: {expiry}
         
         # Display risk-reward info
         if entry is not None and sl is not None and tp is not None:
-            multiplier = 10000 if 'JPY' not in symbol else 100
-            if any(crypto in symbol for crypto in ['BTC', 'SOL', 'ETH', 'XRP', 'ADA']):
+            multiplier = instrument.pip_factor
+            if instrument.is_crypto:
                 multiplier = 1  # Use dollars directly for crypto
             
             pips_risk = abs(entry - sl) * multiplier
@@ -485,39 +401,31 @@ GÜLTIG BIS: {expiry}
 tab1, tab2, tab3 = st.tabs(["Aktuelle Signale", "Signalverlauf", "MT5 Verbindung"])
 
 with tab1:
-    # Check if "current_signals" exists in session state
-    if "current_signals" not in st.session_state:
-        st.session_state.current_signals = []
-        st.session_state.last_refresh = time.time()
-    
     # Refresh button at the top
     col1, col2 = st.columns([3, 1])
     with col2:
-        if st.button("Nach neuen Signalen suchen", use_container_width=True):
-            st.session_state.current_signals = refresh_all_pairs()
-            st.session_state.last_refresh = time.time()
+        manual_scan = st.button("Nach neuen Signalen suchen", use_container_width=True)
+    
+    # Results come from the scanner process; this app only reads them
+    scan = load_latest_scan(force=manual_scan)
+    current_signals = scan['signals'] if scan else []
+    if scan:
+        show_scan_sidebar(scan)
     
     with col1:
         # Auto-refresh option
-        auto_refresh = st.checkbox("Automatische Aktualisierung (alle 5 Minuten)")
+        auto_refresh = st.checkbox(f"Automatische Aktualisierung (alle {SCAN_INTERVAL // 60} Minuten)")
         if auto_refresh:
-            refresh_interval = 300  # 5 minutes in seconds
-            
-            # Check if it's time to refresh
-            current_time = time.time()
-            if current_time - st.session_state.last_refresh >= refresh_interval:
-                st.session_state.current_signals = refresh_all_pairs()
-                st.session_state.last_refresh = current_time
-            
-            # Display time until next refresh
-            time_left = refresh_interval - (current_time - st.session_state.last_refresh)
-            st.text(f"Nächste Aktualisierung in: {int(time_left)} Sekunden")
-            st.rerun()
+            if fragment is not None:
+                auto_refresh_watcher(scan)
+            else:
+                # Filled by the wait loop at the end of the script
+                refresh_countdown = st.empty()
     
     # Display the signals
-    if st.session_state.current_signals:
+    if current_signals:
         st.markdown("## Aktuelle Trading-Signale")
-        for signal in st.session_state.current_signals:
+        for signal in current_signals:
             display_signal(signal, is_current=True)
     else:
         st.info("Keine perfekten Signale gefunden. Der Algorithmus generiert nur Signale mit höchster Erfolgswahrscheinlichkeit.")
@@ -527,13 +435,36 @@ with tab1:
         
         Versuchen Sie es später erneut oder überprüfen Sie den Signalverlauf für frühere Signale.
         """)
-        st.text(f"Letzte Prüfung: {datetime.now().strftime('%H:%M:%S')}")
+        last_check = datetime.fromtimestamp(scan['created_at']) if scan else datetime.now()
+        st.text(f"Letzte Prüfung: {last_check.strftime('%H:%M:%S')}")
+    
+    # Strategy result per timeframe (only pairs with real 1m candles)
+    if scan and scan.get('timeframes'):
+        with st.expander("Signale nach Zeitrahmen"):
+            timeframe_table = pd.DataFrame.from_dict(scan['timeframes'], orient='index')
+            st.dataframe(timeframe_table.reindex(columns=list(TIMEFRAMES)).fillna("–"))
 
 with tab2:
-    st.markdown("## Signalverlauf (letzte 3 Tage)")
+    history_days = st.selectbox(
+        "Zeitraum (Tage)",
+        # Longer periods than the retention horizon are read from the Parquet archive
+        [d for d in (1, 3, 7, 30, 90, 180, 365) if d <= SIGNAL_RETENTION_DAYS or ARCHIVE_AVAILABLE]
+        or [SIGNAL_RETENTION_DAYS],
+        index=0 if SIGNAL_RETENTION_DAYS < 3 else 1
+    )
+    st.markdown(f"## Signalverlauf (letzte {history_days} Tage)")
+    
+    # Cursors of the pages shown so far (None for the first page); back to page 1 when the period changes
+    if st.session_state.get('history_days') != history_days:
+        st.session_state.history_days = history_days
+        st.session_state.history_cursors = [None]
+    cursors = st.session_state.history_cursors
+    page = len(cursors) - 1
     
-    # Get signal history
-    signal_history = get_signals_history(days=3)
+    # Get one page of the signal history (one extra row tells if there is a next page)
+    signal_history = get_history_page(history_days, cursors[-1], scan['id'] if scan else None)
+    has_next = len(signal_history) > HISTORY_PAGE_SIZE
+    signal_history = signal_history.head(HISTORY_PAGE_SIZE)
     
     if not signal_history.empty:
         for _, row in signal_history.iterrows():
@@ -552,6 +483,18 @@ with tab2:
             display_signal(signal, is_current=False)
     else:
         st.info("Keine Signale im Verlauf gefunden.")
+    
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("← Neuere", disabled=page == 0):
+            cursors.pop()
+            st.rerun()
+    with page_col:
+        st.caption(f"Seite {page + 1}")
+    with next_col:
+        if st.button("Ältere →", disabled=not has_next):
+            cursors.append(history_cursor(signal_history))
+            st.rerun()
 
 with tab3:
     st.markdown("## MetaTrader 5 Verbindung")
@@ -587,3 +530,21 @@ with col1:
     st.caption("Signal Forge Elite - Handle mit Zuversicht")
 with col2:
     st.caption("HAFTUNGSAUSSCHLUSS: Diese Anwendung bietet keine Finanzberatung. Der Handel birgt Risiken.")
+
+# Latencies after the charts of this run were built
+show_latency_sidebar(scan)
+export_metrics('app', min_interval=METRICS_EXPORT_INTERVAL)
+
+# Older Streamlit without fragments: wait (sleeping) at the end of the script
+# until a new scan exists instead of rerunning in a loop. The countdown
+# update every second lets widget interactions interrupt the wait.
+if auto_refresh and fragment is None:
+    last_check = time.time()
+    while True:
+        refresh_countdown.text(refresh_countdown_text(scan))
+        if time.time() - last_check >= REFRESH_POLL_SECONDS:
+            last_check = time.time()
+            if scan_update_available(scan):
+                break
+        time.sleep(1)
+    st.rerun()
@@ -0,0 +1,441 @@
+"""
+Columnar archive for historical candles and signals.
+
+Parquet files partitioned Hive-style by day and symbol:
+
+    archive/candles/timeframe=1m/day=2025-04-09/symbol=EURUSD/data.parquet
+    archive/candles/timeframe=1m/day=2025-04-09/symbol=EURUSD/part-<ns>-<id>.parquet
+    archive/signals/day=2025-04-09/symbol=EURUSD/data.parquet
+
+Candles are appended as small part files holding only the new bars, so a
+write costs O(new bars) and never touches existing files. The scan path
+hands them to ARCHIVE_WRITER, a background thread, and compact() merges
+the part files of each partition into data.parquet in a separate pass
+(python archive.py --compact, or compact_if_due() from the scanner).
+Readers see data.parquet and part files alike; duplicate bars are dropped.
+
+Prices are stored as float32 when the roundtrip error stays below
+FLOAT32_RTOL, text columns as dictionaries. Reads go through
+pyarrow.dataset with memory mapping, so only the selected columns of the
+partitions matching the filters are loaded.
+
+pyarrow is optional; without it ARCHIVE_AVAILABLE is False and writes are
+skipped.
+"""
+import argparse
+import glob
+import os
+import queue
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', 'archive')
+
+# Archive candles and expired signals automatically (needs pyarrow)
+ARCHIVE_ENABLED = os.environ.get('ARCHIVE_ENABLED', '1') != '0'
+ARCHIVE_AVAILABLE = PYARROW_AVAILABLE and ARCHIVE_ENABLED
+
+# Largest relative error accepted when storing a price column as float32
+FLOAT32_RTOL = 1e-7
+
+CANDLE_PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+SIGNAL_PRICE_COLUMNS = ['entry', 'sl', 'tp']
+SIGNAL_TEXT_COLUMNS = ['symbol', 'action', 'expiry']
+
+# Seconds between two automatic compactions (compact_if_due)
+COMPACT_INTERVAL = 3600
+
+# Partition rewrites are read-merge-replace; serialize them per process
+_write_lock = threading.Lock()
+
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for the Parquet archive (pip install pyarrow)")
+
+
+def compact_floats(values, rtol=FLOAT32_RTOL):
+    """
+    float32 copy of values if that is lossless enough, otherwise float64
+
+    Returns:
+    ndarray: float32 or float64 array
+    """
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(over='ignore'):
+        # Values beyond the float32 range become inf and are caught below
+        narrowed = values.astype(np.float32)
+    finite = np.isfinite(values)
+    if not np.array_equal(finite, np.isfinite(narrowed)):
+        return values
+    error = np.abs(narrowed[finite].astype(np.float64) - values[finite])
+    if error.size and np.any(error > rtol * np.abs(values[finite])):
+        return values
+    return narrowed
+
+
+def _compact_frame(df, price_columns, text_columns=()):
+    """Arrow table with float32 prices (where lossless enough) and dictionary text columns"""
+    columns = {}
+    for name in df.columns:
+        if name in price_columns:
+            columns[name] = pa.array(compact_floats(df[name].to_numpy()))
+        elif name in text_columns:
+            columns[name] = pa.array(df[name].astype(str).to_numpy()).dictionary_encode()
+        elif name == 'tick_volume' and np.all(np.mod(df[name].to_numpy(), 1) == 0) \
+                and df[name].abs().max() < 2 ** 31:
+            columns[name] = pa.array(df[name].to_numpy().astype(np.int32))
+        elif name == 'safety':
+            columns[name] = pa.array(df[name].to_numpy().astype(np.int16))
+        else:
+            columns[name] = pa.array(df[name].to_numpy())
+    return pa.table(columns)
+
+
+def _partition_path(root, **keys):
+    return os.path.join(root, *(f"{k}={v}" for k, v in keys.items()))
+
+
+def _write_atomic(table, path):
+    tmp_path = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}.tmp")
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+def _read_partition_files(paths, text_columns=()):
+    frames = []
+    for path in paths:
+        df = pq.read_table(path, memory_map=True).to_pandas()
+        for name in text_columns:
+            if name in df:
+                df[name] = df[name].astype(str)
+        frames.append(df)
+    return frames
+
+
+def _rewrite_partition(directory, df, key_columns, price_columns, text_columns=(), parts=()):
+    """
+    Merge df and the part files parts into the partition file (deduplicated
+    on key_columns, last row wins), replace it atomically and delete parts
+    """
+    path = os.path.join(directory, 'data.parquet')
+    with _write_lock:
+        existing = [path] if os.path.exists(path) else []
+        frames = _read_partition_files(existing + sorted(parts), text_columns)
+        if df is not None:
+            frames.append(df)
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        df = df.drop_duplicates(key_columns, keep='last')
+        df = df.sort_values(key_columns[0], kind='stable').reset_index(drop=True)
+        os.makedirs(directory, exist_ok=True)
+        _write_atomic(_compact_frame(df, price_columns, text_columns), path)
+        for part in parts:
+            try:
+                os.remove(part)
+            except FileNotFoundError:
+                # Another process compacted this partition at the same time
+                pass
+    return len(df)
+
+
+def write_candles(symbol, df, timeframe='1m', root=ARCHIVE_DIR):
+    """
+    Archive candles of one symbol as a new part file per day. Existing files
+    are not read or rewritten; pass only bars not yet archived (bars written
+    twice are deduplicated by readers and compact()).
+
+    Parameters:
+    symbol (str): Symbol
+    df (DataFrame): time, open, high, low, close (tick_volume optional)
+    timeframe (str): Candle timeframe (own partition level)
+
+    Returns:
+    int: Number of written partitions
+    """
+    _require_pyarrow()
+    if df is None or len(df) == 0:
+        return 0
+    columns = ['time'] + CANDLE_PRICE_COLUMNS + (['tick_volume'] if 'tick_volume' in df else [])
+    df = df[columns]
+    base = os.path.join(root, 'candles')
+    days = df['time'].dt.strftime('%Y-%m-%d')
+    for day, part in df.groupby(days.to_numpy(), sort=False):
+        directory = _partition_path(base, timeframe=timeframe, day=day, symbol=symbol)
+        os.makedirs(directory, exist_ok=True)
+        # Time-ordered names: compact() merges the parts in write order
+        name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        _write_atomic(_compact_frame(part.reset_index(drop=True), CANDLE_PRICE_COLUMNS), os.path.join(directory, name))
+    return days.nunique()
+
+
+def compact(root=ARCHIVE_DIR, min_parts=1):
+    """
+    Merge the part files of every candle partition into its data.parquet
+
+    Parameters:
+    min_parts (int): Only partitions with at least this many part files
+
+    Returns:
+    int: Number of compacted partitions
+    """
+    _require_pyarrow()
+    compacted = 0
+    for directory in sorted(glob.glob(os.path.join(root, 'candles', '*', '*', '*'))):
+        parts = glob.glob(os.path.join(directory, 'part-*.parquet'))
+        if len(parts) < min_parts or not parts:
+            continue
+        try:
+            _rewrite_partition(directory, None, ['time'], CANDLE_PRICE_COLUMNS, parts=parts)
+            compacted += 1
+        except (OSError, ValueError) as e:
+            print(f"Fehler beim Kompaktieren von {directory}: {e}")
+    return compacted
+
+
+_last_compaction = 0.0
+
+
+def compact_if_due(interval=COMPACT_INTERVAL, root=ARCHIVE_DIR):
+    """compact() at most once per interval seconds in this process"""
+    global _last_compaction
+    if not ARCHIVE_AVAILABLE or time.time() - _last_compaction < interval:
+        return 0
+    _last_compaction = time.time()
+    ARCHIVE_WRITER.flush()
+    return compact(root)
+
+
+class ArchiveWriter:
+    """
+    Archives candles from a background thread, so the scan path only
+    enqueues. Only completed bars newer than the last bar submitted for the
+    same symbol and timeframe are written; the newest bar of a response may
+    still be forming and is archived once the next response closes it.
+    A failed write moves that mark back, so its bars are submitted again
+    with the next response.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self._queue = queue.Queue()
+        self._archived_until = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.written = 0
+        self.errors = 0
+
+    def submit_candles(self, symbol, df, timeframe='1m'):
+        """
+        Queue the new completed bars of df for archiving
+
+        Returns:
+        int: Number of queued bars
+        """
+        if df is None or len(df) < 2:
+            return 0
+        times = df['time'].to_numpy(dtype='datetime64[ns]')
+        closed = times[:-1]
+        with self._lock:
+            last = self._archived_until.get((symbol, timeframe))
+            first = 0 if last is None else int(np.searchsorted(closed, last, side='right'))
+            if first >= len(closed):
+                return 0
+            self._archived_until[(symbol, timeframe)] = closed[-1]
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put((symbol, df.iloc[first:len(closed)].copy(), timeframe, last))
+        return len(closed) - first
+
+    def _run(self):
+        while True:
+            symbol, df, timeframe, previous = self._queue.get()
+            try:
+                write_candles(symbol, df, timeframe, self.root)
+                self.written += len(df)
+            except Exception as e:
+                self.errors += 1
+                print(f"Fehler beim Archivieren der Kerzen für {symbol}: {e}")
+                with self._lock:
+                    # Back to the mark before this batch (unless an earlier failure went further back)
+                    current = self._archived_until.get((symbol, timeframe))
+                    if previous is None:
+                        self._archived_until.pop((symbol, timeframe), None)
+                    elif current is not None and current > previous:
+                        self._archived_until[(symbol, timeframe)] = previous
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Wait until every queued write is done"""
+        self._queue.join()
+
+
+ARCHIVE_WRITER = ArchiveWriter()
+
+
+def write_signals(signals_df, root=ARCHIVE_DIR):
+    """
+    Archive signals (SIGNAL_COLUMNS), partitioned by day and symbol
+
+    Returns:
+    int: Number of written partitions
+    """
+    _require_pyarrow()
+    if signals_df is None or len(signals_df) == 0:
+        return 0
+    signals_df = signals_df.copy()
+    signals_df['timestamp'] = pd.to_datetime(signals_df['timestamp'])
+    base = os.path.join(root, 'signals')
+    keys = [signals_df['timestamp'].dt.strftime('%Y-%m-%d').to_numpy(), signals_df['symbol'].to_numpy()]
+    written = 0
+    for (day, symbol), part in signals_df.groupby(keys, sort=False):
+        directory = _partition_path(base, day=day, symbol=symbol)
+        _rewrite_partition(directory, part.drop(columns='symbol'), ['timestamp', 'action'],
+                           SIGNAL_PRICE_COLUMNS, SIGNAL_TEXT_COLUMNS)
+        written += 1
+    return written
+
+
+def _dataset(base, partition_fields):
+    partitioning = ds.partitioning(pa.schema([(name, pa.string()) for name in partition_fields]), flavor='hive')
+    # use_mmap: Parquet pages are mapped instead of read into buffers
+    return ds.dataset(base, format='parquet', partitioning=partitioning,
+                      filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+
+def _day_filter(column, start, end):
+    """Partition pruning on the day key plus an exact filter on column"""
+    expr = None
+    if start is not None:
+        start = pd.Timestamp(start)
+        expr = (ds.field('day') >= start.strftime('%Y-%m-%d')) & (ds.field(column) >= pa.scalar(start.to_pydatetime(), pa.timestamp('ns')))
+    if end is not None:
+        end = pd.Timestamp(end)
+        cond = (ds.field('day') <= end.strftime('%Y-%m-%d')) & (ds.field(column) < pa.scalar(end.to_pydatetime(), pa.timestamp('ns')))
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def _in_filter(name, values):
+    if values is None:
+        return None
+    if isinstance(values, str):
+        values = [values]
+    return ds.field(name).isin(list(values))
+
+
+def _and(*exprs):
+    result = None
+    for expr in exprs:
+        if expr is not None:
+            result = expr if result is None else result & expr
+    return result
+
+
+def _to_frame(table, float64=True):
+    df = table.to_pandas()
+    if float64:
+        for name in df.columns:
+            if df[name].dtype == np.float32:
+                df[name] = df[name].astype(np.float64)
+    return df
+
+
+def read_candles(symbols=None, start=None, end=None, timeframe='1m', columns=None, root=ARCHIVE_DIR, float64=True):
+    """
+    Load archived candles; only the requested columns of the partitions
+    matching the filters are read
+
+    Parameters:
+    symbols (str or list): Only these symbols (None for all)
+    start, end (datetime): Time range (start inclusive, end exclusive)
+    timeframe (str): Candle timeframe
+    columns (list): Columns to load (time and symbol are always included)
+    float64 (bool): Widen float32 columns back to float64
+
+    Returns:
+    DataFrame: Candles sorted by symbol and time
+    """
+    _require_pyarrow()
+    base = os.path.join(root, 'candles')
+    if not os.path.isdir(base):
+        return pd.DataFrame(columns=['symbol', 'time'] + (columns or CANDLE_PRICE_COLUMNS + ['tick_volume']))
+    dataset = _dataset(base, ['timeframe', 'day', 'symbol'])
+    if columns is not None:
+        columns = ['symbol', 'time'] + [c for c in columns if c not in ('symbol', 'time')]
+    expr = _and(ds.field('timeframe') == timeframe, _in_filter('symbol', symbols), _day_filter('time', start, end))
+    table = dataset.to_table(columns=columns, filter=expr)
+    if columns is None:
+        table = table.drop_columns(['timeframe', 'day'])
+    table = table.sort_by([('symbol', 'ascending'), ('time', 'ascending')])
+    df = _to_frame(table, float64)
+    # Part files not yet compacted may repeat a bar
+    return df.drop_duplicates(['symbol', 'time'], keep='last').reset_index(drop=True)
+
+
+def read_candle_frames(symbols=None, start=None, end=None, timeframe='1m', columns=None, root=ARCHIVE_DIR):
+    """
+    read_candles split into one frame per symbol (e.g. for backtest_symbols)
+
+    Returns:
+    dict: symbol -> DataFrame
+    """
+    df = read_candles(symbols, start, end, timeframe, columns, root)
+    return {symbol: part.drop(columns='symbol').reset_index(drop=True)
+            for symbol, part in df.groupby('symbol', sort=True)}
+
+
+def read_signals(start=None, end=None, symbols=None, columns=None, root=ARCHIVE_DIR, float64=True):
+    """
+    Load archived signals, newest first
+
+    Parameters:
+    start, end (datetime): Time range (start inclusive, end exclusive)
+    symbols (str or list): Only these symbols
+    columns (list): Columns to load (timestamp and symbol are always included)
+
+    Returns:
+    DataFrame: Signals
+    """
+    _require_pyarrow()
+    base = os.path.join(root, 'signals')
+    if not os.path.isdir(base):
+        return pd.DataFrame(columns=['timestamp', 'symbol'] + (columns or ['action'] + SIGNAL_PRICE_COLUMNS + ['safety', 'expiry']))
+    dataset = _dataset(base, ['day', 'symbol'])
+    if columns is not None:
+        columns = ['timestamp', 'symbol'] + [c for c in columns if c not in ('timestamp', 'symbol')]
+    table = dataset.to_table(columns=columns, filter=_and(_in_filter('symbol', symbols), _day_filter('timestamp', start, end)))
+    if columns is None:
+        table = table.drop_columns(['day'])
+    # Symbol as tiebreaker: the order within a timestamp is the same on every read
+    table = table.sort_by([('timestamp', 'descending'), ('symbol', 'ascending')])
+    df = _to_frame(table, float64)
+    for name in SIGNAL_TEXT_COLUMNS:
+        if name in df and isinstance(df[name].dtype, pd.CategoricalDtype):
+            df[name] = df[name].astype(str)
+    return df
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the Parquet archive")
+    parser.add_argument("--compact", action="store_true", help="Merge the part files of every candle partition")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    if args.compact:
+        print(f"{compact(args.root)} Partitionen kompaktiert")
@@ -0,0 +1,203 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from kernels import indicator_arrays
+from strategy import DEFAULT_PARAMS, signal_conditions
+
+# Bars scanned per step when searching for the SL/TP hit of a trade
+EXIT_SEARCH_CHUNK = 256
+
+TRADE_COLUMNS = ['entry_index', 'exit_index', 'direction', 'entry', 'sl', 'tp', 'exit', 'outcome', 'r_multiple']
+
+
+def signal_masks(indicators, params=DEFAULT_PARAMS):
+    """
+    Vectorized Profit Pulse Precision criteria for every bar.
+
+    Parameters:
+    indicators (DataFrame or dict): ema10, ema50, atr, adx and rsi columns
+    params (StrategyParams): Strategy thresholds
+
+    Returns:
+    tuple: (buy, sell) boolean arrays, one entry per bar
+    """
+    return signal_conditions(
+        indicators['ema10'], indicators['ema50'], indicators['atr'],
+        indicators['adx'], indicators['rsi'], params
+    )
+
+
+def _find_exit(high, low, start, direction, sl, tp):
+    """
+    First bar at or after start where SL or TP is touched.
+    If both are touched in the same bar the stop loss is assumed to fill first.
+
+    Returns:
+    tuple: (index, outcome) with outcome 'tp' or 'sl', or (None, None)
+    """
+    n = len(high)
+    chunk = EXIT_SEARCH_CHUNK
+    while start < n:
+        end = min(n, start + chunk)
+        if direction > 0:
+            sl_hit = low[start:end] <= sl
+            tp_hit = high[start:end] >= tp
+        else:
+            sl_hit = high[start:end] >= sl
+            tp_hit = low[start:end] <= tp
+        hit = sl_hit | tp_hit
+        if hit.any():
+            offset = int(np.argmax(hit))
+            return start + offset, ('sl' if sl_hit[offset] else 'tp')
+        start = end
+        chunk *= 2
+    return None, None
+
+
+def simulate_trades(high, low, close, buy, sell, sl_distance, tp_distance):
+    """
+    Simulate one position at a time: enter at the close of a signal bar and
+    walk forward bar by bar until SL or TP is hit. Signals while a position
+    is open are skipped; a position still open at the end is not counted.
+
+    Returns:
+    DataFrame: One row per closed trade (see TRADE_COLUMNS)
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    signal_bars = np.flatnonzero(buy | sell)
+
+    trades = []
+    next_free = 0
+    for i in signal_bars:
+        if i < next_free:
+            continue
+        direction = 1 if buy[i] else -1
+        entry = close[i]
+        sl = entry - direction * sl_distance[i]
+        tp = entry + direction * tp_distance[i]
+        exit_index, outcome = _find_exit(high, low, i + 1, direction, sl, tp)
+        if exit_index is None:
+            break
+        exit_price = sl if outcome == 'sl' else tp
+        r_multiple = direction * (exit_price - entry) / sl_distance[i]
+        trades.append((i, exit_index, direction, entry, sl, tp, exit_price, outcome, r_multiple))
+        next_free = exit_index + 1
+
+    return pd.DataFrame(trades, columns=TRADE_COLUMNS)
+
+
+def summarize_trades(trades):
+    """
+    Hit rate, expectancy and drawdown of a trade list
+
+    Returns:
+    dict: trades, wins, losses, hit_rate, expectancy_r, total_r,
+          max_drawdown_r, avg_bars_held
+    """
+    n = len(trades)
+    if n == 0:
+        return {
+            'trades': 0, 'wins': 0, 'losses': 0, 'hit_rate': np.nan, 'expectancy_r': np.nan,
+            'total_r': 0.0, 'max_drawdown_r': 0.0, 'avg_bars_held': np.nan
+        }
+    r = trades['r_multiple'].to_numpy()
+    equity = np.concatenate(([0.0], np.cumsum(r)))
+    drawdown = np.maximum.accumulate(equity) - equity
+    wins = int((trades['outcome'] == 'tp').sum())
+    return {
+        'trades': n,
+        'wins': wins,
+        'losses': n - wins,
+        'hit_rate': wins / n,
+        'expectancy_r': float(r.mean()),
+        'total_r': float(r.sum()),
+        'max_drawdown_r': float(drawdown.max()),
+        'avg_bars_held': float((trades['exit_index'] - trades['entry_index']).mean())
+    }
+
+
+def backtest_arrays(high, low, close, indicators, params=DEFAULT_PARAMS):
+    """
+    Backtest on precomputed indicator arrays (ema10, ema50, atr, adx, rsi)
+
+    Returns:
+    tuple: (summary dict, trades DataFrame)
+    """
+    buy, sell = signal_masks(indicators, params)
+    # Same distances as calculate_stop_loss / calculate_take_profit
+    sl_distance = np.maximum(np.asarray(indicators['atr'], dtype=np.float64) * params.sl_atr_factor, params.min_sl)
+    tp_distance = sl_distance * params.risk_reward
+    trades = simulate_trades(high, low, close, buy, sell, sl_distance, tp_distance)
+    summary = summarize_trades(trades)
+    summary['signals'] = int(buy.sum() + sell.sum())
+    summary['bars'] = len(close)
+    return summary, trades
+
+
+def backtest(df, params=DEFAULT_PARAMS):
+    """
+    Backtest profit_pulse_precision over the full history of one symbol.
+    Indicators are computed once; the signal of every bar is derived with
+    vectorized operations instead of re-running the strategy per prefix.
+
+    Parameters:
+    df (DataFrame): OHLC candles (time, open, high, low, close)
+    params (StrategyParams): Strategy thresholds
+
+    Returns:
+    tuple: (summary dict, trades DataFrame)
+    """
+    indicators = indicator_arrays(df['high'], df['low'], df['close'], params.ema_fast, params.ema_slow)
+    summary, trades = backtest_arrays(df['high'], df['low'], df['close'], indicators, params)
+    if 'time' in df.columns and len(trades):
+        times = df['time'].to_numpy()
+        trades['entry_time'] = times[trades['entry_index'].to_numpy()]
+        trades['exit_time'] = times[trades['exit_index'].to_numpy()]
+    return summary, trades
+
+
+def backtest_symbols(frames, params=DEFAULT_PARAMS):
+    """
+    Backtest several symbols
+
+    Parameters:
+    frames (dict): symbol -> OHLC DataFrame
+    params (StrategyParams): Strategy thresholds
+
+    Returns:
+    DataFrame: One summary row per symbol
+    """
+    rows = []
+    for symbol, df in frames.items():
+        summary, _ = backtest(df, params)
+        rows.append({'symbol': symbol, **summary})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest Profit Pulse Precision on candle CSV files")
+    parser.add_argument("files", nargs="*", help="CSV files with time, open, high, low, close columns (one symbol per file)")
+    parser.add_argument("--archive", nargs="*", metavar="SYMBOL",
+                        help="Load candles from the Parquet archive instead (all symbols if none given)")
+    parser.add_argument("--start", help="Archive range start (e.g. 2025-01-01)")
+    parser.add_argument("--end", help="Archive range end (exclusive)")
+    parser.add_argument("--timeframe", default="1m")
+    args = parser.parse_args()
+
+    if args.archive is not None:
+        from archive import read_candle_frames
+        # Only the needed columns of the matching day/symbol partitions are read
+        frames = read_candle_frames(args.archive or None, args.start, args.end, args.timeframe,
+                                    columns=['high', 'low', 'close'])
+    else:
+        if not args.files:
+            parser.error("CSV files or --archive required")
+        frames = {}
+        for path in args.files:
+            symbol = path.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+            frames[symbol] = pd.read_csv(path, parse_dates=['time'])
+    print(backtest_symbols(frames).to_string(index=False))
@@ -0,0 +1,369 @@
+"""
+Benchmark suite for the signal pipeline hot paths.
+
+Runs offline: quotes and candles come from the in-process mock provider
+instead of Yahoo Finance, and signal files are written to a temporary
+directory.
+
+    python benchmark.py                           # full run, print table
+    python benchmark.py --quick --output run.json
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --baseline benchmark_baseline.json --threshold 0.25
+    python benchmark.py --memory                  # peak memory of the indicator paths
+    python benchmark.py --backend numpy           # strategy stages on the NumPy kernels
+
+With --baseline the exit code is 1 if any stage got slower than the
+baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import kernels
+import market_data
+import scanner
+import utils
+from signal_store import configure_signal_store
+from indicators import IndicatorBuffers, indicator_arrays
+from providers import PROVIDERS, MockProvider
+from strategy import calculate_indicator_frame, calculate_indicators, profit_pulse_precision
+
+BAR_SIZES = [500, 5_000, 50_000, 1_000_000]
+SYMBOL_COUNTS = [12, 100, 500]
+HISTORY_ROWS = [1_000, 10_000, 100_000]
+
+QUICK_BAR_SIZES = [500, 5_000]
+QUICK_SYMBOL_COUNTS = [12, 100]
+
+# Symbols per full scan against the mock provider
+SCAN_SYMBOL_COUNTS = [100, 1_000, 5_000]
+QUICK_SCAN_SYMBOL_COUNTS = [100, 1_000]
+QUICK_HISTORY_ROWS = [1_000, 10_000]
+
+MEMORY_BAR_SIZES = [50_000, 1_000_000]
+QUICK_MEMORY_BAR_SIZES = [50_000]
+
+# Bars per stubbed chart response (one trading day of 1-minute bars)
+STUB_CANDLES = 1440
+
+# Differences below this many seconds are treated as noise when comparing
+MIN_REGRESSION_SECONDS = 0.001
+
+
+def random_walk_candles(n, seed=0, base=1.1, start="2024-01-01"):
+    """Vectorized random-walk OHLC candles for benchmarking"""
+    rng = np.random.default_rng(seed)
+    closes = base + np.cumsum(rng.normal(0, 0.0002, n))
+    opens = np.empty(n)
+    opens[0] = closes[0]
+    opens[1:] = closes[:-1]
+    highs = np.maximum(opens, closes) + np.abs(rng.normal(0, 0.0001, n))
+    lows = np.minimum(opens, closes) - np.abs(rng.normal(0, 0.0001, n))
+    return pd.DataFrame({
+        'time': pd.date_range(start, periods=n, freq="min"),
+        'open': opens,
+        'high': highs,
+        'low': lows,
+        'close': closes,
+        'tick_volume': np.zeros(n)
+    })
+
+
+def use_mock_provider(candles=STUB_CANDLES):
+    """Load every quote from a fresh mock provider: price plus candles, no network"""
+    PROVIDERS.register(MockProvider(bars=candles))
+    market_data.use_providers(['mock'])
+
+
+def symbol_universe(n):
+    """The 12 app symbols, padded with synthetic ones up to n"""
+    symbols = list(market_data.FALLBACK_PRICES)[:n]
+    symbols += [f"SYM{i:04d}" for i in range(n - len(symbols))]
+    return symbols
+
+
+def time_call(fn, repeats, setup=None):
+    """Run fn repeats times, returning the durations in seconds"""
+    durations = []
+    for _ in range(repeats):
+        args = setup() if setup is not None else ()
+        start = time.perf_counter()
+        fn(*args)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _repeats_for(size, repeats):
+    # Keep large sizes affordable
+    return max(1, min(repeats, int(2_000_000 // max(size, 1))))
+
+
+def bench_get_forex_data(n_symbols, repeats):
+    symbols = symbol_universe(n_symbols)
+    use_mock_provider()
+
+    def scan():
+        snapshot = market_data.get_quote_snapshot(symbols)
+        for symbol in symbols:
+            market_data.get_forex_frame(symbol, 500, snapshot=snapshot)
+
+    scan()  # warm the cache
+    return time_call(scan, repeats)
+
+
+def bench_scan_pairs(n_symbols, repeats):
+    symbols = symbol_universe(n_symbols)
+    use_mock_provider()
+    configure_signal_store('signals.db', import_path=None)
+    scanner.scan_pairs(symbols)  # warm the cache
+    return time_call(lambda: scanner.scan_pairs(symbols), _repeats_for(n_symbols * 1000, repeats))
+
+
+def bench_calculate_indicators(n_bars, repeats):
+    df = random_walk_candles(n_bars)
+    return time_call(calculate_indicators, _repeats_for(n_bars, repeats), setup=lambda: (df,))
+
+
+def bench_calculate_indicator_frame(n_bars, repeats):
+    df = random_walk_candles(n_bars)
+    # First call outside the timing (JIT compilation of the numba kernels)
+    calculate_indicator_frame(df)
+    return time_call(calculate_indicator_frame, _repeats_for(n_bars, repeats), setup=lambda: (df,))
+
+
+def bench_indicator_kernels(backend):
+    """Stage function timing kernels.indicator_arrays with one backend"""
+    def bench(n_bars, repeats):
+        df = random_walk_candles(n_bars)
+        high, low, close = (df[name].to_numpy() for name in ('high', 'low', 'close'))
+        buffers = IndicatorBuffers(n_bars)
+        # First call outside the timing (JIT compilation)
+        kernels.indicator_arrays(high, low, close, buffers=buffers, backend=backend)
+        return time_call(lambda: kernels.indicator_arrays(high, low, close, buffers=buffers, backend=backend),
+                         _repeats_for(n_bars, repeats))
+    return bench
+
+
+def bench_profit_pulse_precision(n_bars, repeats):
+    df = random_walk_candles(n_bars)
+    # Runs calculate_indicator_frame; first call outside the timing as above
+    profit_pulse_precision(df)
+    return time_call(profit_pulse_precision, _repeats_for(n_bars, repeats), setup=lambda: (df,))
+
+
+def bench_generate_synthetic_candles(n_bars, repeats):
+    prices = iter(np.linspace(1.07, 1.09, 10_000))
+    # A new live price per call, so only the memoized base history is reused
+    return time_call(lambda: market_data.generate_synthetic_candles('EURUSD', next(prices), 1.06, n_bars),
+                     _repeats_for(n_bars, repeats))
+
+
+def _write_history(rows):
+    """Fresh signal store in the working directory filled with rows signals"""
+    if os.path.exists('signals.db'):
+        os.remove('signals.db')
+    now = datetime.now()
+    rng = np.random.default_rng(0)
+    symbols = np.array(list(market_data.FALLBACK_PRICES))
+    entries = rng.uniform(1.0, 1.2, rows)
+    history = pd.DataFrame({
+        'timestamp': [now - timedelta(seconds=int(s)) for s in rng.integers(0, 3 * 86400, rows)],
+        'symbol': symbols[rng.integers(0, len(symbols), rows)],
+        'action': np.where(rng.random(rows) > 0.5, 'BUY', 'SELL'),
+        'entry': entries,
+        'sl': entries - 0.0008,
+        'tp': entries + 0.0024,
+        'safety': 98,
+        'expiry': '12:00 UTC'
+    })
+    configure_signal_store('signals.db', import_path=None).add_signals(history.to_dict('records'))
+
+
+def bench_save_signal(n_symbols, repeats):
+    symbols = symbol_universe(n_symbols)
+
+    def setup():
+        _write_history(1_000)
+        return ()
+
+    def save_all():
+        for symbol in symbols:
+            utils.save_signal(symbol, 'BUY', 1.1, 1.0992, 1.1024, 98, '12:00 UTC')
+
+    return time_call(save_all, _repeats_for(n_symbols * 1000, repeats), setup=setup)
+
+
+def bench_get_signals_history(n_rows, repeats):
+    _write_history(n_rows)
+    # One history tab page
+    return time_call(lambda: utils.get_signals_history(days=3, limit=20), _repeats_for(n_rows, repeats))
+
+
+def stage_plan(quick=False):
+    """(stage, unit, sizes, function) for every benchmarked stage"""
+    bars = QUICK_BAR_SIZES if quick else BAR_SIZES
+    symbols = QUICK_SYMBOL_COUNTS if quick else SYMBOL_COUNTS
+    rows = QUICK_HISTORY_ROWS if quick else HISTORY_ROWS
+    scan_symbols = QUICK_SCAN_SYMBOL_COUNTS if quick else SCAN_SYMBOL_COUNTS
+    return [
+        ('get_forex_data', 'symbols', symbols, bench_get_forex_data),
+        ('scan_pairs', 'symbols', scan_symbols, bench_scan_pairs),
+        ('calculate_indicators', 'bars', bars, bench_calculate_indicators),
+        ('calculate_indicator_frame', 'bars', bars, bench_calculate_indicator_frame),
+        *[(f'indicator_kernels[{backend}]', 'bars', bars, bench_indicator_kernels(backend))
+          for backend in kernels.available_backends()],
+        ('profit_pulse_precision', 'bars', bars, bench_profit_pulse_precision),
+        ('generate_synthetic_candles', 'bars', bars, bench_generate_synthetic_candles),
+        ('save_signal', 'symbols', symbols, bench_save_signal),
+        ('get_signals_history', 'rows', rows, bench_get_signals_history),
+    ]
+
+
+def run_benchmarks(quick=False, repeats=5, stages=None):
+    """
+    Run every stage at every size inside a temporary working directory
+
+    Returns:
+    dict: {'meta': {...}, 'results': [{stage, size, unit, repeats, min_s, median_s}, ...]}
+    """
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            for stage, unit, sizes, fn in stage_plan(quick):
+                if stages and stage not in stages:
+                    continue
+                for size in sizes:
+                    durations = fn(size, repeats)
+                    results.append({
+                        'stage': stage,
+                        'size': size,
+                        'unit': unit,
+                        'repeats': len(durations),
+                        'min_s': min(durations),
+                        'median_s': statistics.median(durations)
+                    })
+                    print(f"{stage:<24} {size:>10,} {unit:<8} median {results[-1]['median_s'] * 1000:10.2f} ms",
+                          file=sys.stderr)
+        finally:
+            os.chdir(cwd)
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'indicator_backend': kernels.get_backend(),
+            'quick': quick
+        },
+        'results': results
+    }
+
+
+def peak_memory(fn, *args):
+    """Peak bytes allocated while running fn(*args) (tracemalloc)"""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_memory_benchmarks(quick=False):
+    """
+    Peak memory of the indicator paths: the pandas reference
+    (calculate_indicators), the lean NumPy frame (calculate_indicator_frame)
+    and indicator_arrays with preallocated IndicatorBuffers
+
+    Returns:
+    list: {variant, size, unit, peak_bytes} dicts
+    """
+    results = []
+    for size in (QUICK_MEMORY_BAR_SIZES if quick else MEMORY_BAR_SIZES):
+        df = random_walk_candles(size)
+        high, low, close = (df[name].to_numpy() for name in ('high', 'low', 'close'))
+        buffers = IndicatorBuffers(size)
+        variants = [
+            ('calculate_indicators', calculate_indicators, (df,)),
+            ('calculate_indicator_frame', calculate_indicator_frame, (df,)),
+            ('indicator_arrays+buffers', indicator_arrays, (high, low, close, 10, 50, buffers)),
+        ]
+        for variant, fn, args in variants:
+            results.append({'variant': variant, 'size': size, 'unit': 'bars', 'peak_bytes': peak_memory(fn, *args)})
+            print(f"{variant:<26} {size:>10,} bars     peak {results[-1]['peak_bytes'] / 2 ** 20:10.2f} MiB",
+                  file=sys.stderr)
+    return results
+
+
+def compare_to_baseline(report, baseline, threshold):
+    """
+    Compare median timings with a baseline report
+
+    Returns:
+    list: (stage, size, baseline_s, current_s, ratio) for every regression
+    """
+    previous = {(r['stage'], r['size']): r['median_s'] for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        key = (result['stage'], result['size'])
+        if key not in previous:
+            continue
+        base, current = previous[key], result['median_s']
+        if current > base * (1 + threshold) and current - base > MIN_REGRESSION_SECONDS:
+            regressions.append((key[0], key[1], base, current, current / base))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Signal Forge Elite pipeline")
+    parser.add_argument("--quick", action="store_true", help="Only the small sizes")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--stage", action="append", help="Only run this stage (repeatable)")
+    parser.add_argument("--backend", choices=kernels.available_backends(),
+                        help="Indicator backend for the strategy stages (default: %s)" % kernels.get_backend())
+    parser.add_argument("--memory", action="store_true", help="Also measure peak memory of the indicator paths")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the results as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against this baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown before a stage counts as regressed (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        kernels.set_backend(args.backend)
+    report = run_benchmarks(quick=args.quick, repeats=args.repeats, stages=args.stage)
+    if args.memory:
+        report['memory'] = run_memory_benchmarks(quick=args.quick)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold)
+        for stage, size, base, current, ratio in regressions:
+            print(f"REGRESSION {stage} @ {size:,}: {base * 1000:.2f} ms -> {current * 1000:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Default number of bars kept per (symbol, timeframe)
+DEFAULT_CAPACITY = 2000
+
+# Bars allocated for a new ring; it grows (doubling) up to its capacity
+INITIAL_ALLOCATION = 128
+
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'tick_volume')
+
+
+class CandleRing:
+    """
+    Fixed-size ring buffer of OHLCV bars backed by preallocated NumPy arrays.
+
+    Every bar is written twice, at position p and p + capacity, so the
+    current window is always one contiguous slice of the buffer. frame()
+    and arrays() can therefore hand out zero-copy views no matter where the
+    ring has wrapped. The buffers start small and double as bars arrive,
+    so short series (higher timeframes, thousands of symbols) stay cheap;
+    memory is bounded by capacity.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._allocate(min(capacity, INITIAL_ALLOCATION))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_time(self):
+        """Timestamp of the newest bar as int64 nanoseconds (None if empty)"""
+        if self._size == 0:
+            return None
+        return int(self._time[self._start + self._size - 1])
+
+    def _allocate(self, allocated):
+        self._allocated = allocated
+        self._time = np.zeros(2 * allocated, dtype=np.int64)
+        self._values = {field: np.zeros(2 * allocated, dtype=np.float64) for field in CANDLE_FIELDS}
+
+    def _grow(self, needed):
+        """Reallocate for needed bars (at most capacity), keeping the current window"""
+        allocated = min(self.capacity, max(needed, 2 * self._allocated))
+        if allocated <= self._allocated:
+            return
+        current = {name: np.array(values) for name, values in self.arrays().items()}
+        self._allocate(allocated)
+        self._start = 0
+        if self._size:
+            self._write(np.arange(self._size), current['time'].view(np.int64), current)
+
+    def _write(self, positions, times, values):
+        self._time[positions] = times
+        self._time[positions + self._allocated] = times
+        for field in CANDLE_FIELDS:
+            self._values[field][positions] = values[field]
+            self._values[field][positions + self._allocated] = values[field]
+
+    def _append(self, times, values):
+        """Append bars (already sorted and newer than last_time)"""
+        k = len(times)
+        if k == 0:
+            return
+        if self._size + k > self._allocated:
+            self._grow(self._size + k)
+        if k >= self._allocated:
+            # Only the newest capacity bars survive
+            times = times[-self._allocated:]
+            values = {field: values[field][-self._allocated:] for field in CANDLE_FIELDS}
+            self._start = 0
+            self._size = 0
+            k = self._allocated
+        positions = (self._start + self._size + np.arange(k)) % self._allocated
+        self._write(positions, times, values)
+        overflow = self._size + k - self._allocated
+        if overflow > 0:
+            self._start = (self._start + overflow) % self._allocated
+            self._size = self._allocated
+        else:
+            self._size += k
+
+    def merge(self, times, values, assume_sorted=False):
+        """
+        Merge fetched bars into the ring.
+
+        Bars older than the newest stored bar are ignored, a bar with the
+        same timestamp replaces the (possibly still forming) newest bar and
+        newer bars are appended. Duplicate timestamps in the input keep the
+        last occurrence. Cost grows with the number of new bars only.
+
+        Parameters:
+        times (ndarray): int64 nanosecond timestamps
+        values (dict): field -> ndarray for every field in CANDLE_FIELDS
+        assume_sorted (bool): Skip the ordering check for input known to be sorted
+
+        Returns:
+        int: Number of bars appended
+        """
+        times = np.asarray(times, dtype=np.int64)
+        if len(times) == 0:
+            return 0
+
+        last = self.last_time
+        if last is not None and (assume_sorted or np.all(times[1:] >= times[:-1])):
+            # Sorted input: skip everything older than the newest stored bar
+            first = np.searchsorted(times, last, side='left')
+            times = times[first:]
+            values = {field: np.asarray(values[field])[first:] for field in CANDLE_FIELDS}
+        else:
+            order = np.argsort(times, kind='stable')
+            times = times[order]
+            values = {field: np.asarray(values[field])[order] for field in CANDLE_FIELDS}
+            if last is not None:
+                keep = times >= last
+                times = times[keep]
+                values = {field: values[field][keep] for field in CANDLE_FIELDS}
+        if len(times) == 0:
+            return 0
+
+        # Deduplicate: keep the last bar of each run of equal timestamps
+        unique = np.empty(len(times), dtype=bool)
+        unique[:-1] = times[1:] != times[:-1]
+        unique[-1] = True
+        if not unique.all():
+            times = times[unique]
+            values = {field: values[field][unique] for field in CANDLE_FIELDS}
+
+        if last is not None and times[0] == last:
+            # Update the newest bar in place
+            position = np.array([(self._start + self._size - 1) % self._allocated])
+            self._write(position, times[:1], {field: values[field][:1] for field in CANDLE_FIELDS})
+            times = times[1:]
+            values = {field: values[field][1:] for field in CANDLE_FIELDS}
+
+        self._append(times, values)
+        return len(times)
+
+    def arrays(self, n=None):
+        """
+        Zero-copy views of the newest n bars (all bars if n is None).
+        The views are only valid until the next merge.
+
+        Returns:
+        dict: 'time' (datetime64[ns]) plus one float64 array per field
+        """
+        size = self._size if n is None else min(n, self._size)
+        end = self._start + self._size
+        begin = end - size
+        result = {'time': self._time[begin:end].view('datetime64[ns]')}
+        for field in CANDLE_FIELDS:
+            result[field] = self._values[field][begin:end]
+        return result
+
+    def frame(self, n=None):
+        """DataFrame over zero-copy views of the newest n bars"""
+        return pd.DataFrame(self.arrays(n), copy=False)
+
+
+class CandleStore:
+    """
+    In-memory candle store keyed by (symbol, timeframe).
+    Each key owns one CandleRing, so memory per symbol is bounded.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def ring(self, symbol, timeframe):
+        with self._lock:
+            ring = self._rings.get((symbol, timeframe))
+            if ring is None:
+                ring = self._rings[(symbol, timeframe)] = CandleRing(self.capacity)
+            return ring
+
+    def merge(self, symbol, timeframe, df, assume_sorted=False):
+        """
+        Merge a DataFrame with time/open/high/low/close[/tick_volume] columns
+
+        Returns:
+        int: Number of bars appended
+        """
+        if df is None or len(df) == 0:
+            return 0
+        times = df['time'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        values = {
+            field: (df[field].to_numpy(dtype=np.float64) if field in df.columns
+                    else np.zeros(len(df)))
+            for field in CANDLE_FIELDS
+        }
+        return self.merge_arrays(symbol, timeframe, times, values, assume_sorted)
+
+    def merge_arrays(self, symbol, timeframe, times, values, assume_sorted=False):
+        """
+        Merge bars given as int64 nanosecond times and field -> array
+        (see CandleRing.merge)
+
+        Returns:
+        int: Number of bars appended
+        """
+        ring = self.ring(symbol, timeframe)
+        with self._lock:
+            return ring.merge(times, values, assume_sorted=assume_sorted)
+
+    def frame(self, symbol, timeframe, n=None):
+        """
+        Zero-copy DataFrame of the newest n bars (None if nothing is stored).
+        Copy it if it has to outlive the next merge for this key.
+        """
+        with self._lock:
+            ring = self._rings.get((symbol, timeframe))
+            if ring is None or len(ring) == 0:
+                return None
+            return ring.frame(n)
+
+    def arrays(self, symbol, timeframe, n=None):
+        """
+        Zero-copy arrays of the newest n bars (see CandleRing.arrays),
+        None if nothing is stored
+        """
+        with self._lock:
+            ring = self._rings.get((symbol, timeframe))
+            if ring is None or len(ring) == 0:
+                return None
+            return ring.arrays(n)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._rings
+
+    def clear(self):
+        with self._lock:
+            self._rings.clear()
+
+
+CANDLE_STORE = CandleStore()
@@ -0,0 +1,526 @@
+import math
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Indicator periods used by the Profit Pulse Precision strategy
+EMA_FAST_SPAN = 10
+EMA_SLOW_SPAN = 50
+ATR_PERIOD = 14
+ADX_PERIOD = 14
+RSI_PERIOD = 7
+
+# Re-sum the rolling windows from scratch every N updates to cancel float drift
+RESYNC_INTERVAL = 1024
+
+
+class RollingMean:
+    """
+    Rolling mean over a fixed window with O(1) updates.
+    Matches pandas rolling(window).mean(): the mean is NaN until the window
+    is full and while any non-finite value is inside it.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.bad = 0
+        self._updates = 0
+
+    def push(self, value):
+        finite = math.isfinite(value)
+        self.values.append(value)
+        if finite:
+            self.total += value
+        else:
+            self.bad += 1
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if math.isfinite(old):
+                self.total -= old
+            else:
+                self.bad -= 1
+        self._updates += 1
+        if self._updates % RESYNC_INTERVAL == 0:
+            self.total = math.fsum(v for v in self.values if math.isfinite(v))
+        return self.mean
+
+    @property
+    def mean(self):
+        if len(self.values) < self.window or self.bad:
+            return math.nan
+        return self.total / self.window
+
+    def copy(self):
+        clone = RollingMean(self.window)
+        clone.values = deque(self.values)
+        clone.total = self.total
+        clone.bad = self.bad
+        clone._updates = self._updates
+        return clone
+
+
+class StreamingIndicators:
+    """
+    Per-symbol indicator state for the Profit Pulse Precision strategy.
+
+    Keeps running EMA values and rolling-window sums so every new candle is
+    processed in constant time, with results matching
+    strategy.calculate_indicators to float tolerance. The newest bar can be
+    replaced (e.g. by live ticks on a still forming candle) without
+    disturbing the state of the closed bars.
+    """
+
+    OUTPUTS = ('close', 'ema10', 'ema50', 'atr', 'plus_di', 'minus_di', 'adx', 'rsi')
+
+    def __init__(self, ema_fast_span=EMA_FAST_SPAN, ema_slow_span=EMA_SLOW_SPAN):
+        self.ema_fast_span = ema_fast_span
+        self.ema_slow_span = ema_slow_span
+        self.count = 0
+        self.last_time = None
+        self.last = dict.fromkeys(self.OUTPUTS, math.nan)
+        self.prev = dict.fromkeys(self.OUTPUTS, math.nan)
+        self._prev_bar = None  # (high, low, close) of the previous bar
+        self._ema_fast = math.nan
+        self._ema_slow = math.nan
+        self._tr = RollingMean(ATR_PERIOD)
+        self._plus_dm = RollingMean(ADX_PERIOD)
+        self._minus_dm = RollingMean(ADX_PERIOD)
+        self._dx = RollingMean(ADX_PERIOD)
+        self._gain = RollingMean(RSI_PERIOD)
+        self._loss = RollingMean(RSI_PERIOD)
+        self._undo = None
+
+    def _snapshot(self):
+        return (
+            self.count, self.last_time, dict(self.last), dict(self.prev), self._prev_bar,
+            self._ema_fast, self._ema_slow, self._tr.copy(), self._plus_dm.copy(),
+            self._minus_dm.copy(), self._dx.copy(), self._gain.copy(), self._loss.copy()
+        )
+
+    def _restore(self, snapshot):
+        (self.count, self.last_time, self.last, self.prev, self._prev_bar,
+         self._ema_fast, self._ema_slow, self._tr, self._plus_dm,
+         self._minus_dm, self._dx, self._gain, self._loss) = snapshot
+
+    def update(self, high, low, close, time=None, replace_last=False):
+        """
+        Process one candle in O(1).
+
+        Parameters:
+        high, low, close (float): Candle prices
+        time: Optional candle timestamp; a bar with the same timestamp as
+              the newest bar replaces it
+        replace_last (bool): Replace the newest bar instead of appending
+
+        Returns:
+        dict: Indicator values of the newest bar
+        """
+        if self.count and (replace_last or (time is not None and time == self.last_time)):
+            self._restore(self._undo)
+        self._undo = self._snapshot()
+
+        high = float(high)
+        low = float(low)
+        close = float(close)
+
+        if self.count == 0:
+            self._ema_fast = close
+            self._ema_slow = close
+            tr = high - low
+            plus_dm = minus_dm = 0.0
+            change = math.nan
+        else:
+            prev_high, prev_low, prev_close = self._prev_bar
+            alpha_fast = 2.0 / (self.ema_fast_span + 1)
+            alpha_slow = 2.0 / (self.ema_slow_span + 1)
+            self._ema_fast += alpha_fast * (close - self._ema_fast)
+            self._ema_slow += alpha_slow * (close - self._ema_slow)
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            up_move = high - prev_high
+            down_move = prev_low - low
+            plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+            minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+            change = close - prev_close
+
+        atr = self._tr.push(tr)
+        plus_di = _ratio(100 * self._plus_dm.push(plus_dm), atr)
+        minus_di = _ratio(100 * self._minus_dm.push(minus_dm), atr)
+        dx = _ratio(100 * abs(plus_di - minus_di), plus_di + minus_di)
+        adx = self._dx.push(dx)
+
+        avg_gain = self._gain.push(max(change, 0.0) if not math.isnan(change) else math.nan)
+        avg_loss = self._loss.push(-min(change, 0.0) if not math.isnan(change) else math.nan)
+        rs = _ratio(avg_gain, avg_loss if avg_loss != 0 else 0.00001)
+        rsi = 100 - (100 / (1 + rs)) if not math.isnan(rs) else math.nan
+
+        self.prev = self.last
+        self.last = {
+            'close': close,
+            'ema10': self._ema_fast,
+            'ema50': self._ema_slow,
+            'atr': atr,
+            'plus_di': plus_di,
+            'minus_di': minus_di,
+            'adx': adx,
+            'rsi': rsi
+        }
+        self._prev_bar = (high, low, close)
+        self.last_time = time
+        self.count += 1
+        return self.last
+
+    def update_from_frame(self, df):
+        """
+        Feed the bars of df that are newer than the newest processed bar.
+        A bar with the newest processed timestamp replaces it.
+
+        Returns:
+        int: Number of bars processed
+        """
+        times = df['time'].to_numpy() if 'time' in df.columns else None
+        start = 0
+        if times is not None and self.last_time is not None:
+            start = int(np.searchsorted(times, self.last_time, side='left'))
+        highs = df['high'].to_numpy(dtype=np.float64)
+        lows = df['low'].to_numpy(dtype=np.float64)
+        closes = df['close'].to_numpy(dtype=np.float64)
+        for i in range(start, len(df)):
+            self.update(highs[i], lows[i], closes[i], times[i] if times is not None else None)
+        return len(df) - start
+
+    @property
+    def ready(self):
+        """True once every indicator of the last two bars is defined"""
+        values = list(self.last.values()) + [self.prev['ema10'], self.prev['ema50']]
+        return all(math.isfinite(v) for v in values)
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator with NaN instead of ZeroDivisionError"""
+    if math.isnan(numerator) or math.isnan(denominator):
+        return math.nan
+    if denominator == 0:
+        return math.nan if numerator == 0 else math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+_states = {}
+
+
+def get_streaming_indicators(symbol, timeframe='1m', ema_fast_span=EMA_FAST_SPAN, ema_slow_span=EMA_SLOW_SPAN):
+    """Process-wide StreamingIndicators instance for (symbol, timeframe) and the EMA spans"""
+    key = (symbol, timeframe, ema_fast_span, ema_slow_span)
+    state = _states.get(key)
+    if state is None:
+        state = _states[key] = StreamingIndicators(ema_fast_span, ema_slow_span)
+    return state
+
+
+def align_price_matrix(frames, n=None, fields=('open', 'high', 'low', 'close')):
+    """
+    Stack per-symbol candle frames into aligned (symbols x bars) arrays.
+    Frames are right-aligned on their newest bar; shorter histories are
+    padded with NaN on the left, which the matrix indicators treat like
+    missing history.
+
+    Parameters:
+    frames (list): DataFrames with the requested columns
+    n (int): Number of bars to keep (default: longest frame)
+
+    Returns:
+    dict: field -> float64 array of shape (len(frames), n)
+    """
+    if n is None:
+        n = max((len(df) for df in frames), default=0)
+    out = {field: np.full((len(frames), n), np.nan) for field in fields}
+    for row, df in enumerate(frames):
+        k = min(n, len(df))
+        if k == 0:
+            continue
+        for field in fields:
+            out[field][row, n - k:] = df[field].to_numpy(dtype=np.float64)[-k:]
+    return out
+
+
+def ema_rows(values, span):
+    """
+    EMA along the last axis, equivalent to pandas ewm(span, adjust=False)
+    per row. Leading NaNs are skipped; the recursion runs once per bar
+    and is vectorized across rows.
+    """
+    alpha = 2.0 / (span + 1)
+    columns = np.ascontiguousarray(np.asarray(values, dtype=np.float64).T)
+    out = np.empty_like(columns)
+    ema = columns[0].copy()
+    # Weight of the running value; like pandas it keeps decaying across NaN gaps
+    old_wt = np.ones_like(ema)
+    out[0] = ema
+    for t in range(1, len(columns)):
+        x = columns[t]
+        started = ~np.isnan(ema)
+        observed = ~np.isnan(x)
+        old_wt = np.where(started, old_wt * (1.0 - alpha), old_wt)
+        ema = np.where(started, np.where(observed, (old_wt * ema + alpha * x) / (old_wt + alpha), ema), x)
+        old_wt = np.where(observed, 1.0, old_wt)
+        out[t] = ema
+    return out.T
+
+
+def rolling_mean_rows(values, window):
+    """
+    Rolling mean along the last axis with pandas rolling(window).mean()
+    semantics: NaN until the window is full and while it contains a NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(values, window, axis=-1).mean(axis=-1)
+    return out
+
+
+def shift_rows(values, periods=1):
+    """Shift along the last axis by periods, filling with NaN"""
+    out = np.full(values.shape, np.nan)
+    out[..., periods:] = values[..., :-periods]
+    return out
+
+
+def compute_indicator_matrix(high, low, close, ema_fast_span=EMA_FAST_SPAN, ema_slow_span=EMA_SLOW_SPAN):
+    """
+    Compute every strategy indicator for many symbols in one vectorized pass.
+
+    Parameters:
+    high, low, close (ndarray): Aligned (symbols x bars) price arrays
+    ema_fast_span, ema_slow_span (int): Spans of the 'ema10' and 'ema50' outputs
+
+    Returns:
+    dict: ema10, ema50, atr, plus_di, minus_di, adx, rsi as (symbols x bars) arrays
+    """
+    high = np.atleast_2d(np.asarray(high, dtype=np.float64))
+    low = np.atleast_2d(np.asarray(low, dtype=np.float64))
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+
+    prev_close = shift_rows(close)
+    prev_high = shift_rows(high)
+    prev_low = shift_rows(low)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # fmax skips NaN like pandas' row-wise max
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        atr = rolling_mean_rows(tr, ATR_PERIOD)
+
+        up_move = high - prev_high
+        down_move = prev_low - low
+        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+        plus_di = 100 * (rolling_mean_rows(plus_dm, ADX_PERIOD) / atr)
+        minus_di = 100 * (rolling_mean_rows(minus_dm, ADX_PERIOD) / atr)
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx = rolling_mean_rows(dx, ADX_PERIOD)
+
+        change = close - prev_close
+        avg_gain = rolling_mean_rows(np.where(np.isnan(change), np.nan, np.maximum(change, 0.0)), RSI_PERIOD)
+        avg_loss = rolling_mean_rows(np.where(np.isnan(change), np.nan, -np.minimum(change, 0.0)), RSI_PERIOD)
+        rs = avg_gain / np.where(avg_loss == 0, 0.00001, avg_loss)
+        rsi = 100 - (100 / (1 + rs))
+
+    return {
+        'ema10': ema_rows(close, ema_fast_span),
+        'ema50': ema_rows(close, ema_slow_span),
+        'atr': atr,
+        'plus_di': plus_di,
+        'minus_di': minus_di,
+        'adx': adx,
+        'rsi': rsi
+    }
+
+
+# Columns used by the chart and the signal logic
+INDICATOR_OUTPUTS = ('ema10', 'ema50', 'atr', 'adx', 'rsi')
+
+# Bars per block of the blocked EMA recursion
+EMA_BLOCK = 256
+
+# Bars per restart of the running sums behind the rolling means
+ROLLING_CHUNK = 4096
+
+
+class IndicatorBuffers:
+    """
+    Output and scratch arrays for indicator_arrays, allocated once for n bars.
+    Passing the same buffers to repeated calls avoids any per-call allocation
+    of full-length arrays; the outputs are overwritten by every call.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.out = {name: np.empty(n) for name in INDICATOR_OUTPUTS}
+        self.scratch = [np.empty(n) for _ in range(4)]
+        self.masks = [np.empty(n, dtype=bool) for _ in range(2)]
+
+
+def _ema_weights(alpha, block):
+    """Lower-triangular in-block EMA weights and the decay of the carried value"""
+    decay = 1.0 - alpha
+    lag = np.arange(block)[:, None] - np.arange(block)[None, :]
+    weights = np.where(lag >= 0, alpha * decay ** np.maximum(lag, 0), 0.0)
+    return weights, decay ** np.arange(1, block + 1)
+
+
+def ema_array(values, span, out=None):
+    """
+    EMA of a 1-D array, equivalent to pandas ewm(span, adjust=False).mean().
+
+    The recursion runs in blocks of EMA_BLOCK bars: within a block the EMA
+    is a weighted sum of its inputs (one matrix product for all blocks),
+    and only the value carried from block to block is propagated in a
+    Python loop. Leading NaNs are skipped; other NaNs use ema_rows.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if out is None:
+        out = np.empty(len(values))
+    n = len(values)
+    nan = np.isnan(values)
+    start = int(np.argmin(nan)) if n else 0
+    if n == 0 or nan[start]:
+        out.fill(np.nan)
+        return out
+    if nan[start:].any():
+        out[:] = ema_rows(values[None, :], span)[0]
+        return out
+    out[:start] = np.nan
+
+    weights, carry_decay = _ema_weights(2.0 / (span + 1), EMA_BLOCK)
+    x = values[start:]
+    y = out[start:]
+    full = (len(x) // EMA_BLOCK) * EMA_BLOCK
+    # pandas starts the recursion at the first value: ema[-1] = x[0]
+    carry = x[0]
+    if full:
+        blocks = y[:full].reshape(-1, EMA_BLOCK)
+        np.matmul(x[:full].reshape(-1, EMA_BLOCK), weights.T, out=blocks)
+        for block in blocks:
+            block += carry_decay * carry
+            carry = block[-1]
+    rest = len(x) - full
+    if rest:
+        y[full:] = weights[:rest, :rest] @ x[full:] + carry_decay[:rest] * carry
+    return out
+
+
+def _rolling_mean_into(values, window, out, scratch, mask):
+    """
+    pandas rolling(window).mean() of a 1-D array into out, via running sums
+    in scratch. The sums restart every ROLLING_CHUNK bars so the rounding
+    error doesn't grow with the series length. Leading NaNs are skipped;
+    NaNs later in the series fall back to rolling_mean_rows.
+    """
+    np.isnan(values, out=mask)
+    out.fill(np.nan)
+    start = int(np.argmin(mask))
+    if mask[start]:
+        return out
+    if mask[start:].any():
+        out[:] = rolling_mean_rows(values, window)
+        return out
+    n = len(values)
+    for first in range(start + window - 1, n, ROLLING_CHUNK):
+        end = min(n, first + ROLLING_CHUNK)
+        lo = first - window + 1
+        total = scratch[lo:end]
+        np.cumsum(values[lo:end], out=total)
+        out[first] = total[window - 1] / window
+        np.subtract(total[window:], total[:-window], out=out[first + 1:end])
+        out[first + 1:end] /= window
+    return out
+
+
+def indicator_arrays(high, low, close, ema_fast_span=EMA_FAST_SPAN, ema_slow_span=EMA_SLOW_SPAN, buffers=None):
+    """
+    Strategy indicators of one symbol as NumPy arrays, with the same
+    formulas as strategy.calculate_indicators.
+
+    Only the five outputs are full-length allocations (none if buffers is
+    given); every intermediate (true range, directional movement, DI, DX,
+    gains and losses) lives in four reused scratch arrays.
+
+    Parameters:
+    high, low, close (ndarray): 1-D price arrays
+    buffers (IndicatorBuffers): Preallocated arrays for len(close) bars
+
+    Returns:
+    dict: ema10, ema50, atr, adx, rsi
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    if buffers is None or buffers.n != n:
+        buffers = IndicatorBuffers(n)
+    out = buffers.out
+    s1, s2, s3, s4 = buffers.scratch
+    m1, m2 = buffers.masks
+
+    ema_array(close, ema_fast_span, out=out['ema10'])
+    ema_array(close, ema_slow_span, out=out['ema50'])
+    if n == 0:
+        for name in ('atr', 'adx', 'rsi'):
+            out[name].fill(np.nan)
+        return out
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # True range: max(high - low, |high - prev close|, |low - prev close|)
+        np.subtract(high, low, out=s1)
+        np.subtract(high[1:], close[:-1], out=s2[1:])
+        np.abs(s2[1:], out=s2[1:])
+        np.fmax(s1[1:], s2[1:], out=s1[1:])
+        np.subtract(low[1:], close[:-1], out=s2[1:])
+        np.abs(s2[1:], out=s2[1:])
+        np.fmax(s1[1:], s2[1:], out=s1[1:])
+        atr = _rolling_mean_into(s1, ATR_PERIOD, out['atr'], s2, m1)
+
+        # Directional movement: s1 = up move, s2 = down move, s3 = +DM, s4 = -DM
+        s1[0] = s2[0] = np.nan
+        np.subtract(high[1:], high[:-1], out=s1[1:])
+        np.subtract(low[:-1], low[1:], out=s2[1:])
+        for move, other, dm in ((s1, s2, s3), (s2, s1, s4)):
+            np.greater(move, other, out=m1)
+            np.greater(move, 0, out=m2)
+            np.logical_and(m1, m2, out=m1)
+            dm.fill(0.0)
+            np.copyto(dm, move, where=m1)
+
+        # s1 = +DI, s3 = -DI, s4 = DX
+        _rolling_mean_into(s3, ADX_PERIOD, s1, s2, m1)
+        np.divide(s1, atr, out=s1)
+        s1 *= 100
+        _rolling_mean_into(s4, ADX_PERIOD, s3, s2, m1)
+        np.divide(s3, atr, out=s3)
+        s3 *= 100
+        np.subtract(s1, s3, out=s4)
+        np.abs(s4, out=s4)
+        np.add(s1, s3, out=s2)
+        np.divide(s4, s2, out=s4)
+        s4 *= 100
+        _rolling_mean_into(s4, ADX_PERIOD, out['adx'], s2, m1)
+
+        # RSI: s1 = change, s2 = gain, s3 = loss, s4 = average gain, s2 = average loss
+        s1[0] = np.nan
+        np.subtract(close[1:], close[:-1], out=s1[1:])
+        np.maximum(s1, 0.0, out=s2)
+        np.minimum(s1, 0.0, out=s3)
+        np.negative(s3, out=s3)
+        _rolling_mean_into(s2, RSI_PERIOD, s4, s1, m1)
+        _rolling_mean_into(s3, RSI_PERIOD, s2, s1, m1)
+        np.equal(s2, 0, out=m1)
+        np.copyto(s2, 0.00001, where=m1)  # Avoid division by zero
+        rsi = out['rsi']
+        np.divide(s4, s2, out=rsi)
+        rsi += 1
+        np.divide(100, rsi, out=rsi)
+        np.subtract(100, rsi, out=rsi)
+
+    return out
@@ -0,0 +1,161 @@
+"""
+Instrument registry loaded from instruments.json.
+
+Everything that depends on the kind of instrument (pip size, display
+precision, asset class, Yahoo symbol and quote inversion, fallback and
+base prices, synthetic spread, signal SL/TP distances, quote TTL, icon)
+is resolved once at load time, so callers do an O(1) lookup instead of
+scanning the symbol for 'JPY' or crypto tickers:
+
+    instrument = get_instrument("USDJPY")
+    instrument.pip_size, instrument.precision, instrument.is_crypto
+
+Per asset class defaults keep entries short; an instrument only lists
+what differs. The Yahoo symbol defaults to EURUSD=X for forex and
+BTC-USD for crypto. Symbols missing from the file (e.g. the generated
+mock universe) get the forex defaults.
+
+The watchlist scanned by default is the "watchlist" list of the file,
+otherwise every instrument; WATCHLIST=EURUSD,BTCUSD overrides it, and
+INSTRUMENTS_FILE points to another file.
+"""
+import json
+import os
+from dataclasses import dataclass
+
+INSTRUMENTS_FILE = os.environ.get(
+    'INSTRUMENTS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instruments.json')
+)
+
+ASSET_CLASSES = ('forex', 'crypto')
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """Static properties of one tradable symbol"""
+    symbol: str
+    asset_class: str = 'forex'
+    pip_size: float = 0.0001        # Price change of one pip
+    pip_factor: float = 10000.0     # Price -> pips (1 / pip_size)
+    precision: int = 5              # Decimal places for display
+    yahoo_symbol: str = None
+    inverted: bool = False          # Yahoo quotes the reciprocal (e.g. JPY=X = JPY per USD)
+    base_price: float = None        # Start of the synthetic history
+    fallback_price: float = None    # Quote when no provider answers (default: base_price)
+    spread: float = None            # Synthetic close-to-high/low spread (default: spread_ratio * price)
+    spread_ratio: float = 0.0002
+    sl_distance: float = None       # Forex signal SL/TP distances in price units
+    tp_distance: float = None       # (default: the scanner's pips * pip_size)
+    quote_ttl: float = 60.0         # Seconds a cached quote stays fresh
+    icon: str = '💹'
+
+    @property
+    def is_crypto(self):
+        return self.asset_class == 'crypto'
+
+
+def default_yahoo_symbol(symbol, asset_class):
+    """Yahoo chart symbol for a six-letter pair: EURUSD=X, BTC-USD"""
+    if asset_class == 'crypto':
+        return f"{symbol[:-3]}-{symbol[-3:]}"
+    return f"{symbol}=X"
+
+
+def make_instrument(entry, defaults=None):
+    """
+    Instrument from a config entry merged over the defaults of its asset class
+
+    Raises:
+    ValueError: For an entry without a symbol or with an unknown asset class
+    """
+    if not isinstance(entry, dict) or not entry.get('symbol'):
+        raise ValueError(f"instrument entry without a symbol: {entry!r}")
+    asset_class = entry.get('asset_class', 'forex')
+    if asset_class not in ASSET_CLASSES:
+        raise ValueError(f"{entry.get('symbol')}: unknown asset class {asset_class!r}")
+    values = {**(defaults or {}).get(asset_class, {}), **entry, 'asset_class': asset_class}
+    values.setdefault('yahoo_symbol', default_yahoo_symbol(values['symbol'], asset_class))
+    if 'pip_size' in values:
+        values['pip_factor'] = round(1.0 / values['pip_size'], 10)
+    return Instrument(**values)
+
+
+class InstrumentRegistry:
+    """Instruments by symbol plus the default watchlist"""
+
+    def __init__(self, instruments=(), watchlist=None):
+        self._instruments = {instrument.symbol: instrument for instrument in instruments}
+        self._generic = {}
+        self.watchlist = list(watchlist) if watchlist is not None else list(self._instruments)
+
+    def get(self, symbol):
+        """The instrument of symbol; unknown symbols get the forex defaults"""
+        instrument = self._instruments.get(symbol)
+        if instrument is None:
+            instrument = self._generic.get(symbol)
+            if instrument is None:
+                instrument = self._generic[symbol] = Instrument(symbol)
+        return instrument
+
+    def __contains__(self, symbol):
+        return symbol in self._instruments
+
+    def __iter__(self):
+        return iter(self._instruments.values())
+
+    def __len__(self):
+        return len(self._instruments)
+
+    def symbols(self):
+        return list(self._instruments)
+
+    def yahoo_symbols(self):
+        """symbol -> Yahoo chart symbol"""
+        return {i.symbol: i.yahoo_symbol for i in self if i.yahoo_symbol}
+
+    def inverted_symbols(self):
+        return {i.symbol for i in self if i.inverted}
+
+    def base_prices(self):
+        """symbol -> start price of the synthetic history (instruments with one)"""
+        return {i.symbol: i.base_price for i in self if i.base_price is not None}
+
+    def fallback_prices(self):
+        """symbol -> fallback quote (instruments with one)"""
+        prices = {i.symbol: i.fallback_price if i.fallback_price is not None else i.base_price for i in self}
+        return {symbol: price for symbol, price in prices.items() if price is not None}
+
+    def quote_ttls(self):
+        return {i.symbol: i.quote_ttl for i in self}
+
+
+def load_instruments(path=INSTRUMENTS_FILE, watchlist=None):
+    """
+    Registry from a JSON file ({"defaults": {...}, "instruments": [...],
+    "watchlist": [...]}). Errors are printed and give an empty registry.
+
+    Parameters:
+    watchlist (str or list): Overrides the watchlist of the file
+                             (comma-separated string or list of symbols)
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        defaults = config.get('defaults', {})
+        instruments = [make_instrument(entry, defaults) for entry in config.get('instruments', [])]
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Fehler beim Laden der Instrumente aus {path}: {e}")
+        config, instruments = {}, []
+    if isinstance(watchlist, str):
+        watchlist = [symbol.strip() for symbol in watchlist.split(',') if symbol.strip()]
+    if watchlist is None:
+        watchlist = config.get('watchlist')
+    return InstrumentRegistry(instruments, watchlist)
+
+
+INSTRUMENTS = load_instruments(watchlist=os.environ.get('WATCHLIST') or None)
+
+
+def get_instrument(symbol):
+    """Instrument of symbol from the process-wide registry"""
+    return INSTRUMENTS.get(symbol)
@@ -0,0 +1,256 @@
+"""
+Indicator kernels with runtime-selectable backends.
+
+    numpy  indicators.indicator_arrays (blocked EMA, chunked running sums)
+    numba  the same formulas as single-pass loops, JIT-compiled (optional)
+
+The default backend is numba when it is installed, otherwise numpy;
+INDICATOR_BACKEND=numpy|numba or set_backend() override it. Both follow
+strategy.calculate_indicators exactly, including its use of simple moving
+averages (not Wilder smoothing) for ATR, DI/ADX and RSI.
+
+    python kernels.py --verify    # compare every backend with the pandas formulas
+"""
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+import indicators
+from indicators import (ADX_PERIOD, ATR_PERIOD, EMA_FAST_SPAN, EMA_SLOW_SPAN, RESYNC_INTERVAL, RSI_PERIOD,
+                        IndicatorBuffers)
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    # error_model='numpy': x / 0 gives inf/NaN like NumPy and pandas instead of raising
+    _jit = numba.njit(cache=True, error_model='numpy')
+
+    @_jit
+    def _ema_nb(values, alpha, out):
+        # pandas ewm(adjust=False): the weight of the running value decays
+        # once per bar, also across NaN gaps
+        weighted = values[0]
+        old_wt = 1.0
+        out[0] = weighted
+        for i in range(1, len(values)):
+            x = values[i]
+            if weighted == weighted:
+                old_wt *= 1.0 - alpha
+                if x == x:
+                    weighted = (old_wt * weighted + alpha * x) / (old_wt + alpha)
+                    old_wt = 1.0
+            elif x == x:
+                weighted = x
+            out[i] = weighted
+
+    @_jit
+    def _rolling_mean_nb(values, window, out):
+        # pandas rolling(window).mean(): NaN while the window holds fewer
+        # than window finite values
+        total = 0.0
+        count = 0
+        for i in range(len(values)):
+            x = values[i]
+            if x == x:
+                total += x
+                count += 1
+            if i >= window:
+                y = values[i - window]
+                if y == y:
+                    total -= y
+                    count -= 1
+            if i % RESYNC_INTERVAL == RESYNC_INTERVAL - 1:
+                # Re-sum the window to cancel float drift
+                total = 0.0
+                for j in range(max(0, i - window + 1), i + 1):
+                    if values[j] == values[j]:
+                        total += values[j]
+            out[i] = total / window if count == window else np.nan
+
+    @_jit
+    def _indicators_nb(high, low, close, alpha_fast, alpha_slow, atr_period, adx_period, rsi_period,
+                       ema10, ema50, atr, adx, rsi, s1, s2, s3, s4):
+        n = len(close)
+        _ema_nb(close, alpha_fast, ema10)
+        _ema_nb(close, alpha_slow, ema50)
+
+        # s1 = true range (row max skipping NaN, like pandas)
+        for i in range(n):
+            tr = high[i] - low[i]
+            if i > 0:
+                for part in (abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])):
+                    if part == part and not (tr >= part):
+                        tr = part
+            s1[i] = tr
+        _rolling_mean_nb(s1, atr_period, atr)
+
+        # s2 = +DM, s3 = -DM
+        s2[0] = 0.0
+        s3[0] = 0.0
+        for i in range(1, n):
+            up = high[i] - high[i - 1]
+            down = low[i - 1] - low[i]
+            s2[i] = up if (up > down and up > 0) else 0.0
+            s3[i] = down if (down > up and down > 0) else 0.0
+
+        # s4 = +DI, s2 = -DI, s1 = DX
+        _rolling_mean_nb(s2, adx_period, s4)
+        _rolling_mean_nb(s3, adx_period, s2)
+        for i in range(n):
+            plus_di = 100 * (s4[i] / atr[i])
+            minus_di = 100 * (s2[i] / atr[i])
+            s1[i] = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+        _rolling_mean_nb(s1, adx_period, adx)
+
+        # s2 = gain, s3 = loss, s4 = average gain, s1 = average loss
+        s2[0] = np.nan
+        s3[0] = np.nan
+        for i in range(1, n):
+            change = close[i] - close[i - 1]
+            s2[i] = max(change, 0.0) if change == change else np.nan
+            s3[i] = -min(change, 0.0) if change == change else np.nan
+        _rolling_mean_nb(s2, rsi_period, s4)
+        _rolling_mean_nb(s3, rsi_period, s1)
+        for i in range(n):
+            avg_loss = s1[i] if s1[i] != 0 else 0.00001  # Avoid division by zero
+            rsi[i] = 100 - (100 / (1 + s4[i] / avg_loss))
+
+
+def _indicator_arrays_numba(high, low, close, ema_fast_span, ema_slow_span, buffers):
+    out = buffers.out
+    if buffers.n:
+        _indicators_nb(high, low, close, 2.0 / (ema_fast_span + 1), 2.0 / (ema_slow_span + 1),
+                       ATR_PERIOD, ADX_PERIOD, RSI_PERIOD,
+                       out['ema10'], out['ema50'], out['atr'], out['adx'], out['rsi'], *buffers.scratch)
+    return out
+
+
+def _ema_numba(values, span, out):
+    if len(values):
+        _ema_nb(values, 2.0 / (span + 1), out)
+    return out
+
+
+BACKENDS = {
+    'numpy': (indicators.indicator_arrays, indicators.ema_array),
+}
+if NUMBA_AVAILABLE:
+    BACKENDS['numba'] = (_indicator_arrays_numba, _ema_numba)
+
+_backend = os.environ.get('INDICATOR_BACKEND') or ('numba' if NUMBA_AVAILABLE else 'numpy')
+if _backend not in BACKENDS:
+    print(f"Indicator backend {_backend!r} not available, using numpy")
+    _backend = 'numpy'
+
+
+def available_backends():
+    """Names of the usable backends"""
+    return list(BACKENDS)
+
+
+def get_backend():
+    """Name of the active backend"""
+    return _backend
+
+
+def set_backend(name):
+    """
+    Select the backend used by indicator_arrays and ema
+
+    Raises:
+    ValueError: If the backend is unknown or its package isn't installed
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"unknown or unavailable indicator backend {name!r} (available: {available_backends()})")
+    _backend = name
+
+
+def indicator_arrays(high, low, close, ema_fast_span=EMA_FAST_SPAN, ema_slow_span=EMA_SLOW_SPAN,
+                     buffers=None, backend=None):
+    """
+    ema10, ema50, atr, adx and rsi of one symbol (see indicators.indicator_arrays)
+    computed with the active or the given backend
+
+    Returns:
+    dict: name -> array (the arrays of buffers when given)
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    if buffers is None or buffers.n != len(close):
+        buffers = IndicatorBuffers(len(close))
+    fn = BACKENDS[backend or _backend][0]
+    return fn(high, low, close, ema_fast_span, ema_slow_span, buffers)
+
+
+def ema(values, span, out=None, backend=None):
+    """EMA equivalent to pandas ewm(span, adjust=False).mean(), with the active or the given backend"""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if out is None:
+        out = np.empty(len(values))
+    return BACKENDS[backend or _backend][1](values, span, out)
+
+
+def verify_backends(n=100_000, seed=0, rtol=1e-9):
+    """
+    Compare every backend with strategy.calculate_indicators on a random
+    walk with n bars
+
+    Returns:
+    dict: backend -> {column: max relative error}; a column whose NaN
+          positions differ reports inf
+    """
+    import pandas as pd
+    from strategy import calculate_indicators
+
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0002, n))
+    opens = np.concatenate(([close[0]], close[:-1]))
+    df = pd.DataFrame({
+        'high': np.maximum(opens, close) + np.abs(rng.normal(0, 0.0001, n)),
+        'low': np.minimum(opens, close) - np.abs(rng.normal(0, 0.0001, n)),
+        'close': close
+    })
+    reference = calculate_indicators(df)
+
+    report = {}
+    for backend in available_backends():
+        result = indicator_arrays(df['high'], df['low'], df['close'], backend=backend)
+        errors = {}
+        for name, values in result.items():
+            expected = reference[name].to_numpy()
+            if not np.array_equal(np.isnan(expected), np.isnan(values)):
+                errors[name] = math.inf
+                continue
+            valid = ~np.isnan(expected)
+            diff = np.abs(values[valid] - expected[valid]) / np.maximum(np.abs(expected[valid]), 1e-12)
+            errors[name] = float(diff.max()) if diff.size else 0.0
+        report[backend] = errors
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indicator kernel backends")
+    parser.add_argument("--verify", action="store_true", help="Compare every backend with the pandas formulas")
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    print(f"Backends: {', '.join(available_backends())} (active: {get_backend()})")
+    if args.verify:
+        failed = False
+        for backend, errors in verify_backends(args.bars, rtol=args.rtol).items():
+            ok = all(err <= args.rtol for err in errors.values())
+            failed |= not ok
+            detail = ", ".join(f"{name} {err:.1e}" for name, err in errors.items())
+            print(f"{backend:<6} {'OK' if ok else 'MISMATCH'}  {detail}")
+        sys.exit(1 if failed else 0)
@@ -1,96 +1,749 @@
+import numpy as np
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import os
 import re
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from dataclasses import dataclass
+import contextlib
+import functools
+import threading
 import time
+import zlib
 
+import archive
+import recorder
+from candle_store import CANDLE_STORE, CandleStore
+from instruments import INSTRUMENTS, get_instrument
+from providers import PROVIDERS
+from tracing import traced
 
-def get_yahoo_finance_data(symbol):
+
+# Yahoo Finance Symbol-Mapping, Fallback-Kurse und Startpreise der synthetischen
+# Historie sowie umgekehrte Notationen (z.B. JPY=X = JPY pro USD) aus instruments.json
+YAHOO_SYMBOLS = INSTRUMENTS.yahoo_symbols()
+FALLBACK_PRICES = INSTRUMENTS.fallback_prices()
+BASE_PRICES = INSTRUMENTS.base_prices()
+INVERTED_SYMBOLS = INSTRUMENTS.inverted_symbols()
+
+# Cache-Lebensdauer der Kurse in Sekunden (pro Instrument in instruments.json)
+DEFAULT_QUOTE_TTL = 60.0
+QUOTE_TTLS = INSTRUMENTS.quote_ttls()
+
+# Mindestanzahl echter Kerzen, ab der keine synthetischen Kerzen erzeugt werden
+MIN_REAL_CANDLES = 100
+
+# Synthetische Kerzen: Abstand in Minuten, Historien bis zu dieser Länge werden gecacht
+SYNTHETIC_BAR_MINUTES = 5
+SYNTHETIC_CACHE_BARS = 100_000
+
+# HTTP-Abruf: Basis-URL (für lokale Stub-Server überschreibbar), Timeouts,
+# Wiederholungen und Rate-Limit
+YAHOO_BASE_URL = os.environ.get("YAHOO_BASE_URL", "https://query1.finance.yahoo.com")
+REQUEST_TIMEOUT = (3.05, 10.0)  # (Verbindungsaufbau, Lesen) in Sekunden
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5  # Basis für exponentielles Backoff mit Jitter
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RATE_LIMIT_PER_SECOND = 5.0
+RATE_LIMIT_BURST = 5
+MAX_FETCH_WORKERS = 8
+
+
+class TokenBucket:
     """
-    Holt Kursdaten von Yahoo Finance für das angegebene Symbol
+    Thread-sicheres Token-Bucket-Rate-Limit.
+    rate Tokens pro Sekunde, höchstens capacity Tokens auf Vorrat.
     """
-    # Yahoo Finance Symbol-Mapping
-    yahoo_symbols = {
-        "EURUSD": "EURUSD=X",
-        "GBPUSD": "GBPUSD=X",
-        "USDJPY": "JPY=X",  # Umgekehrte Notation bei Yahoo
-        "AUDUSD": "AUDUSD=X",
-        "USDCAD": "CAD=X",  # Umgekehrte Notation bei Yahoo
-        "USDCHF": "CHF=X",  # Umgekehrte Notation bei Yahoo
-        "NZDUSD": "NZDUSD=X",
-        "BTCUSD": "BTC-USD",
-        "SOLUSD": "SOL-USD",
-        "ETHUSD": "ETH-USD",
-        "XRPUSD": "XRP-USD",
-        "ADAUSD": "ADA-USD"
-    }
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Nimmt tokens sofort, falls vorhanden; gibt sonst die Wartezeit zurück"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Blockiert, bis tokens verfügbar sind"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+_session = None
+_session_lock = threading.Lock()
+_rate_limiter = TokenBucket(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+
+def configure_fetcher(base_url=None, rate=None, burst=None, timeout=None,
+                      max_retries=None, max_workers=None):
+    """
+    Passt den HTTP-Abruf zur Laufzeit an, z.B. um gegen einen lokalen
+    Stub-Server zu testen. Nicht angegebene Werte bleiben unverändert.
+    """
+    global YAHOO_BASE_URL, REQUEST_TIMEOUT, MAX_RETRIES, MAX_FETCH_WORKERS, _rate_limiter, _session
+    if base_url is not None:
+        YAHOO_BASE_URL = base_url.rstrip("/")
+    if timeout is not None:
+        REQUEST_TIMEOUT = timeout
+    if max_retries is not None:
+        MAX_RETRIES = max_retries
+    if max_workers is not None:
+        MAX_FETCH_WORKERS = max_workers
+    if rate is not None or burst is not None:
+        _rate_limiter = TokenBucket(
+            rate if rate is not None else _rate_limiter.rate,
+            burst if burst is not None else _rate_limiter.capacity
+        )
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_http_session():
+    """Gemeinsame Keep-Alive-Session mit Connection-Pool für alle Abruf-Threads"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_FETCH_WORKERS, pool_maxsize=MAX_FETCH_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "User-Agent": "Mozilla/5.0"  # Yahoo erfordert manchmal einen User-Agent
+            })
+            _session = session
+        return _session
+
+
+def fetch_chart(symbol):
+    """
+    Ruft die Chart-Antwort (/v8/finance/chart) für symbol ab.
+    Jeder Versuch nimmt ein Token aus dem Rate-Limit; Verbindungsfehler,
+    Timeouts und 429/5xx werden mit exponentiellem Backoff plus Jitter
+    wiederholt.
     
-    if symbol not in yahoo_symbols:
+    Returns:
+    dict: chart.result[0] oder None
+    """
+    if symbol not in YAHOO_SYMBOLS:
         return None
     
-    yahoo_symbol = yahoo_symbols[symbol]
+    url = f"{YAHOO_BASE_URL}/v8/finance/chart/{YAHOO_SYMBOLS[symbol]}"
+    params = {
+        "interval": "1m",
+        "range": "1d"
+    }
     
-    try:
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{yahoo_symbol}"
-        params = {
-            "interval": "1m",
-            "range": "1d"
-        }
-        headers = {
-            "User-Agent": "Mozilla/5.0"  # Yahoo erfordert manchmal einen User-Agent
-        }
-        
-        response = requests.get(url, params=params, headers=headers)
-        data = response.json()
+    for attempt in range(MAX_RETRIES + 1):
+        _rate_limiter.acquire()
+        try:
+            response = get_http_session().get(url, params=params, timeout=REQUEST_TIMEOUT)
+            if response.status_code in RETRY_STATUS_CODES:
+                raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            data = response.json()
+            results = (data.get("chart") or {}).get("result") or []
+            return results[0] if results else None
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            if attempt >= MAX_RETRIES:
+                print(f"Fehler beim Abrufen der Yahoo Finance Daten für {symbol}: {e}")
+                return None
+            # Exponentielles Backoff mit vollem Jitter
+            time.sleep(random.uniform(0, RETRY_BACKOFF * (2 ** attempt)))
+        except ValueError as e:
+            print(f"Ungültige Antwort von Yahoo Finance für {symbol}: {e}")
+            return None
+    
+    return None
+
+
+def parse_chart_candles(result, symbol):
+    """
+    Wandelt die timestamp- und indicators.quote-Arrays einer Chart-Antwort
+    vektorisiert in einen zeitlich sortierten OHLCV-DataFrame um. Kerzen mit fehlenden Werten
+    werden verworfen, umgekehrte Notationen (USDJPY, USDCAD, USDCHF) werden
+    invertiert.
+    
+    Returns:
+    DataFrame: Spalten time, open, high, low, close, tick_volume (leer, falls keine Daten)
+    """
+    columns = ['time', 'open', 'high', 'low', 'close', 'tick_volume']
+    timestamps = (result or {}).get("timestamp") or []
+    quotes = ((result or {}).get("indicators") or {}).get("quote") or [{}]
+    quote = quotes[0] or {}
+    n = len(timestamps)
+    if n == 0 or any(len(quote.get(k) or []) != n for k in ('open', 'high', 'low', 'close')):
+        return pd.DataFrame(columns=columns)
+    
+    # None -> NaN über dtype=float
+    ts = np.asarray(timestamps, dtype=np.int64)
+    opens = np.asarray(quote['open'], dtype=np.float64)
+    highs = np.asarray(quote['high'], dtype=np.float64)
+    lows = np.asarray(quote['low'], dtype=np.float64)
+    closes = np.asarray(quote['close'], dtype=np.float64)
+    volume = quote.get('volume')
+    volumes = np.asarray(volume, dtype=np.float64) if volume and len(volume) == n else np.zeros(n)
+    
+    if np.any(ts[1:] < ts[:-1]):
+        order = np.argsort(ts, kind='stable')
+        ts, opens, highs, lows, closes, volumes = (
+            a[order] for a in (ts, opens, highs, lows, closes, volumes)
+        )
+    
+    valid = np.isfinite(opens) & np.isfinite(highs) & np.isfinite(lows) & np.isfinite(closes)
+    valid &= (opens > 0) & (highs > 0) & (lows > 0) & (closes > 0)
+    ts, opens, highs, lows, closes, volumes = (
+        a[valid] for a in (ts, opens, highs, lows, closes, volumes)
+    )
+    
+    if symbol in INVERTED_SYMBOLS:
+        # Kehrwert nehmen; dabei tauschen Hoch und Tief die Rollen
+        opens, closes = 1.0 / opens, 1.0 / closes
+        highs, lows = 1.0 / lows, 1.0 / highs
+    
+    return pd.DataFrame({
+        'time': pd.to_datetime(ts, unit='s'),
+        'open': opens,
+        'high': highs,
+        'low': lows,
+        'close': closes,
+        'tick_volume': np.nan_to_num(volumes)
+    })
+
+
+def parse_chart_price(result, symbol):
+    """Liest meta.regularMarketPrice aus einer Chart-Antwort (mit Inversion)"""
+    if result and "meta" in result and "regularMarketPrice" in result["meta"]:
+        price = result["meta"]["regularMarketPrice"]
         
-        if "chart" in data and "result" in data["chart"] and len(data["chart"]["result"]) > 0:
-            result = data["chart"]["result"][0]
-            if "meta" in result and "regularMarketPrice" in result["meta"]:
-                price = result["meta"]["regularMarketPrice"]
-                
-                # Bei umgekehrten Notationen (wie JPY=X) müssen wir den Kehrwert nehmen
-                if symbol in ["USDJPY", "USDCAD", "USDCHF"]:
-                    return 1.0 / price
-                return price
+        # Bei umgekehrten Notationen (wie JPY=X) müssen wir den Kehrwert nehmen
+        if symbol in INVERTED_SYMBOLS:
+            return 1.0 / price
+        return price
+    return None
+
+
+def get_yahoo_chart_data(symbol):
+    """
+    Holt Kurs und Intraday-Kerzen mit einer einzigen Anfrage
+    
+    Returns:
+    tuple: (price, candles) - jeweils None, wenn nicht verfügbar
+    """
+    try:
+        result = fetch_chart(symbol)
+        if result:
+            candles = parse_chart_candles(result, symbol)
+            price = parse_chart_price(result, symbol)
+            candles = candles if not candles.empty else None
+            quote_log = recorder.get_recorder()
+            if quote_log is not None:
+                # Rohantwort und abgeleitete Kerzen für die Wiedergabe aufzeichnen
+                quote_log.record_response(symbol, result, price, candles)
+            return price, candles
     
     except Exception as e:
         print(f"Fehler beim Abrufen der Yahoo Finance Daten für {symbol}: {e}")
     
-    return None
+    return None, None
 
 
-def get_forex_data_from_source():
+def get_yahoo_finance_data(symbol):
     """
-    Versucht, aktuelle Marktdaten von Yahoo Finance abzurufen.
-    Im Fehlerfall werden Fallback-Daten zurückgegeben.
+    Holt Kursdaten von Yahoo Finance für das angegebene Symbol
+    """
+    return get_yahoo_chart_data(symbol)[0]
+
+
+def fetch_quotes(symbols, max_workers=None):
+    """
+    Ruft die Kurse mehrerer Symbole parallel über einen Thread-Pool ab.
+    Das Rate-Limit gilt für alle Threads gemeinsam.
+    
+    Returns:
+    dict: Symbol -> Preis (nur erfolgreich abgerufene Symbole)
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    workers = min(max_workers or MAX_FETCH_WORKERS, len(symbols))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        prices = pool.map(get_yahoo_finance_data, symbols)
+    return {symbol: price for symbol, price in zip(symbols, prices) if price is not None}
+
+
+@dataclass
+class QuoteEntry:
+    """Ein zwischengespeicherter Kurs (samt Kerzen) mit Abrufzeitpunkt und TTL"""
+    price: float
+    fetched_at: float
+    ttl: float
+    stale: bool = False
+    candles: object = None
+
+    def age(self, now=None):
+        return (time.time() if now is None else now) - self.fetched_at
+
+
+class QuoteCache:
+    """
+    Prozessweiter Kurs-Cache mit Stale-While-Revalidate.
+    
+    Frische Einträge werden direkt zurückgegeben. Abgelaufene Einträge werden
+    als veraltet markiert und sofort zurückgegeben, während genau ein
+    Hintergrund-Thread pro Symbol den Kurs neu lädt. Nur bei einem
+    Cache-Miss wartet der Aufrufer auf das Netzwerk.
+    
+    loader(symbol) liefert (price, candles); candles darf None sein.
+    batch_loader(symbols) liefert optional {symbol: (price, candles)} für
+    mehrere Symbole auf einmal; get_many() lädt dann alle fehlenden bzw.
+    veralteten Symbole mit einem Aufruf statt einem pro Symbol.
     """
-    # Aktuelle Forex-Daten (Fallback)
-    forex_data = {
-        "EURUSD": 1.0757,
-        "GBPUSD": 1.2732,
-        "USDJPY": 149.28,
-        "AUDUSD": 0.6628,
-        "USDCAD": 1.3484,
-        "USDCHF": 0.8980,
-        "NZDUSD": 0.6062,
-        "BTCUSD": 70090.0,
-        "SOLUSD": 147.42,
-        "ETHUSD": 3502.0,
-        "XRPUSD": 0.5032,
-        "ADAUSD": 0.4463
+
+    def __init__(self, loader, default_ttl=DEFAULT_QUOTE_TTL, ttls=None, batch_loader=None):
+        self._loader = loader
+        self._batch_loader = batch_loader
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def ttl_for(self, symbol):
+        return self.ttls.get(symbol, self.default_ttl)
+
+    def get(self, symbol):
+        """Gibt den Kurs für symbol zurück (None, wenn kein Kurs verfügbar ist)"""
+        entry = self._get_entry(symbol)
+        return entry.price if entry is not None else None
+
+    def _get_entry(self, symbol, count=True):
+        """
+        Eintrag für symbol mit Stale-While-Revalidate (None, wenn kein Kurs
+        verfügbar ist). count=False lässt die Treffer-/Fehlzähler unverändert,
+        z.B. für die Kerzen eines bereits gezählten Kursabrufs.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None:
+                if now - entry.fetched_at < entry.ttl:
+                    if count:
+                        self.hits += 1
+                    return entry
+                entry.stale = True
+                if count:
+                    self.stale_hits += 1
+                start_refresh = symbol not in self._inflight
+                if start_refresh:
+                    self._inflight[symbol] = threading.Event()
+            else:
+                if count:
+                    self.misses += 1
+                done = self._inflight.get(symbol)
+                owner = done is None
+                if owner:
+                    done = self._inflight[symbol] = threading.Event()
+
+        if entry is not None:
+            if start_refresh:
+                threading.Thread(target=self._refresh, args=(symbol,), daemon=True).start()
+            return entry
+
+        if owner:
+            self._refresh(symbol)
+        else:
+            # Ein anderer Aufrufer lädt dieses Symbol bereits
+            done.wait(timeout=30)
+        with self._lock:
+            return self._entries.get(symbol)
+
+    def get_many(self, symbols):
+        """
+        Kurse für mehrere Symbole. Mit batch_loader werden fehlende Symbole
+        gebündelt geladen und veraltete gebündelt in einem Hintergrund-Thread
+        aktualisiert, sonst wird get() parallel pro Symbol aufgerufen.
+        
+        Returns:
+        dict: Symbol -> Preis (None, wenn kein Kurs verfügbar ist)
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if self._batch_loader is None:
+            workers = max(1, min(MAX_FETCH_WORKERS, len(symbols)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return dict(zip(symbols, pool.map(self.get, symbols)))
+        
+        now = time.time()
+        missing, stale, waiting = [], [], []
+        with self._lock:
+            for symbol in symbols:
+                entry = self._entries.get(symbol)
+                if entry is not None:
+                    if now - entry.fetched_at < entry.ttl:
+                        self.hits += 1
+                        continue
+                    entry.stale = True
+                    self.stale_hits += 1
+                    if symbol not in self._inflight:
+                        self._inflight[symbol] = threading.Event()
+                        stale.append(symbol)
+                else:
+                    self.misses += 1
+                    done = self._inflight.get(symbol)
+                    if done is None:
+                        self._inflight[symbol] = threading.Event()
+                        missing.append(symbol)
+                    else:
+                        waiting.append(done)
+        
+        if stale:
+            threading.Thread(target=self._refresh_batch, args=(stale,), daemon=True).start()
+        if missing:
+            self._refresh_batch(missing)
+        for done in waiting:
+            # Andere Aufrufer laden diese Symbole bereits
+            done.wait(timeout=30)
+        with self._lock:
+            entries = {symbol: self._entries.get(symbol) for symbol in symbols}
+        return {symbol: entry.price if entry is not None else None for symbol, entry in entries.items()}
+
+    def get_candles(self, symbol):
+        """
+        Gibt die zusammen mit dem Kurs geladenen Kerzen zurück (oder None).
+        Zählt nicht als Treffer oder Fehlschlag; der Kursabruf ist bereits gezählt.
+        """
+        entry = self._get_entry(symbol, count=False)
+        return entry.candles if entry is not None else None
+
+    def _refresh(self, symbol):
+        try:
+            price, candles = self._loader(symbol)
+        except Exception as e:
+            print(f"Fehler beim Aktualisieren des Kurses für {symbol}: {e}")
+            price, candles = None, None
+        with self._lock:
+            if price is None:
+                self.errors += 1
+            else:
+                self.refreshes += 1
+                self._entries[symbol] = QuoteEntry(price, time.time(), self.ttl_for(symbol), candles=candles)
+            done = self._inflight.pop(symbol, None)
+        if done is not None:
+            done.set()
+
+    def _refresh_batch(self, symbols):
+        try:
+            results = self._batch_loader(symbols)
+        except Exception as e:
+            print(f"Fehler beim Aktualisieren der Kurse für {len(symbols)} Symbole: {e}")
+            results = {}
+        now = time.time()
+        with self._lock:
+            events = []
+            for symbol in symbols:
+                price, candles = results.get(symbol, (None, None))
+                if price is None:
+                    self.errors += 1
+                else:
+                    self.refreshes += 1
+                    self._entries[symbol] = QuoteEntry(price, now, self.ttl_for(symbol), candles=candles)
+                events.append(self._inflight.pop(symbol, None))
+        for done in events:
+            if done is not None:
+                done.set()
+
+    def ages(self):
+        """Alter (in Sekunden) und Veraltet-Status pro Symbol"""
+        now = time.time()
+        with self._lock:
+            return {
+                symbol: {'age': entry.age(now), 'stale': now - entry.fetched_at >= entry.ttl}
+                for symbol, entry in self._entries.items()
+            }
+
+    def stats(self):
+        """Treffer-, Fehl- und Alterszähler des Caches"""
+        ages = self.ages()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'entries': len(ages),
+            'stale_entries': sum(1 for a in ages.values() if a['stale']),
+            'max_age': max((a['age'] for a in ages.values()), default=None),
+            'ages': ages
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, symbol):
+        """Verwirft den Eintrag für symbol; der nächste Abruf lädt ihn neu"""
+        with self._lock:
+            self._entries.pop(symbol, None)
+
+    def set_loader(self, loader, batch_loader=None):
+        """Ersetzt die Kursquelle und verwirft alle Einträge"""
+        with self._lock:
+            self._loader = loader
+            self._batch_loader = batch_loader
+            self._entries.clear()
+
+
+# Kurse kommen aus den registrierten Datenanbietern (Reihenfolge = Failover)
+QUOTE_CACHE = QuoteCache(PROVIDERS.fetch_one, ttls=QUOTE_TTLS, batch_loader=PROVIDERS.fetch)
+
+
+_merged_candles = {}
+
+
+def get_forex_candles(symbol, num_candles=None):
+    """
+    Gibt die echten Intraday-Kerzen (1m) für symbol zurück.
+    Kurs und Kerzen stammen aus derselben Anfrage; neue Kerzen werden
+    inkrementell in den CANDLE_STORE übernommen, der Rückgabewert ist eine
+    kopierfreie Sicht auf dessen Ringpuffer.
+    
+    Returns:
+    DataFrame oder None, falls keine Kerzen verfügbar sind
+    """
+    candles = QUOTE_CACHE.get_candles(symbol)
+    # Dieselbe Cache-Antwort nicht erneut zusammenführen
+    if candles is not None and _merged_candles.get(symbol) is not candles:
+        CANDLE_STORE.merge(symbol, '1m', candles, assume_sorted=True)
+        _merged_candles[symbol] = candles
+        # Lokale Anbieter (Datei, Mock) markieren ihre Kerzen als nicht zu archivieren
+        if archive.ARCHIVE_AVAILABLE and candles.attrs.get('archive', True):
+            # Neue abgeschlossene Kerzen ins Parquet-Archiv; geschrieben wird im Hintergrund
+            archive.ARCHIVE_WRITER.submit_candles(symbol, candles)
+    return CANDLE_STORE.frame(symbol, '1m', num_candles)
+
+
+def synthetic_seed(symbol):
+    """Stabiler Seed pro Symbol (im Gegensatz zu hash() unabhängig von PYTHONHASHSEED)"""
+    return zlib.crc32(symbol.encode('utf-8'))
+
+
+@functools.lru_cache(maxsize=64)
+def _synthetic_base(symbol, base_price, num_candles):
+    """
+    Alle vom aktuellen Preis unabhängigen Anteile der synthetischen Historie.
+    Wird pro (symbol, base_price, num_candles) einmal berechnet; die Arrays
+    sind schreibgeschützt, da sie zwischen Aufrufen geteilt werden.
+    """
+    rng = np.random.default_rng(synthetic_seed(symbol))
+    n = num_candles
+    
+    # Zufallskomponente des Trends, endet bei 0
+    random_component = np.cumsum(rng.normal(0, 0.0001 * base_price, n))
+    random_component -= random_component[-1]
+    
+    # Zyklische Komponente, zum aktuellen Zeitpunkt hin gedämpft
+    t = np.linspace(0, 10, n)
+    cycle = 0.001 * base_price * np.sin(t) + 0.0005 * base_price * np.sin(3 * t)
+    cycle *= 1 - np.linspace(0, 0.8, n) ** 2
+    
+    # Rauschen, das zum Ende hin abnimmt
+    noise = rng.normal(0, 0.0003 * base_price, n) * (1 - np.linspace(0, 0.7, n) ** 2)
+    
+    # Typische Spanne zwischen Schlusskurs und Hoch/Tief (höher für Krypto, fest für JPY)
+    instrument = get_instrument(symbol)
+    typical_spread = instrument.spread
+    if typical_spread is None:
+        typical_spread = instrument.spread_ratio * base_price
+    
+    base = {
+        'static': base_price + cycle + noise + random_component,
+        # Quadratische Konvergenz zum aktuellen Preis
+        'trend_factor': np.linspace(0, 1, n) ** 2,
+        'high_offset': np.abs(rng.normal(typical_spread, typical_spread * 2, n)),
+        'low_offset': np.abs(rng.normal(typical_spread, typical_spread * 2, n)),
+        'tick_volume': rng.integers(100, 1000, n),
+        'spread': rng.integers(1, 5, n),
+        'real_volume': rng.integers(1000, 10000, n)
     }
+    for values in base.values():
+        values.flags.writeable = False
+    return base
+
+
+# Zuletzt erzeugte synthetische Kerzen pro Symbol: (Schlüssel, DataFrame)
+_synthetic_frames = {}
+
+
+def generate_synthetic_candles(symbol, current_price, base_price, num_candles=500):
+    """
+    Erzeugt synthetische Kerzen, die zum aktuellen Preis konvergieren
+    (Fallback, wenn keine echten Kerzen verfügbar sind).
+    
+    Deterministisch pro Symbol. Die preisunabhängige Historie wird gecacht;
+    pro Aufruf werden nur der Trend zum aktuellen Preis und Hoch/Tief
+    vektorisiert neu berechnet. Bei unverändertem Preis und gleicher Minute
+    wird derselbe DataFrame zurückgegeben. Auch Millionen Kerzen (Lasttests)
+    sind so in Sekundenbruchteilen erzeugt.
+    """
+    end_time = pd.Timestamp.now().floor('min')
+    key = (float(current_price), float(base_price), num_candles, end_time)
+    cached = _synthetic_frames.get(symbol)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    if num_candles <= SYNTHETIC_CACHE_BARS:
+        base = _synthetic_base(symbol, float(base_price), num_candles)
+    else:
+        # Lasttests: sehr lange Historien nicht im Speicher halten
+        base = _synthetic_base.__wrapped__(symbol, float(base_price), num_candles)
+    
+    # Trend, der zum aktuellen Preis konvergiert
+    closes = base['static'] + base['trend_factor'] * (current_price - base_price)
+    closes[-1] = current_price  # Letzter Preis entspricht exakt dem aktuellen Preis
+    
+    opens = np.empty_like(closes)
+    opens[0] = closes[0]
+    opens[1:] = closes[:-1]
     
-    # Holt alle Kurse von Yahoo Finance
-    symbols = list(forex_data.keys())
-    updated_data = {}
+    # Hoch >= max(Eröffnung, Schluss), Tief <= min(Eröffnung, Schluss)
+    highs = np.maximum(closes + base['high_offset'], opens)
+    lows = np.minimum(closes - base['low_offset'], opens)
     
-    # Kurse nacheinander abrufen mit kurzer Pause, um Rate-Limits zu vermeiden
-    for symbol in symbols:
-        price = get_yahoo_finance_data(symbol)
-        if price is not None:
-            updated_data[symbol] = price
-        time.sleep(0.2)  # Kurze Pause zwischen Anfragen
+    df = pd.DataFrame({
+        'time': pd.date_range(end=end_time, periods=num_candles, freq=f"{SYNTHETIC_BAR_MINUTES}min"),
+        'open': opens,
+        'high': highs,
+        'low': lows,
+        'close': closes,
+        'tick_volume': base['tick_volume'],
+        'spread': base['spread'],
+        'real_volume': base['real_volume']
+    })
+    
+    if num_candles <= SYNTHETIC_CACHE_BARS:
+        _synthetic_frames[symbol] = (key, df)
+    return df
+
+
+def get_forex_frame(symbol, num_candles=500, snapshot=None, base_prices=None):
+    """
+    Liefert die Kerzen für symbol: echte Intraday-Kerzen aus dem Kurs-Cache
+    oder, falls zu wenige vorhanden sind, synthetische Kerzen, die zum
+    aktuellen Preis konvergieren.
+    
+    Parameters:
+    snapshot (dict): optionaler Kurs-Snapshot aus get_quote_snapshot()
+    base_prices (dict): Startpreise der synthetischen Historie pro Symbol
+                        (Standard: BASE_PRICES)
+    
+    Returns:
+    tuple: (DataFrame, aktueller Preis)
+    """
+    base_price = (base_prices or BASE_PRICES).get(symbol, 1.0)
+    current_price = get_current_forex_price(symbol, snapshot=snapshot)
+    if current_price is None:
+        # Fallback auf den Basispreis, falls die API nicht antwortet
+        current_price = base_price
+    
+    # Bevorzugt die echten Kerzen, die mit der Kursanfrage geladen wurden
+    df = get_forex_candles(symbol, num_candles)
+    if df is None or len(df) < MIN_REAL_CANDLES:
+        df = generate_synthetic_candles(symbol, current_price, base_price, num_candles)
+    return df, current_price
+
+
+def set_quote_source(loader, batch_loader=None):
+    """
+    Ersetzt die Kursquelle des prozessweiten Caches, z.B. durch einen
+    Offline-Stub für Benchmarks. loader(symbol) liefert (price, candles),
+    batch_loader(symbols) optional {symbol: (price, candles)}.
+    Cache und Kerzenspeicher werden dabei geleert.
+    """
+    QUOTE_CACHE.set_loader(loader, batch_loader)
+    _merged_candles.clear()
+    _synthetic_frames.clear()
+    CANDLE_STORE.clear()
+
+
+@contextlib.contextmanager
+def private_quote_source(loader, batch_loader=None):
+    """
+    Wie set_quote_source, aber nur innerhalb des with-Blocks: Kurs-Cache,
+    Kerzenspeicher und die Zwischenspeicher werden durch eigene Instanzen
+    ersetzt und danach unverändert wiederhergestellt, z.B. für einen Replay
+    in einem Prozess mit eigener Kursquelle.
+    
+    Returns:
+    QuoteCache: der Cache mit loader/batch_loader
+    """
+    global QUOTE_CACHE, CANDLE_STORE, _merged_candles, _synthetic_frames
+    saved = QUOTE_CACHE, CANDLE_STORE, _merged_candles, _synthetic_frames
+    QUOTE_CACHE = QuoteCache(loader, ttls=QUOTE_TTLS, batch_loader=batch_loader)
+    CANDLE_STORE = CandleStore(saved[1].capacity)
+    _merged_candles, _synthetic_frames = {}, {}
+    try:
+        yield QUOTE_CACHE
+    finally:
+        QUOTE_CACHE, CANDLE_STORE, _merged_candles, _synthetic_frames = saved
+
+
+def use_providers(names=None):
+    """
+    Lädt die Kurse (wieder) über die Anbieter-Registry, optional mit neuer
+    Failover-Reihenfolge, z.B. use_providers(['file', 'yahoo']) oder
+    use_providers('mock') für Lasttests ohne Netzwerk.
+    
+    Raises:
+    ValueError: Für nicht registrierte Anbieter
+    """
+    if names is not None:
+        PROVIDERS.set_order(names)
+    set_quote_source(PROVIDERS.fetch_one, PROVIDERS.fetch)
+
+
+def get_quote_cache_stats():
+    """Statistiken des prozessweiten Kurs-Caches (z.B. für die Sidebar)"""
+    return QUOTE_CACHE.stats()
+
+
+def get_forex_data_from_source(symbols=None):
+    """
+    Versucht, aktuelle Marktdaten von den Datenanbietern abzurufen.
+    Im Fehlerfall werden Fallback-Daten zurückgegeben.
+    Jedes Symbol wird genau einmal abgerufen.
+    """
+    if symbols is None:
+        symbols = list(FALLBACK_PRICES.keys())
+    
+    forex_data = {symbol: FALLBACK_PRICES.get(symbol) for symbol in symbols}
+    
+    # Kurse gebündelt über den Cache abrufen; nur fehlende Kurse gehen an die Anbieter
+    prices = QUOTE_CACHE.get_many(symbols)
+    updated_data = {symbol: price for symbol, price in prices.items() if price is not None}
     
     # Fallback-Daten mit aktuellen Daten aktualisieren
     forex_data.update(updated_data)
@@ -98,20 +751,31 @@ def get_forex_data_from_source():
     return forex_data
 
 
+@traced('get_quote_snapshot')
+def get_quote_snapshot(symbols=None):
+    """
+    Erstellt einen Kurs-Snapshot für das gesamte Symbol-Universum.
+    Pro Aktualisierungszyklus einmal aufrufen und das Ergebnis an
+    get_current_forex_price(symbol, snapshot=...) weitergeben, damit jedes
+    Symbol nur einmal abgerufen wird.
+    
+    Returns:
+    dict: Symbol -> Preis (None für unbekannte Symbole ohne Fallback)
+    """
+    return get_forex_data_from_source(symbols)
+
+
 def get_variation(base_price, symbol=""):
     """
     Generiert eine minimale realistische Variation für den angegebenen Basispreis
     Variation drastisch reduziert, um bei kurzen Zeitabständen realistischer zu sein
     """
     # Kleinere Variation für Forex-Paare
-    if any(crypto in symbol for crypto in ['BTC', 'SOL', 'ETH', 'XRP', 'ADA']):
+    if get_instrument(symbol).is_crypto:
         # Kleinere Variation für Krypto (0.05-0.1%)
         percent = random.uniform(0.00005, 0.0001)
-    elif 'JPY' in symbol:
-        # Spezielle Variation für JPY-Paare
-        percent = random.uniform(0.00001, 0.00005)
     else:
-        # Standard-Forex-Paare (0.005-0.01%)
+        # Forex-Paare einschließlich JPY (0.005-0.01%)
         percent = random.uniform(0.00001, 0.00005)
         
     # Zufällige Richtung (positiv oder negativ)
@@ -121,20 +785,24 @@ def get_variation(base_price, symbol=""):
     return variation
 
 
-def get_current_forex_price(symbol, add_variation=False):
+@traced('get_current_forex_price', 'symbol')
+def get_current_forex_price(symbol, add_variation=False, snapshot=None):
     """
     Gibt den aktuellen Preis für das angegebene Währungspaar zurück
     add_variation=False, um exakt den von Yahoo Finance abgerufenen Preis zu verwenden
+    snapshot: optionaler Kurs-Snapshot aus get_quote_snapshot(); ohne Snapshot
+    wird nur das angefragte Symbol abgerufen
     """
-    forex_data = get_forex_data_from_source()
+    if snapshot is None:
+        snapshot = get_forex_data_from_source([symbol])
     
-    if symbol in forex_data:
-        base_price = forex_data[symbol]
-        if add_variation:
-            # Füge minimale Variation hinzu, um "live" zu erscheinen
-            variation = get_variation(base_price, symbol)
-            return base_price + variation
-        return base_price
+    base_price = snapshot.get(symbol)
+    if base_price is None:
+        # Fallback für unbekannte Symbole
+        return None
     
-    # Fallback für unbekannte Symbole
-    return None
\ No newline at end of file
+    if add_variation:
+        # Füge minimale Variation hinzu, um "live" zu erscheinen
+        variation = get_variation(base_price, symbol)
+        return base_price + variation
+    return base_price
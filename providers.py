@@ -0,0 +1,290 @@
+"""
+Market data providers with a registry and failover.
+
+A provider answers batch requests: fetch(symbols) returns
+{symbol: (price, candles)} for the symbols it has data for (candles is a
+1m OHLCV DataFrame or None). get_quotes/get_candles are the price-only
+and candle-only views of the same call. Shipped providers:
+
+    yahoo  HTTPProvider: the Yahoo chart endpoint (parallel, rate limited)
+    file   FileProvider: candles from the Parquet archive or <SYMBOL>.csv files
+    mock   MockProvider: deterministic in-process random walks for any symbol
+
+The registry asks the providers in order; symbols a provider can't serve
+(unsupported, missing or failed) go to the next one. The order comes
+from MARKET_DATA_PROVIDERS (default: yahoo) or set_order(). market_data
+loads all quotes through PROVIDERS, so sources can be swapped without
+touching the strategy.
+"""
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import archive
+from tracing import tracer
+
+DEFAULT_PROVIDER_ORDER = os.environ.get('MARKET_DATA_PROVIDERS', 'yahoo')
+
+
+class MarketDataProvider:
+    """
+    Base class. Subclasses implement fetch(); archive_candles tells
+    market_data whether candles from this provider belong in the archive.
+    """
+
+    name = None
+    archive_candles = False
+
+    def supports(self, symbol):
+        return True
+
+    def fetch(self, symbols):
+        """
+        Price and candles for several symbols
+
+        Returns:
+        dict: symbol -> (price, candles or None), only symbols with a price
+        """
+        raise NotImplementedError
+
+    def get_quotes(self, symbols):
+        """symbol -> price"""
+        return {symbol: price for symbol, (price, _) in self.fetch(symbols).items()}
+
+    def get_candles(self, symbols):
+        """symbol -> 1m candles (symbols without candles are left out)"""
+        return {symbol: candles for symbol, (_, candles) in self.fetch(symbols).items() if candles is not None}
+
+
+class HTTPProvider(MarketDataProvider):
+    """Yahoo Finance chart endpoint; one rate-limited request per symbol, in parallel"""
+
+    name = 'yahoo'
+    archive_candles = True
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+
+    def supports(self, symbol):
+        import market_data
+        return symbol in market_data.YAHOO_SYMBOLS
+
+    def fetch(self, symbols):
+        import market_data
+
+        workers = max(1, min(self.max_workers or market_data.MAX_FETCH_WORKERS, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            responses = pool.map(market_data.get_yahoo_chart_data, symbols)
+        return {symbol: response for symbol, response in zip(symbols, responses) if response[0] is not None}
+
+
+class FileProvider(MarketDataProvider):
+    """
+    Candles from local files: the Parquet archive (pyarrow) under root,
+    otherwise root/<SYMBOL>.csv. The price is the last close.
+
+    Parameters:
+    root (str): Archive directory or directory of CSV files
+    lookback (timedelta): Only archived bars this recent (None for all)
+    bars (int): Newest bars returned per symbol
+    """
+
+    name = 'file'
+
+    def __init__(self, root=archive.ARCHIVE_DIR, lookback=timedelta(days=2), bars=2000, timeframe='1m'):
+        self.root = root
+        self.lookback = lookback
+        self.bars = bars
+        self.timeframe = timeframe
+
+    def _read_archive(self, symbols):
+        if not archive.PYARROW_AVAILABLE or not os.path.isdir(os.path.join(self.root, 'candles')):
+            return {}
+        start = datetime.now() - self.lookback if self.lookback is not None else None
+        frames = archive.read_candle_frames(symbols, start=start, timeframe=self.timeframe, root=self.root)
+        return {symbol: df.tail(self.bars).reset_index(drop=True) for symbol, df in frames.items() if len(df)}
+
+    def _read_csv(self, symbol):
+        path = os.path.join(self.root, f"{symbol}.csv")
+        if not os.path.exists(path):
+            return None
+        df = pd.read_csv(path, parse_dates=['time']).sort_values('time', kind='stable')
+        return df.tail(self.bars).reset_index(drop=True) if len(df) else None
+
+    def fetch(self, symbols):
+        frames = self._read_archive(symbols)
+        for symbol in symbols:
+            if symbol not in frames:
+                df = self._read_csv(symbol)
+                if df is not None:
+                    frames[symbol] = df
+        return {symbol: (float(df['close'].iloc[-1]), df) for symbol, df in frames.items()}
+
+
+class MockProvider(MarketDataProvider):
+    """
+    Deterministic 1m random walks for any symbol, generated in process
+    (seeded per symbol). advance() appends one bar to every walk, so
+    repeated scans see moving markets.
+
+    Parameters:
+    bars (int): Candles per symbol
+    base_prices (dict): Start prices (default: market_data.FALLBACK_PRICES,
+                        otherwise derived from the symbol name)
+    volatility (float): Relative standard deviation per bar
+    end (str): Time of the newest bar
+    """
+
+    name = 'mock'
+
+    def __init__(self, bars=500, base_prices=None, volatility=0.0002, end="2025-01-01", seed=0):
+        self.bars = bars
+        self.base_prices = base_prices
+        self.volatility = volatility
+        self.end = pd.Timestamp(end)
+        self.seed = seed
+        self.steps = 0
+        self._closes = {}
+        self._frames = {}
+
+    def _base_price(self, symbol):
+        if self.base_prices is None:
+            import market_data
+            self.base_prices = market_data.FALLBACK_PRICES
+        if symbol in self.base_prices:
+            return self.base_prices[symbol]
+        return 0.5 + (zlib.crc32(symbol.encode('utf-8')) % 1000) / 100
+
+    def _rng(self, symbol):
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode('utf-8'))])
+
+    def _walk(self, symbol):
+        closes = self._closes.get(symbol)
+        if closes is None:
+            steps = self._rng(symbol).normal(0, self.volatility, self.bars + self.steps)
+            closes = self._closes[symbol] = self._base_price(symbol) * np.exp(np.cumsum(steps))
+        return closes
+
+    def advance(self, bars=1):
+        """Move every walk forward by bars (new bars are appended, old ones drop out)"""
+        self.steps += bars
+        for symbol, closes in self._closes.items():
+            steps = self._rng(symbol).normal(0, self.volatility, self.bars + self.steps)[-bars:]
+            self._closes[symbol] = np.append(closes, closes[-1] * np.exp(np.cumsum(steps)))
+        self._frames.clear()
+
+    def _frame(self, symbol):
+        df = self._frames.get(symbol)
+        if df is None:
+            closes = self._walk(symbol)[-self.bars:]
+            opens = np.append(closes[0], closes[:-1])
+            spread = closes * self.volatility / 2
+            df = self._frames[symbol] = pd.DataFrame({
+                'time': pd.date_range(end=self.end + pd.Timedelta(minutes=self.steps), periods=len(closes), freq='min'),
+                'open': opens,
+                'high': np.maximum(opens, closes) + spread,
+                'low': np.minimum(opens, closes) - spread,
+                'close': closes,
+                'tick_volume': np.zeros(len(closes))
+            })
+        return df
+
+    def fetch(self, symbols):
+        return {symbol: (float(self._walk(symbol)[-1]), self._frame(symbol)) for symbol in symbols}
+
+
+class ProviderRegistry:
+    """Named providers and the failover order in which they are asked"""
+
+    def __init__(self, order=()):
+        self._providers = {}
+        self.order = list(order)
+        self.stats = {}
+
+    def register(self, provider, name=None):
+        name = name or provider.name
+        self._providers[name] = provider
+        self.stats.setdefault(name, {'calls': 0, 'symbols': 0, 'served': 0, 'failures': 0, 'seconds': 0.0})
+        return provider
+
+    def get(self, name):
+        return self._providers[name]
+
+    def names(self):
+        return list(self._providers)
+
+    def set_order(self, names):
+        """
+        Failover order (names or a comma-separated string)
+
+        Raises:
+        ValueError: For unregistered names
+        """
+        if isinstance(names, str):
+            names = [name.strip() for name in names.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self._providers]
+        if unknown:
+            raise ValueError(f"unknown market data providers {unknown} (registered: {self.names()})")
+        self.order = list(names)
+
+    def fetch(self, symbols):
+        """
+        Ask the providers in order until every symbol has a quote
+
+        Returns:
+        dict: symbol -> (price, candles) for the symbols any provider served
+        """
+        remaining = list(dict.fromkeys(symbols))
+        results = {}
+        for name in self.order:
+            provider = self._providers[name]
+            batch = [symbol for symbol in remaining if provider.supports(symbol)]
+            if not batch:
+                continue
+            stats = self.stats[name]
+            stats['calls'] += 1
+            stats['symbols'] += len(batch)
+            started = time.perf_counter()
+            try:
+                with tracer.span(f"provider:{name}"):
+                    served = provider.fetch(batch)
+            except Exception as e:
+                print(f"Fehler beim Datenanbieter {name}: {e}")
+                stats['failures'] += 1
+                continue
+            finally:
+                stats['seconds'] += time.perf_counter() - started
+            for symbol, (price, candles) in served.items():
+                if price is None:
+                    continue
+                if candles is not None:
+                    # Flag a shallow copy; providers may hand out frames they cache themselves
+                    candles = candles.copy(deep=False)
+                    candles.attrs['archive'] = provider.archive_candles
+                results[symbol] = (price, candles)
+            stats['served'] += sum(1 for symbol in batch if symbol in results)
+            remaining = [symbol for symbol in remaining if symbol not in results]
+            if not remaining:
+                break
+        return results
+
+    def fetch_one(self, symbol):
+        """(price, candles) of one symbol, (None, None) if no provider has it"""
+        return self.fetch([symbol]).get(symbol, (None, None))
+
+
+PROVIDERS = ProviderRegistry()
+PROVIDERS.register(HTTPProvider())
+PROVIDERS.register(FileProvider())
+PROVIDERS.register(MockProvider())
+PROVIDERS.set_order(DEFAULT_PROVIDER_ORDER)
+
+
+def mock_universe(n, prefix="MOCK"):
+    """n symbol names for throughput tests against MockProvider"""
+    return [f"{prefix}{i:05d}" for i in range(n)]
@@ -0,0 +1,288 @@
+"""
+Quote recorder and deterministic replay.
+
+While recording, every chart response fetched by market_data is appended
+to a compact binary log: the raw response (zlib-compressed JSON) and the
+price and candles derived from it (raw int64/float64 arrays). Start it
+with `python scanner.py --record quotes.sflog` or start_recording().
+
+ReplayEngine feeds a log back through the production path (quote cache,
+candle store, get_forex_frame) and the strategy, either at maximum speed
+or paced like the recording, without network access. The per-response
+strategy results can be saved and compared between runs, so an
+optimization can be checked for unchanged signals:
+
+    python recorder.py quotes.sflog --save baseline.csv
+    python recorder.py quotes.sflog --compare baseline.csv
+    python recorder.py quotes.sflog --speed 10        # 10x real time
+"""
+import argparse
+import json
+import math
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+LOG_MAGIC = b'SFLOG\x01'
+
+# Record kinds
+RAW_RESPONSE = 1
+DERIVED_QUOTE = 2
+
+# kind, wall time, symbol length, payload length
+_RECORD_HEADER = struct.Struct('<BdHI')
+# price, number of candles
+_QUOTE_HEADER = struct.Struct('<dI')
+
+CANDLE_COLUMNS = ('open', 'high', 'low', 'close', 'tick_volume')
+
+RESULT_COLUMNS = ['record', 'recorded_at', 'symbol', 'action', 'entry', 'sl', 'tp']
+
+
+class Recorder:
+    """Appends records to a log file; safe to use from several threads"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(LOG_MAGIC)
+        self.records = 0
+
+    def _write(self, kind, symbol, payload, recorded_at=None):
+        symbol = symbol.encode('utf-8')
+        payload = zlib.compress(payload, 1)
+        header = _RECORD_HEADER.pack(kind, time.time() if recorded_at is None else recorded_at,
+                                     len(symbol), len(payload))
+        with self._lock:
+            self._file.write(header + symbol + payload)
+            self._file.flush()
+            self.records += 1
+
+    def record_response(self, symbol, result, price, candles):
+        """
+        Record a raw chart response and the price and candles derived from it.
+        Errors are printed, never raised, so recording can't break fetching.
+        """
+        try:
+            recorded_at = time.time()
+            self._write(RAW_RESPONSE, symbol, json.dumps(result).encode('utf-8'), recorded_at)
+            self._write(DERIVED_QUOTE, symbol, encode_quote(price, candles), recorded_at)
+        except Exception as e:
+            print(f"Fehler beim Aufzeichnen für {symbol}: {e}")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def encode_quote(price, candles):
+    """Binary form of (price, candles DataFrame or None)"""
+    n = 0 if candles is None else len(candles)
+    parts = [_QUOTE_HEADER.pack(math.nan if price is None else float(price), n)]
+    if n:
+        parts.append(candles['time'].to_numpy(dtype='datetime64[ns]').view(np.int64).tobytes())
+        parts.extend(candles[name].to_numpy(dtype=np.float64).tobytes() for name in CANDLE_COLUMNS)
+    return b''.join(parts)
+
+
+def decode_quote(payload):
+    """Inverse of encode_quote: (price or None, candles DataFrame or None)"""
+    price, n = _QUOTE_HEADER.unpack_from(payload)
+    price = None if math.isnan(price) else price
+    if n == 0:
+        return price, None
+    arrays = np.frombuffer(payload, dtype=np.float64, count=n * (1 + len(CANDLE_COLUMNS)),
+                           offset=_QUOTE_HEADER.size).reshape(1 + len(CANDLE_COLUMNS), n)
+    candles = pd.DataFrame({'time': arrays[0].view(np.int64).view('datetime64[ns]')})
+    for row, name in enumerate(CANDLE_COLUMNS, start=1):
+        candles[name] = arrays[row]
+    return price, candles
+
+
+def read_log(path, kinds=None):
+    """
+    Iterate over the records of a log
+
+    Yields:
+    tuple: (kind, recorded_at, symbol, decompressed payload)
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f"{path} is not a quote log")
+        while True:
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            kind, recorded_at, symbol_len, payload_len = _RECORD_HEADER.unpack(header)
+            symbol = f.read(symbol_len).decode('utf-8')
+            payload = f.read(payload_len)
+            if len(payload) < payload_len:
+                # Truncated last record (recording was interrupted)
+                return
+            if kinds is None or kind in kinds:
+                yield kind, recorded_at, symbol, zlib.decompress(payload)
+
+
+_recorder = None
+
+
+def start_recording(path):
+    """Record every chart response fetched by market_data to path (appending)"""
+    global _recorder
+    stop_recording()
+    _recorder = Recorder(path)
+    return _recorder
+
+
+def stop_recording():
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
+
+
+def get_recorder():
+    """The active Recorder, or None"""
+    return _recorder
+
+
+class ReplayEngine:
+    """
+    Replays a quote log through market_data and the strategy.
+
+    Every recorded response replaces the quote of its symbol (the quote
+    cache entry is invalidated, so the TTL doesn't hide it) and the symbol
+    is analyzed right away with get_forex_frame and profit_pulse_precision:
+    the strategy of scan_pairs for one symbol, without the random extra
+    signals and without saving, so results are deterministic.
+
+    Parameters:
+    path (str): Quote log
+    speed (float): Pace relative to the recording (None: as fast as possible)
+    symbols (list): Only these symbols
+    reparse (bool): Derive price and candles from the raw responses again
+                    instead of using the recorded ones (checks parser changes)
+    """
+
+    def __init__(self, path, speed=None, symbols=None, reparse=False):
+        self.path = path
+        self.speed = speed
+        self.symbols = set(symbols) if symbols is not None else None
+        self.reparse = reparse
+        self.stats = {}
+
+    def _quotes(self):
+        import market_data
+
+        kind = RAW_RESPONSE if self.reparse else DERIVED_QUOTE
+        for _, recorded_at, symbol, payload in read_log(self.path, kinds={kind}):
+            if self.symbols is not None and symbol not in self.symbols:
+                continue
+            if self.reparse:
+                result = json.loads(payload)
+                candles = market_data.parse_chart_candles(result, symbol)
+                quote = market_data.parse_chart_price(result, symbol), (candles if not candles.empty else None)
+            else:
+                quote = decode_quote(payload)
+            yield recorded_at, symbol, quote
+
+    def run(self, on_result=None):
+        """
+        Replay the whole log
+
+        Returns:
+        DataFrame: One row per response (RESULT_COLUMNS)
+        """
+        import market_data
+        from strategy import profit_pulse_precision
+
+        responses = {}
+        rows = []
+        bars = 0
+        started = time.perf_counter()
+        first = None
+        # Private cache and candle store: the process-wide quote source stays as it was
+        with market_data.private_quote_source(
+                lambda symbol: responses.get(symbol, (None, None)),
+                lambda symbols: {symbol: responses.get(symbol, (None, None)) for symbol in symbols}) as cache:
+            for recorded_at, symbol, (price, candles) in self._quotes():
+                if self.speed:
+                    first = recorded_at if first is None else first
+                    delay = (recorded_at - first) / self.speed - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                if candles is not None:
+                    # Replayed candles must not be archived a second time
+                    candles.attrs['archive'] = False
+                responses[symbol] = price, candles
+                cache.invalidate(symbol)
+                df, _ = market_data.get_forex_frame(symbol)
+                action, _, entry, sl, tp = profit_pulse_precision(df)
+                row = dict(zip(RESULT_COLUMNS, (len(rows), recorded_at, symbol, action, entry, sl, tp)))
+                rows.append(row)
+                bars += len(df)
+                if on_result is not None:
+                    on_result(row)
+        elapsed = time.perf_counter() - started
+        self.stats = {
+            'responses': len(rows),
+            'bars': bars,
+            'seconds': elapsed,
+            'responses_per_s': len(rows) / elapsed if elapsed else math.inf,
+            'bars_per_s': bars / elapsed if elapsed else math.inf
+        }
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+
+def compare_results(expected, actual, tolerance=1e-9):
+    """
+    Rows whose signal differs between two replays of the same log
+
+    Returns:
+    DataFrame: record, symbol and both versions of action/entry/sl/tp
+    """
+    merged = expected.merge(actual, on=['record', 'symbol'], how='outer', suffixes=('_expected', '_actual'))
+    # Saved results without any signal read back as an all-NaN float column
+    changed = (merged['action_expected'].astype('string').fillna('')
+               != merged['action_actual'].astype('string').fillna(''))
+    for name in ('entry', 'sl', 'tp'):
+        a = merged[f"{name}_expected"].astype(float)
+        b = merged[f"{name}_actual"].astype(float)
+        same = (a.isna() & b.isna()) | ((a - b).abs() <= tolerance * b.abs().clip(lower=1.0))
+        changed |= ~same
+    columns = ['record', 'symbol'] + [f"{name}_{side}" for name in ('action', 'entry', 'sl', 'tp')
+                                      for side in ('expected', 'actual')]
+    return merged.loc[changed, columns]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded quote log through the strategy")
+    parser.add_argument("log", help="Quote log (see scanner.py --record)")
+    parser.add_argument("--speed", type=float, help="Pace relative to the recording (default: max speed)")
+    parser.add_argument("--symbol", action="append", help="Only this symbol (repeatable)")
+    parser.add_argument("--reparse", action="store_true", help="Parse the raw responses again")
+    parser.add_argument("--save", metavar="CSV", help="Write the results")
+    parser.add_argument("--compare", metavar="CSV", help="Compare with saved results; exit 1 on differences")
+    args = parser.parse_args()
+
+    engine = ReplayEngine(args.log, args.speed, args.symbol, args.reparse)
+    results = engine.run()
+    stats = engine.stats
+    print(f"{stats['responses']} Antworten, {stats['bars']} Kerzen in {stats['seconds']:.2f}s "
+          f"({stats['responses_per_s']:.0f} Antworten/s, {stats['bars_per_s']:.0f} Kerzen/s), "
+          f"{results['action'].notna().sum()} Signale")
+    if args.save:
+        results.to_csv(args.save, index=False)
+    if args.compare:
+        differences = compare_results(pd.read_csv(args.compare), results)
+        if len(differences):
+            print(differences.to_string(index=False))
+            sys.exit(1)
+        print("Keine Abweichungen.")
@@ -0,0 +1,160 @@
+"""
+Multi-timeframe candles built from the 1-minute base series.
+
+The resampler aggregates the base bars in CANDLE_STORE into 5m, 15m and
+1h bars stored next to them (same store, keyed by timeframe). Updates are
+incremental: only base bars from the start of the newest (possibly still
+forming) higher-timeframe bar onward are aggregated again, so the cost of
+an update grows with the number of new base bars, not with the history.
+
+evaluate_timeframes then runs Profit Pulse Precision for every
+symbol/timeframe combination in one vectorized pass.
+"""
+import numpy as np
+
+from candle_store import CANDLE_FIELDS, CANDLE_STORE
+from indicators import align_price_matrix
+from strategy import DEFAULT_PARAMS, profit_pulse_precision_batch
+from tracing import tracer
+
+# Bar length of every supported timeframe (seconds)
+TIMEFRAMES = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '1h': 3600
+}
+
+BASE_TIMEFRAME = '1m'
+
+# Bars per row of the batched strategy evaluation (enough for the EMA50 to settle)
+EVALUATION_BARS = 500
+
+# Rows per indicator pass; bounds the memory of large symbol universes
+EVALUATION_CHUNK_ROWS = 1024
+
+
+def timeframe_ns(timeframe):
+    """Bar length of timeframe in nanoseconds"""
+    try:
+        return TIMEFRAMES[timeframe] * 1_000_000_000
+    except KeyError:
+        raise ValueError(f"unknown timeframe {timeframe!r} (supported: {', '.join(TIMEFRAMES)})") from None
+
+
+def aggregate_bars(times, values, step_ns):
+    """
+    Aggregate sorted bars into buckets of step_ns aligned to the epoch
+    (open: first, high: max, low: min, close: last, tick_volume: sum)
+
+    Parameters:
+    times (ndarray): Sorted int64 nanosecond timestamps
+    values (dict): field -> ndarray for every field in CANDLE_FIELDS
+    step_ns (int): Bucket length in nanoseconds
+
+    Returns:
+    tuple: (bucket start times, field -> aggregated array)
+    """
+    times = np.asarray(times, dtype=np.int64)
+    if len(times) == 0:
+        return times, {field: np.empty(0) for field in CANDLE_FIELDS}
+    buckets = times - times % step_ns
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:] - 1, len(times) - 1)
+    return buckets[starts], {
+        'open': values['open'][starts],
+        'high': np.maximum.reduceat(values['high'], starts),
+        'low': np.minimum.reduceat(values['low'], starts),
+        'close': values['close'][ends],
+        'tick_volume': np.add.reduceat(values['tick_volume'], starts)
+    }
+
+
+class Resampler:
+    """
+    Keeps higher-timeframe bars of a CandleStore in sync with its base
+    timeframe. Timeframes not coarser than the base are ignored.
+    """
+
+    def __init__(self, store=CANDLE_STORE, base=BASE_TIMEFRAME, timeframes=('5m', '15m', '1h')):
+        base_ns = timeframe_ns(base)
+        self.store = store
+        self.base = base
+        self.timeframes = [tf for tf in timeframes if timeframe_ns(tf) > base_ns]
+
+    def update(self, symbol):
+        """
+        Bring the higher timeframes of symbol up to date with its base bars.
+        Only the newest higher-timeframe bar is rewritten; complete bars are
+        appended. If the base ring has already dropped the first base bars
+        of the newest bar, that bar is kept as stored: re-aggregating the
+        rest would replace it with a partial bar.
+
+        Returns:
+        dict: timeframe -> number of appended bars
+        """
+        appended = {}
+        base = self.store.arrays(symbol, self.base)
+        if base is None:
+            return appended
+        base_times = base['time'].view(np.int64)
+        for timeframe in self.timeframes:
+            newest = self.store.arrays(symbol, timeframe, 1)
+            # Re-aggregate from the start of the newest (partial) bar
+            first = 0
+            newest_time = None
+            if newest is not None:
+                newest_time = int(newest['time'].view(np.int64)[0])
+                first = int(np.searchsorted(base_times, newest_time, side='left'))
+            times, values = aggregate_bars(
+                base_times[first:], {field: base[field][first:] for field in CANDLE_FIELDS},
+                timeframe_ns(timeframe)
+            )
+            if len(times) and times[0] == newest_time and newest_time < base_times[0]:
+                # The ring has rolled past the start of the newest bar
+                times = times[1:]
+                values = {field: array[1:] for field, array in values.items()}
+            appended[timeframe] = self.store.merge_arrays(symbol, timeframe, times, values, assume_sorted=True)
+        return appended
+
+    def update_all(self, symbols):
+        """update() for several symbols; returns symbol -> appended bars per timeframe"""
+        with tracer.span('resample'):
+            return {symbol: self.update(symbol) for symbol in symbols}
+
+    def frame(self, symbol, timeframe, n=None):
+        """Zero-copy DataFrame of the newest n bars of symbol in timeframe (see CandleStore.frame)"""
+        return self.store.frame(symbol, timeframe, n)
+
+
+RESAMPLER = Resampler()
+
+
+def evaluate_timeframes(symbols, timeframes=tuple(TIMEFRAMES), store=CANDLE_STORE,
+                        bars=EVALUATION_BARS, params=DEFAULT_PARAMS):
+    """
+    Profit Pulse Precision for every symbol/timeframe combination with at
+    least two stored bars, as rows of one batched indicator pass
+
+    Parameters:
+    symbols (list): Symbols
+    timeframes (list): Timeframes (stored in store, e.g. by RESAMPLER)
+    bars (int): Newest bars per row
+
+    Returns:
+    dict: (symbol, timeframe) -> (action, safety, entry_price, stop_loss, take_profit)
+    """
+    keys = []
+    for symbol in symbols:
+        for timeframe in timeframes:
+            newest = store.arrays(symbol, timeframe, 2)
+            if newest is not None and len(newest['time']) == 2:
+                keys.append((symbol, timeframe))
+    results = []
+    with tracer.span('evaluate_timeframes'):
+        for first in range(0, len(keys), EVALUATION_CHUNK_ROWS):
+            frames = [store.frame(symbol, timeframe, bars)
+                      for symbol, timeframe in keys[first:first + EVALUATION_CHUNK_ROWS]]
+            # align_price_matrix copies, so later merges can't change the inputs
+            results.extend(profit_pulse_precision_batch(align_price_matrix(frames, bars), params))
+    return dict(zip(keys, results))
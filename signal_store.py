@@ -0,0 +1,336 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import archive
+
+SIGNALS_DB = os.environ.get('SIGNALS_DB', 'signals.db')
+
+# CSV history of earlier versions, imported once into the database
+SIGNALS_FILE = 'signals_history.csv'
+SIGNAL_COLUMNS = ['timestamp', 'symbol', 'action', 'entry', 'sl', 'tp', 'safety', 'expiry']
+
+# Durability of committed signals (SQLite synchronous mode): NORMAL can lose the
+# last commits on power loss (never on a process crash), FULL syncs every commit
+SIGNALS_SYNCHRONOUS = os.environ.get('SIGNALS_SYNCHRONOUS', 'NORMAL').upper()
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# How long signals are kept (days); the history tab can look back this far
+SIGNAL_RETENTION_DAYS = float(os.environ.get('SIGNAL_RETENTION_DAYS', 30))
+
+# How often purge_if_due may delete expired rows (seconds)
+PURGE_INTERVAL = 3600
+
+# Published scans kept for inspection (only the latest is read by the app)
+SCAN_HISTORY = 50
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    action TEXT NOT NULL,
+    entry REAL,
+    sl REAL,
+    tp REAL,
+    safety INTEGER,
+    expiry TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_signals_timestamp ON signals (timestamp);
+CREATE INDEX IF NOT EXISTS idx_signals_symbol_timestamp ON signals (symbol, timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+def _format_timestamp(value):
+    """Timestamps are stored as fixed-width text so they sort chronologically"""
+    if isinstance(value, str):
+        value = pd.Timestamp(value)
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+class SignalStore:
+    """
+    Signal history in SQLite, indexed on (timestamp) and (symbol, timestamp).
+    Queries read only the requested page through the index, so loading the
+    history stays cheap as the table grows. One connection per thread.
+    """
+
+    def __init__(self, path=SIGNALS_DB, retention_days=SIGNAL_RETENTION_DAYS, on_expire=None,
+                 synchronous=SIGNALS_SYNCHRONOUS):
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {SYNCHRONOUS_MODES}, not {synchronous!r}")
+        self.path = path
+        self.synchronous = synchronous
+        self.retention_days = retention_days
+        # Called with the expired signals (DataFrame) before purge deletes them
+        self.on_expire = on_expire
+        self._local = threading.local()
+        self._last_purge = 0.0
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            self._local.conn = conn
+        return conn
+
+    def add_signals(self, records):
+        """
+        Insert signal records in one transaction
+
+        Parameters:
+        records (list): Dicts with the SIGNAL_COLUMNS keys
+        """
+        if not records:
+            return
+        rows = [
+            (_format_timestamp(r['timestamp']), r['symbol'], r['action'], r['entry'],
+             r['sl'], r['tp'], r['safety'], r['expiry'])
+            for r in records
+        ]
+        with self._connection() as conn:
+            conn.executemany(
+                'INSERT INTO signals (timestamp, symbol, action, entry, sl, tp, safety, expiry) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows
+            )
+
+    def query_signals(self, days=None, since=None, until=None, symbol=None, limit=50, offset=0, before=None):
+        """
+        Newest-first page of signals
+
+        Parameters:
+        days (float): Only signals of the last days (shortcut for since)
+        since, until (datetime): Time range (since inclusive, until exclusive)
+        symbol (str): Only this symbol
+        limit (int): Page size (None for all rows)
+        offset (int): Rows to skip (for shallow pages)
+        before (tuple): Keyset cursor (timestamp, id) of the last row of the
+                        previous page; constant cost for deep pages
+
+        Returns:
+        DataFrame: SIGNAL_COLUMNS plus id
+        """
+        if days is not None:
+            since = datetime.now() - timedelta(days=days)
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if since is not None:
+            clauses.append('timestamp >= ?')
+            params.append(_format_timestamp(since))
+        if until is not None:
+            clauses.append('timestamp < ?')
+            params.append(_format_timestamp(until))
+        if before is not None:
+            clauses.append('(timestamp < ? OR (timestamp = ? AND id < ?))')
+            before_ts = _format_timestamp(before[0])
+            params.extend([before_ts, before_ts, int(before[1])])
+
+        sql = 'SELECT id, ' + ', '.join(SIGNAL_COLUMNS) + ' FROM signals'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY timestamp DESC, id DESC'
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params.extend([int(limit), int(offset)])
+
+        rows = self._connection().execute(sql, params).fetchall()
+        signals_df = pd.DataFrame(rows, columns=['id'] + SIGNAL_COLUMNS)
+        signals_df['timestamp'] = pd.to_datetime(signals_df['timestamp'], format=TIMESTAMP_FORMAT)
+        return signals_df
+
+    def purge(self, retention_days=None):
+        """
+        Delete signals older than the retention horizon
+
+        Returns:
+        int: Number of deleted rows
+        """
+        days = self.retention_days if retention_days is None else retention_days
+        cutoff = datetime.now() - timedelta(days=days)
+        if self.on_expire is not None:
+            expired = self.query_signals(until=cutoff, limit=None)
+            if not expired.empty:
+                self.on_expire(expired[SIGNAL_COLUMNS])
+        cutoff = _format_timestamp(cutoff)
+        with self._connection() as conn:
+            return conn.execute('DELETE FROM signals WHERE timestamp < ?', (cutoff,)).rowcount
+
+    def purge_if_due(self, interval=PURGE_INTERVAL):
+        """Run purge at most once per interval in this process"""
+        if time.time() - self._last_purge < interval:
+            return None
+        self._last_purge = time.time()
+        return self.purge()
+
+    def publish_scan(self, payload):
+        """
+        Store a scan result (JSON-serializable dict) as the latest scan
+
+        Returns:
+        int: Scan id
+        """
+        with self._connection() as conn:
+            scan_id = conn.execute(
+                'INSERT INTO scans (created_at, payload) VALUES (?, ?)',
+                (time.time(), json.dumps(payload))
+            ).lastrowid
+            conn.execute('DELETE FROM scans WHERE id <= ?', (scan_id - SCAN_HISTORY,))
+        return scan_id
+
+    def latest_scan(self):
+        """
+        The most recently published scan
+
+        Returns:
+        dict or None: Payload plus id, created_at and age (seconds)
+        """
+        row = self._connection().execute(
+            'SELECT id, created_at, payload FROM scans ORDER BY id DESC LIMIT 1'
+        ).fetchone()
+        return self._decode_scan(row)
+
+    def get_scan(self, scan_id):
+        """A published scan by id (see latest_scan), None if already pruned"""
+        row = self._connection().execute(
+            'SELECT id, created_at, payload FROM scans WHERE id = ?', (scan_id,)
+        ).fetchone()
+        return self._decode_scan(row)
+
+    @staticmethod
+    def _decode_scan(row):
+        if row is None:
+            return None
+        scan = json.loads(row[2])
+        scan.update(id=row[0], created_at=row[1], age=time.time() - row[1])
+        return scan
+
+    def latest_scan_id(self):
+        """Id of the latest scan (cheap check for new results), or None"""
+        row = self._connection().execute('SELECT MAX(id) FROM scans').fetchone()
+        return row[0]
+
+    def claim_scan(self, min_age):
+        """
+        Atomically claim the next scan slot across processes: succeeds only
+        if the previous claim is at least min_age seconds old.
+
+        Returns:
+        float or None: The claim (pass it to release_scan_claim) if the
+                       caller should scan now, otherwise None
+        """
+        now = time.time()
+        with self._connection() as conn:
+            claimed = conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('scan_claimed_at', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value "
+                "WHERE CAST(meta.value AS REAL) <= ?",
+                (repr(now), now - min_age)
+            ).rowcount
+        return now if claimed == 1 else None
+
+    def scan_claim_age(self):
+        """Seconds since the last scan claim (inf if none); read-only, unlike claim_scan"""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'scan_claimed_at'").fetchone()
+        return time.time() - float(row[0]) if row is not None else float('inf')
+
+    def release_scan_claim(self, claimed_at):
+        """Give up a claim of claim_scan (e.g. the scan failed), unless a newer claim replaced it"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM meta WHERE key = 'scan_claimed_at' AND value = ?", (repr(claimed_at),))
+
+    def import_csv(self, path=SIGNALS_FILE):
+        """
+        One-time import of a CSV signal history (e.g. the old
+        signals_history.csv). Repeated calls for the same file do nothing.
+
+        Returns:
+        int: Number of imported rows
+        """
+        key = f"csv_imported:{os.path.abspath(path)}"
+        conn = self._connection()
+        if conn.execute('SELECT 1 FROM meta WHERE key = ?', (key,)).fetchone():
+            return 0
+        if not os.path.exists(path):
+            return 0
+        try:
+            signals_df = pd.read_csv(path, parse_dates=['timestamp'])
+        except pd.errors.EmptyDataError:
+            signals_df = pd.DataFrame(columns=SIGNAL_COLUMNS)
+        records = signals_df.to_dict('records')
+        with conn:
+            # Claim the import in the same transaction, so concurrent processes import once
+            claimed = conn.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)',
+                                   (key, datetime.now().isoformat())).rowcount
+            if not claimed:
+                return 0
+            rows = [
+                (_format_timestamp(r['timestamp']), r['symbol'], r['action'], r['entry'],
+                 r['sl'], r['tp'], r['safety'], r['expiry'])
+                for r in records
+            ]
+            conn.executemany(
+                'INSERT INTO signals (timestamp, symbol, action, entry, sl, tp, safety, expiry) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows
+            )
+        return len(records)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _archive_hook():
+    """Expired signals go to the Parquet archive when pyarrow is available"""
+    return archive.write_signals if archive.ARCHIVE_AVAILABLE else None
+
+
+def configure_signal_store(path=SIGNALS_DB, retention_days=SIGNAL_RETENTION_DAYS, import_path=SIGNALS_FILE,
+                           synchronous=SIGNALS_SYNCHRONOUS):
+    """
+    Replace the process-wide store (e.g. another database file)
+
+    Parameters:
+    synchronous (str): SQLite synchronous mode (OFF, NORMAL, FULL or EXTRA)
+
+    Returns:
+    SignalStore: The new store
+    """
+    global _store
+    with _store_lock:
+        _store = SignalStore(path, retention_days, on_expire=_archive_hook(), synchronous=synchronous)
+        if import_path:
+            _store.import_csv(import_path)
+        return _store
+
+
+def get_signal_store():
+    """Process-wide SignalStore; imports signals_history.csv on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SignalStore(on_expire=_archive_hook())
+            _store.import_csv()
+        return _store
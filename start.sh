@@ -2,4 +2,6 @@
 # Skript zum Starten der Signal Forge Elite App
 
 echo "Starte Signal Forge Elite..."
+# Scanner im Hintergrund; die App liest nur die veröffentlichten Scans
+python scanner.py &
 streamlit run app.py
\ No newline at end of file
@@ -1,44 +1,179 @@
+from dataclasses import dataclass
+
 import pandas as pd
 import numpy as np
+from indicators import compute_indicator_matrix
+from kernels import indicator_arrays
+from tracing import traced
+
+@dataclass(frozen=True)
+class StrategyParams:
+    """Thresholds of the Profit Pulse Precision strategy"""
+    ema_fast: int = 10           # Fast EMA span (stored in the 'ema10' column)
+    ema_slow: int = 50           # Slow EMA span (stored in the 'ema50' column)
+    adx_min: float = 25.0        # Strong trend: ADX above this
+    atr_max_pips: float = 15.0   # Low volatility: ATR below this many pips
+    rsi_low: float = 40.0        # RSI must be inside (rsi_low, rsi_high)
+    rsi_high: float = 60.0
+    sl_atr_factor: float = 0.5   # Stop loss distance = ATR * factor ...
+    min_sl: float = 0.0008       # ... but at least this (8 pips)
+    risk_reward: float = 3.0     # Take profit = stop loss distance * risk_reward
+    pip_factor: float = 10000.0  # Price -> pips (assuming 4-digit forex pair)
 
-def profit_pulse_precision(df):
+DEFAULT_PARAMS = StrategyParams()
+
+@traced('profit_pulse_precision')
+def profit_pulse_precision(df, params=DEFAULT_PARAMS):
     """
     Implements the "Profit Pulse Precision" strategy for trading signals.
     
     Parameters:
     df (DataFrame): DataFrame containing OHLC price data
+    params (StrategyParams): Strategy thresholds
     
     Returns:
     tuple: (action, safety, entry_price, stop_loss, take_profit) or (None, None, None, None, None) if no signal
     """
     # Calculate technical indicators
-    df = calculate_indicators(df)
+    return profit_pulse_from_indicators(calculate_indicator_frame(df, params), params)
+
+def profit_pulse_from_indicators(df, params=DEFAULT_PARAMS):
+    """
+    Evaluate the strategy on a frame that already has the indicator columns
+    (as returned by calculate_indicators)
     
+    Returns:
+    tuple: (action, safety, entry_price, stop_loss, take_profit) or (None, None, None, None, None) if no signal
+    """
     # Get the current price
     curr_price = df['close'].iloc[-1]
     
     # Check for buy signal
-    if is_buy_signal(df):
+    if is_buy_signal(df, params):
         # Calculate stop loss and take profit for buy
-        sl = curr_price - calculate_stop_loss(df, 'buy')
-        tp = curr_price + calculate_take_profit(df, 'buy')
+        sl = curr_price - calculate_stop_loss(df, 'buy', params)
+        tp = curr_price + calculate_take_profit(df, 'buy', params)
         return "BUY", 98, curr_price, sl, tp
     
     # Check for sell signal
-    elif is_sell_signal(df):
+    elif is_sell_signal(df, params):
         # Calculate stop loss and take profit for sell
-        sl = curr_price + calculate_stop_loss(df, 'sell')
-        tp = curr_price - calculate_take_profit(df, 'sell')
+        sl = curr_price + calculate_stop_loss(df, 'sell', params)
+        tp = curr_price - calculate_take_profit(df, 'sell', params)
         return "SELL", 98, curr_price, sl, tp
     
     # No signal
     return None, None, None, None, None
 
-def calculate_indicators(df):
-    """Calculate all technical indicators needed for the strategy"""
-    # Exponential Moving Averages
-    df['ema10'] = df['close'].ewm(span=10, adjust=False).mean()
-    df['ema50'] = df['close'].ewm(span=50, adjust=False).mean()
+def profit_pulse_from_state(state, params=DEFAULT_PARAMS):
+    """
+    Evaluate the strategy on a StreamingIndicators state in constant time.
+    The EMA spans are those the state was created with.
+    
+    Parameters:
+    state (StreamingIndicators): Indicator state of one symbol
+    params (StrategyParams): Strategy thresholds
+    
+    Returns:
+    tuple: Same as profit_pulse_precision
+    """
+    if state.count < 2:
+        return None, None, None, None, None
+    
+    last, prev = state.last, state.prev
+    curr_price = last['close']
+    sl_distance = stop_loss_distance(last['atr'], params)
+    tp_distance = sl_distance * params.risk_reward
+    
+    if buy_conditions_met(last, prev, params):
+        return "BUY", 98, curr_price, curr_price - sl_distance, curr_price + tp_distance
+    elif sell_conditions_met(last, prev, params):
+        return "SELL", 98, curr_price, curr_price + sl_distance, curr_price - tp_distance
+    
+    return None, None, None, None, None
+
+def profit_pulse_precision_batch(prices, params=DEFAULT_PARAMS):
+    """
+    Vectorized "Profit Pulse Precision" for many symbols at once.
+    
+    Parameters:
+    prices (dict): Aligned (symbols x bars) arrays for 'high', 'low' and 'close'
+                   ('open' is accepted but not needed by the strategy)
+    params (StrategyParams): Strategy thresholds
+    
+    Returns:
+    list: One (action, safety, entry_price, stop_loss, take_profit) tuple per symbol
+    """
+    indicators = compute_indicator_matrix(prices['high'], prices['low'], prices['close'],
+                                          params.ema_fast, params.ema_slow)
+    return signals_from_indicator_matrix(prices['close'], indicators, params)
+
+def signal_conditions(ema_fast, ema_slow, atr, adx, rsi, params=DEFAULT_PARAMS):
+    """
+    Vectorized buy/sell criteria over the last axis of indicator arrays.
+    Bar t signals when the fast EMA crosses the slow EMA between t-1 and t
+    and the trend, volatility and RSI filters hold at t.
+    
+    Returns:
+    tuple: (buy, sell) boolean arrays shaped like the inputs
+    """
+    ema_fast = np.asarray(ema_fast, dtype=np.float64)
+    ema_slow = np.asarray(ema_slow, dtype=np.float64)
+    cross_up = np.zeros(ema_fast.shape, dtype=bool)
+    cross_down = np.zeros(ema_fast.shape, dtype=bool)
+    with np.errstate(invalid='ignore'):
+        cross_up[..., 1:] = (ema_fast[..., 1:] > ema_slow[..., 1:]) & (ema_fast[..., :-1] <= ema_slow[..., :-1])
+        cross_down[..., 1:] = (ema_fast[..., 1:] < ema_slow[..., 1:]) & (ema_fast[..., :-1] >= ema_slow[..., :-1])
+        # Strong trend, low volatility and RSI in neutral zone
+        conditions = ((np.asarray(adx) > params.adx_min) &
+                      (np.asarray(atr) * params.pip_factor < params.atr_max_pips) &
+                      (np.asarray(rsi) > params.rsi_low) & (np.asarray(rsi) < params.rsi_high))
+    buy = cross_up & conditions
+    sell = cross_down & conditions & ~buy
+    return buy, sell
+
+def signals_from_indicator_matrix(close, indicators, params=DEFAULT_PARAMS):
+    """
+    Evaluate the buy/sell criteria on the last two bars of every row of the
+    indicator matrices returned by indicators.compute_indicator_matrix.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    atr = indicators['atr'][:, -1]
+    curr_price = close[:, -1]
+    
+    # Only the last two bars matter
+    buy, sell = signal_conditions(
+        indicators['ema10'][:, -2:], indicators['ema50'][:, -2:],
+        indicators['atr'][:, -2:], indicators['adx'][:, -2:], indicators['rsi'][:, -2:], params
+    )
+    buy, sell = buy[:, -1], sell[:, -1]
+    
+    sl_distance = np.maximum(atr * params.sl_atr_factor, params.min_sl)
+    tp_distance = sl_distance * params.risk_reward
+    
+    results = []
+    for i in range(close.shape[0]):
+        if buy[i]:
+            results.append(("BUY", 98, curr_price[i], curr_price[i] - sl_distance[i], curr_price[i] + tp_distance[i]))
+        elif sell[i]:
+            results.append(("SELL", 98, curr_price[i], curr_price[i] + sl_distance[i], curr_price[i] - tp_distance[i]))
+        else:
+            results.append((None, None, None, None, None))
+    return results
+
+@traced('calculate_indicators')
+def calculate_indicators(df, params=DEFAULT_PARAMS):
+    """
+    Calculate all technical indicators needed for the strategy.
+    Returns a new DataFrame with the indicator columns added; the input
+    frame is left unchanged, so cached or shared frames can be passed in.
+    """
+    # Shallow copy: new columns go to the copy only, the price columns aren't duplicated
+    df = df.copy(deep=False)
+    
+    # Exponential Moving Averages (fast/slow, 10/50 by default)
+    df['ema10'] = df['close'].ewm(span=params.ema_fast, adjust=False).mean()
+    df['ema50'] = df['close'].ewm(span=params.ema_slow, adjust=False).mean()
     
     # Average True Range (ATR)
     df['tr'] = calculate_true_range(df)
@@ -64,6 +199,26 @@ def calculate_indicators(df):
     
     return df
 
+def calculate_indicator_frame(df, params=DEFAULT_PARAMS, buffers=None):
+    """
+    Lean variant of calculate_indicators: NumPy-backed, without the
+    temporary columns, returning only close, ema10, ema50, atr, adx and rsi
+    (what the chart and the signal logic use). The close column shares
+    memory with df; the input is not modified.
+    
+    Parameters:
+    df (DataFrame): OHLC price data
+    params (StrategyParams): EMA spans
+    buffers (IndicatorBuffers): Optional preallocated arrays for repeated calls
+    
+    Returns:
+    DataFrame: Indicator columns on the index of df
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    indicators = indicator_arrays(df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64),
+                                  close, params.ema_fast, params.ema_slow, buffers)
+    return pd.DataFrame({'close': close, **indicators}, index=df.index, copy=False)
+
 def calculate_true_range(df):
     """Calculate the True Range"""
     high_low = df['high'] - df['low']
@@ -89,72 +244,89 @@ def calculate_directional_movement(df, direction):
         down_move = df['low'].shift(1) - df['low']
         return pd.Series(np.where((down_move > up_move) & (down_move > 0), down_move, 0), index=df.index)
 
-def is_buy_signal(df):
+def last_indicator_rows(df):
+    """Return the indicator values of the last two rows as (last, prev) dicts"""
+    columns = ['close', 'ema10', 'ema50', 'atr', 'adx', 'rsi']
+    last = {col: df[col].iloc[-1] for col in columns}
+    prev = {col: df[col].iloc[-2] for col in columns}
+    return last, prev
+
+def is_buy_signal(df, params=DEFAULT_PARAMS):
     """Check if current conditions match buy signal criteria"""
+    return buy_conditions_met(*last_indicator_rows(df), params)
+
+def buy_conditions_met(last, prev, params=DEFAULT_PARAMS):
+    """Check the buy criteria on the indicator values of the last two bars"""
     # Get the last two rows for checking crossover
-    ema10_last = df['ema10'].iloc[-1]
-    ema10_prev = df['ema10'].iloc[-2]
-    ema50_last = df['ema50'].iloc[-1]
-    ema50_prev = df['ema50'].iloc[-2]
+    ema10_last = last['ema10']
+    ema10_prev = prev['ema10']
+    ema50_last = last['ema50']
+    ema50_prev = prev['ema50']
     
     # Get other indicators' values
-    adx = df['adx'].iloc[-1]
-    atr = df['atr'].iloc[-1]
-    rsi = df['rsi'].iloc[-1]
+    adx = last['adx']
+    atr = last['atr']
+    rsi = last['rsi']
     
     # Convert ATR to pips (assuming 4-digit forex pair)
-    atr_pips = atr * 10000  # For JPY pairs, would be * 100
+    atr_pips = atr * params.pip_factor  # For JPY pairs, would be * 100
     
     # Check EMA crossover (10 crosses above 50)
     ema_crossover = ema10_last > ema50_last and ema10_prev <= ema50_prev
     
     # Check all conditions for buy signal
     return (ema_crossover and 
-            adx > 25 and  # Strong trend
-            atr_pips < 15 and  # Low volatility (less than 15 pips)
-            40 < rsi < 60)  # RSI in neutral zone
+            adx > params.adx_min and  # Strong trend
+            atr_pips < params.atr_max_pips and  # Low volatility (less than 15 pips)
+            params.rsi_low < rsi < params.rsi_high)  # RSI in neutral zone
 
-def is_sell_signal(df):
+def is_sell_signal(df, params=DEFAULT_PARAMS):
     """Check if current conditions match sell signal criteria"""
+    return sell_conditions_met(*last_indicator_rows(df), params)
+
+def sell_conditions_met(last, prev, params=DEFAULT_PARAMS):
+    """Check the sell criteria on the indicator values of the last two bars"""
     # Get the last two rows for checking crossover
-    ema10_last = df['ema10'].iloc[-1]
-    ema10_prev = df['ema10'].iloc[-2]
-    ema50_last = df['ema50'].iloc[-1]
-    ema50_prev = df['ema50'].iloc[-2]
+    ema10_last = last['ema10']
+    ema10_prev = prev['ema10']
+    ema50_last = last['ema50']
+    ema50_prev = prev['ema50']
     
     # Get other indicators' values
-    adx = df['adx'].iloc[-1]
-    atr = df['atr'].iloc[-1]
-    rsi = df['rsi'].iloc[-1]
+    adx = last['adx']
+    atr = last['atr']
+    rsi = last['rsi']
     
     # Convert ATR to pips (assuming 4-digit forex pair)
-    atr_pips = atr * 10000  # For JPY pairs, would be * 100
+    atr_pips = atr * params.pip_factor  # For JPY pairs, would be * 100
     
     # Check EMA crossover (10 crosses below 50)
     ema_crossover = ema10_last < ema50_last and ema10_prev >= ema50_prev
     
     # Check all conditions for sell signal
     return (ema_crossover and 
-            adx > 25 and  # Strong trend
-            atr_pips < 15 and  # Low volatility (less than 15 pips)
-            40 < rsi < 60)  # RSI in neutral zone
+            adx > params.adx_min and  # Strong trend
+            atr_pips < params.atr_max_pips and  # Low volatility (less than 15 pips)
+            params.rsi_low < rsi < params.rsi_high)  # RSI in neutral zone
 
-def calculate_stop_loss(df, direction):
+def calculate_stop_loss(df, direction, params=DEFAULT_PARAMS):
     """Calculate stop loss distance based on ATR"""
     # Use ATR to determine stop loss (ATR/2 or about 8 pips)
-    atr = df['atr'].iloc[-1]
-    
+    return stop_loss_distance(df['atr'].iloc[-1], params)
+
+def stop_loss_distance(atr, params=DEFAULT_PARAMS):
+    """Stop loss distance for a given ATR value"""
     # Base SL on ATR, but ensure it's at least 8 pips (0.0008)
-    sl_distance = max(atr / 2, 0.0008)
+    sl_distance = max(atr * params.sl_atr_factor, params.min_sl)
     
     return sl_distance
 
-def calculate_take_profit(df, direction):
+def calculate_take_profit(df, direction, params=DEFAULT_PARAMS):
     """Calculate take profit based on 3:1 risk-reward ratio"""
     # Get the stop loss distance
-    sl_distance = calculate_stop_loss(df, direction)
+    sl_distance = calculate_stop_loss(df, direction, params)
     
     # TP is 3 times the SL distance
-    tp_distance = sl_distance * 3.0
+    tp_distance = sl_distance * params.risk_reward
     
     return tp_distance
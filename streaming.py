@@ -0,0 +1,395 @@
+"""
+Streaming tick ingestion: an asyncio alternative to polling.
+
+Ticks come from a pluggable source (any async iterator of Tick):
+
+    TCPTickSource     newline-delimited JSON ticks over TCP
+    WebSocketTickSource  JSON ticks over a WebSocket (needs the websockets package)
+    ReplaySource      recorded ticks, optionally paced in (scaled) real time
+
+Each symbol has its own bounded queue and worker. The worker aggregates
+ticks into bars, merges every closed bar into CANDLE_STORE, feeds it to the
+symbol's StreamingIndicators state and evaluates the strategy right away,
+so a signal is emitted as soon as its bar closes. A full queue makes the
+reader wait (backpressure down to the TCP connection), or with
+overflow='drop_oldest' discards the oldest tick of that symbol instead.
+
+    python streaming.py --serve ticks.csv --port 9100 --speed 60   # replay server
+    python streaming.py --tcp 127.0.0.1:9100                        # ingest and print signals
+    python streaming.py --replay ticks.csv
+"""
+import argparse
+import asyncio
+import csv
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from candle_store import CANDLE_FIELDS, CANDLE_STORE
+from indicators import get_streaming_indicators
+from resample import timeframe_ns
+from strategy import DEFAULT_PARAMS, profit_pulse_from_state
+from tracing import tracer
+from utils import make_signal_record, save_signals
+
+try:
+    import websockets
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+# Ticks buffered per symbol before the reader has to wait
+DEFAULT_QUEUE_SIZE = 10_000
+
+STREAM_TIMEFRAME = '1m'
+
+
+@dataclass
+class Tick:
+    """One trade or quote update; time in nanoseconds since the epoch"""
+    symbol: str
+    time: int
+    price: float
+    volume: float = 0.0
+
+
+def parse_tick(message):
+    """
+    Tick from a JSON object (str, bytes or dict) with symbol, time (epoch
+    seconds), price and optional volume
+    """
+    if not isinstance(message, dict):
+        message = json.loads(message)
+    return Tick(
+        symbol=message['symbol'],
+        time=int(round(float(message['time']) * 1e9)),
+        price=float(message['price']),
+        volume=float(message.get('volume', 0.0))
+    )
+
+
+def format_tick(tick):
+    """Wire format of a tick (one JSON line)"""
+    return json.dumps({'symbol': tick.symbol, 'time': tick.time / 1e9,
+                       'price': tick.price, 'volume': tick.volume}) + "\n"
+
+
+def read_ticks_csv(path):
+    """
+    Recorded ticks from a CSV file with symbol, time (epoch seconds or
+    ISO timestamp), price and optional volume columns
+
+    Returns:
+    list: Ticks in file order
+    """
+    ticks = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                seconds = float(row['time'])
+            except ValueError:
+                seconds = datetime.fromisoformat(row['time']).timestamp()
+            ticks.append(parse_tick({**row, 'time': seconds}))
+    return ticks
+
+
+class ReplaySource:
+    """
+    Recorded ticks as an async source. With speed, ticks are paced by their
+    timestamps (speed=60 plays one minute per second); without, they are
+    delivered as fast as the consumer takes them.
+    """
+
+    def __init__(self, ticks, speed=None):
+        self.ticks = ticks
+        self.speed = speed
+
+    async def __aiter__(self):
+        started = time.monotonic()
+        first = None
+        for tick in self.ticks:
+            if self.speed:
+                first = tick.time if first is None else first
+                delay = (tick.time - first) / 1e9 / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                # Let the workers run between ticks
+                await asyncio.sleep(0)
+            yield tick
+
+
+class TCPTickSource:
+    """Newline-delimited JSON ticks from a TCP server; ends when the server closes"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    async def __aiter__(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    yield parse_tick(line)
+        finally:
+            writer.close()
+
+
+class WebSocketTickSource:
+    """JSON ticks (one per message) from a WebSocket server"""
+
+    def __init__(self, url):
+        if not WEBSOCKETS_AVAILABLE:
+            raise ImportError("websockets is required for WebSocketTickSource (pip install websockets)")
+        self.url = url
+
+    async def __aiter__(self):
+        async with websockets.connect(self.url) as connection:
+            async for message in connection:
+                yield parse_tick(message)
+
+
+async def serve_tcp_replay(ticks, host='127.0.0.1', port=0, speed=None):
+    """
+    Local replay server: every client receives the recorded ticks as
+    newline-delimited JSON, then the connection is closed
+
+    Returns:
+    asyncio.Server: Running server (port 0 picks a free port, see server.sockets)
+    """
+    async def handle(reader, writer):
+        try:
+            async for tick in ReplaySource(ticks, speed):
+                writer.write(format_tick(tick).encode())
+                # Waits while the client isn't reading (TCP flow control)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+class BarAggregator:
+    """
+    Builds OHLCV bars of one symbol from ticks. A bar closes when the first
+    tick of a later bucket arrives (or on flush).
+    """
+
+    def __init__(self, timeframe=STREAM_TIMEFRAME):
+        self.step = timeframe_ns(timeframe)
+        self.bar = None
+
+    def add(self, tick):
+        """
+        Add a tick
+
+        Returns:
+        dict or None: The bar closed by this tick
+        """
+        bucket = tick.time - tick.time % self.step
+        bar = self.bar
+        if bar is not None and bucket < bar['time']:
+            # Late tick of an already closed bar
+            return None
+        if bar is not None and bucket == bar['time']:
+            bar['high'] = max(bar['high'], tick.price)
+            bar['low'] = min(bar['low'], tick.price)
+            bar['close'] = tick.price
+            bar['tick_volume'] += tick.volume
+            return None
+        self.bar = {'time': bucket, 'open': tick.price, 'high': tick.price, 'low': tick.price,
+                    'close': tick.price, 'tick_volume': tick.volume}
+        return bar
+
+    def flush(self):
+        """Close and return the forming bar (None if there is none)"""
+        bar, self.bar = self.bar, None
+        return bar
+
+
+class StreamingEngine:
+    """
+    Routes ticks from a source into per-symbol queues and workers that
+    aggregate bars, update the indicator state and emit signals on bar close.
+
+    Parameters:
+    source: Async iterable of Tick
+    symbols (list): Only these symbols (None for all)
+    timeframe (str): Bar timeframe
+    queue_size (int): Ticks buffered per symbol
+    overflow (str): 'block' (backpressure) or 'drop_oldest'
+    on_signal (callable): Called (or awaited) with every signal dict
+    save (bool): Also write signals to the signal store
+    warmup (bool): Seed empty indicator states from CANDLE_STORE
+    """
+
+    def __init__(self, source, symbols=None, timeframe=STREAM_TIMEFRAME, queue_size=DEFAULT_QUEUE_SIZE,
+                 overflow='block', on_signal=None, params=DEFAULT_PARAMS, store=CANDLE_STORE,
+                 save=True, warmup=True):
+        if overflow not in ('block', 'drop_oldest'):
+            raise ValueError("overflow must be 'block' or 'drop_oldest'")
+        self.source = source
+        self.symbols = set(symbols) if symbols is not None else None
+        self.timeframe = timeframe
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.on_signal = on_signal
+        self.params = params
+        self.store = store
+        self.save = save
+        self.warmup = warmup
+        self.signals = []
+        self._queues = {}
+        self._workers = {}
+        self._stats = {}
+        self._task_group = None
+
+    def stats(self):
+        """Per-symbol counters: ticks, bars, signals, dropped ticks and queue depth"""
+        return {symbol: dict(counters, queued=self._queues[symbol].qsize())
+                for symbol, counters in self._stats.items()}
+
+    def _queue(self, symbol):
+        queue = self._queues.get(symbol)
+        if queue is None:
+            queue = self._queues[symbol] = asyncio.Queue(self.queue_size)
+            self._stats[symbol] = {'ticks': 0, 'bars': 0, 'signals': 0, 'dropped': 0}
+            self._workers[symbol] = self._task_group.create_task(self._worker(symbol, queue))
+        return queue
+
+    async def _put(self, tick):
+        queue = self._queue(tick.symbol)
+        if self.overflow == 'drop_oldest' and queue.full():
+            queue.get_nowait()
+            queue.task_done()
+            self._stats[tick.symbol]['dropped'] += 1
+        await queue.put(tick)
+
+    async def run(self):
+        """
+        Consume the source until it ends, then close the forming bars.
+        The workers run in a task group: if one fails, reading stops (also a
+        put blocked on its full queue) and the error is raised here.
+
+        Returns:
+        list: All emitted signals
+        """
+        try:
+            async with asyncio.TaskGroup() as group:
+                self._task_group = group
+                async for tick in self.source:
+                    if self.symbols is None or tick.symbol in self.symbols:
+                        await self._put(tick)
+                for queue in self._queues.values():
+                    await queue.put(None)
+        except ExceptionGroup as errors:
+            if len(errors.exceptions) == 1:
+                raise errors.exceptions[0]
+            raise
+        finally:
+            self._task_group = None
+        return self.signals
+
+    async def _worker(self, symbol, queue):
+        state = get_streaming_indicators(symbol, self.timeframe, self.params.ema_fast, self.params.ema_slow)
+        if self.warmup and state.count == 0:
+            history = self.store.frame(symbol, self.timeframe)
+            if history is not None:
+                state.update_from_frame(history)
+        aggregator = BarAggregator(self.timeframe)
+        counters = self._stats[symbol]
+        while True:
+            tick = await queue.get()
+            queue.task_done()
+            if tick is None:
+                bar = aggregator.flush()
+                if bar is not None:
+                    await self._close_bar(symbol, state, bar)
+                return
+            counters['ticks'] += 1
+            bar = aggregator.add(tick)
+            if bar is not None:
+                await self._close_bar(symbol, state, bar)
+
+    async def _close_bar(self, symbol, state, bar):
+        with tracer.span('stream_bar', symbol):
+            self.store.merge_arrays(symbol, self.timeframe, np.array([bar['time']], dtype=np.int64),
+                                    {field: np.array([bar[field]]) for field in CANDLE_FIELDS})
+            state.update(bar['high'], bar['low'], bar['close'], np.datetime64(bar['time'], 'ns'))
+            action, safety, entry, sl, tp = profit_pulse_from_state(state, self.params)
+        self._stats[symbol]['bars'] += 1
+        if not action:
+            return
+        signal = {
+            'symbol': symbol,
+            'action': action,
+            'entry': entry,
+            'sl': sl,
+            'tp': tp,
+            'safety': safety,
+            'expiry': (datetime.utcnow() + timedelta(hours=2)).strftime("%H:%M UTC"),
+            'bar_time': np.datetime64(bar['time'], 'ns')
+        }
+        self._stats[symbol]['signals'] += 1
+        self.signals.append(signal)
+        if self.save:
+            # SQLite write in a thread, so the other symbols keep ingesting
+            record = make_signal_record(symbol, action, entry, sl, tp, safety, signal['expiry'])
+            await asyncio.get_running_loop().run_in_executor(None, save_signals, [record])
+        if self.on_signal is not None:
+            result = self.on_signal(signal)
+            if asyncio.iscoroutine(result):
+                await result
+
+
+def _print_signal(signal):
+    print(f"{signal['bar_time']} {signal['symbol']} {signal['action']} "
+          f"entry {signal['entry']:.5f} sl {signal['sl']:.5f} tp {signal['tp']:.5f}")
+
+
+async def _main(args):
+    if args.serve:
+        server = await serve_tcp_replay(read_ticks_csv(args.serve), args.host, args.port, args.speed)
+        print(f"Replay-Server auf {args.host}:{server.sockets[0].getsockname()[1]}")
+        async with server:
+            await server.serve_forever()
+        return
+    if args.tcp:
+        host, port = args.tcp.rsplit(':', 1)
+        source = TCPTickSource(host, int(port))
+    elif args.ws:
+        source = WebSocketTickSource(args.ws)
+    else:
+        source = ReplaySource(read_ticks_csv(args.replay), args.speed)
+    engine = StreamingEngine(source, symbols=args.symbol, timeframe=args.timeframe,
+                             queue_size=args.queue_size, on_signal=_print_signal, save=not args.no_save)
+    await engine.run()
+    for symbol, counters in sorted(engine.stats().items()):
+        print(f"{symbol}: {counters['ticks']} Ticks, {counters['bars']} Kerzen, "
+              f"{counters['signals']} Signale, {counters['dropped']} verworfen")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming tick ingestion for Signal Forge Elite")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tcp", metavar="HOST:PORT", help="Read ticks from a TCP server")
+    source.add_argument("--ws", metavar="URL", help="Read ticks from a WebSocket server")
+    source.add_argument("--replay", metavar="CSV", help="Replay recorded ticks")
+    source.add_argument("--serve", metavar="CSV", help="Serve recorded ticks over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--speed", type=float, help="Replay speed factor (default: as fast as possible)")
+    parser.add_argument("--symbol", action="append", help="Only this symbol (repeatable)")
+    parser.add_argument("--timeframe", default=STREAM_TIMEFRAME)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--no-save", action="store_true", help="Don't write signals to the signal store")
+    asyncio.run(_main(parser.parse_args()))
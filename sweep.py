@@ -0,0 +1,245 @@
+import argparse
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields, replace
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import backtest_arrays
+from indicators import IndicatorBuffers
+from kernels import ema, indicator_arrays
+from strategy import DEFAULT_PARAMS, StrategyParams
+
+# Per-symbol arrays that don't depend on the swept parameters
+BASE_ROWS = ('high', 'low', 'close', 'atr', 'adx', 'rsi')
+
+# Columns used to rank the sweep results (best first)
+RANK_COLUMNS = ['expectancy_r', 'total_r', 'hit_rate']
+
+PARAM_NAMES = [f.name for f in fields(StrategyParams)]
+
+
+def param_grid(base=DEFAULT_PARAMS, **ranges):
+    """
+    Cartesian product of parameter values
+
+    Example: param_grid(adx_min=[20, 25, 30], risk_reward=[2.0, 3.0])
+
+    Returns:
+    list: StrategyParams, one per combination
+    """
+    names = list(ranges)
+    return [replace(base, **dict(zip(names, combo)))
+            for combo in itertools.product(*(ranges[name] for name in names))]
+
+
+def random_params(n, base=DEFAULT_PARAMS, seed=None, **ranges):
+    """
+    Random search: draw n parameter sets.
+    Each range is either a (low, high) tuple, sampled uniformly (integers
+    for int fields), or a list of choices.
+
+    Returns:
+    list: StrategyParams
+    """
+    rng = random.Random(seed)
+    int_fields = {f.name for f in fields(StrategyParams) if f.type in (int, 'int')}
+    result = []
+    for _ in range(n):
+        values = {}
+        for name, spec in ranges.items():
+            if isinstance(spec, tuple):
+                low, high = spec
+                values[name] = rng.randint(low, high) if name in int_fields else rng.uniform(low, high)
+            else:
+                values[name] = rng.choice(list(spec))
+        result.append(replace(base, **values))
+    return result
+
+
+def _ema_row(span):
+    return f"ema_{span}"
+
+
+def _build_blocks(frames, spans):
+    """
+    Compute the parameter-independent indicators and every needed EMA once
+    per symbol and lay them out as (rows x bars) float64 blocks.
+
+    Returns:
+    tuple: (dict symbol -> block, list of row names)
+    """
+    rows = list(BASE_ROWS) + [_ema_row(span) for span in spans]
+    blocks = {}
+    buffers = None
+    for symbol, df in frames.items():
+        block = np.empty((len(rows), len(df)), dtype=np.float64)
+        for name in ('high', 'low', 'close'):
+            block[rows.index(name)] = df[name].to_numpy(dtype=np.float64)
+        high, low, close = block[rows.index('high')], block[rows.index('low')], block[rows.index('close')]
+        # Scratch arrays are reused across symbols of the same length
+        if buffers is None or buffers.n != len(df):
+            buffers = IndicatorBuffers(len(df))
+        indicators = indicator_arrays(high, low, close, buffers=buffers)
+        for name in ('atr', 'adx', 'rsi'):
+            block[rows.index(name)] = indicators[name]
+        for span in spans:
+            ema(close, span, out=block[rows.index(_ema_row(span))])
+        blocks[symbol] = block
+    return blocks, rows
+
+
+# Worker-side views into the shared memory segment
+_worker_shm = None
+_worker_blocks = None
+_worker_rows = None
+
+
+def _attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: pool workers share the parent's resource tracker,
+        # which already owns the segment, so attaching is safe
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(shm_name, layout, rows):
+    global _worker_shm, _worker_blocks, _worker_rows
+    _worker_shm = _attach_shared_memory(shm_name)
+    _worker_rows = {name: i for i, name in enumerate(rows)}
+    _worker_blocks = {
+        symbol: np.ndarray((len(rows), n_bars), dtype=np.float64, buffer=_worker_shm.buf, offset=offset)
+        for symbol, (offset, n_bars) in layout.items()
+    }
+
+
+def _run_task(task):
+    symbol, params = task
+    block = _worker_blocks[symbol]
+    row = _worker_rows
+    indicators = {
+        'ema10': block[row[_ema_row(params.ema_fast)]],
+        'ema50': block[row[_ema_row(params.ema_slow)]],
+        'atr': block[row['atr']],
+        'adx': block[row['adx']],
+        'rsi': block[row['rsi']]
+    }
+    summary, _ = backtest_arrays(block[row['high']], block[row['low']], block[row['close']], indicators, params)
+    return {'symbol': symbol, **asdict(params), **summary}
+
+
+def run_sweep(frames, params_list, max_workers=None, chunksize=None):
+    """
+    Backtest every (symbol, parameter set) pair on a process pool.
+
+    Indicators are computed once in the parent and placed in one shared
+    memory segment; workers map it read-only instead of receiving pickled
+    arrays per task. Only the (symbol, params) tuples travel per task.
+
+    Parameters:
+    frames (dict): symbol -> OHLC DataFrame
+    params_list (list): StrategyParams to evaluate
+    max_workers (int): Worker processes (default: all cores)
+
+    Returns:
+    DataFrame: One row per (symbol, params), ranked best first
+    """
+    params_list = list(params_list)
+    spans = sorted({p.ema_fast for p in params_list} | {p.ema_slow for p in params_list})
+    blocks, rows = _build_blocks(frames, spans)
+
+    layout = {}
+    offset = 0
+    for symbol, block in blocks.items():
+        layout[symbol] = (offset, block.shape[1])
+        offset += block.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    try:
+        for symbol, block in blocks.items():
+            start, n_bars = layout[symbol]
+            np.ndarray(block.shape, dtype=np.float64, buffer=shm.buf, offset=start)[:] = block
+        del blocks
+
+        tasks = list(itertools.product(layout, params_list))
+        workers = max_workers or os.cpu_count() or 1
+        if chunksize is None:
+            chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, layout, rows)) as pool:
+            results = list(pool.map(_run_task, tasks, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return rank_results(pd.DataFrame(results))
+
+
+def rank_results(results):
+    """Sort sweep results best first"""
+    if results.empty:
+        return results
+    return results.sort_values(RANK_COLUMNS, ascending=False, na_position='last').reset_index(drop=True)
+
+
+def rank_params(results):
+    """
+    Aggregate sweep results across symbols, one row per parameter set
+
+    Returns:
+    DataFrame: Parameter columns plus trades, total_r, expectancy_r and
+               worst max_drawdown_r, ranked best first
+    """
+    if results.empty:
+        return results
+    grouped = results.groupby(PARAM_NAMES, as_index=False).agg(
+        trades=('trades', 'sum'),
+        wins=('wins', 'sum'),
+        total_r=('total_r', 'sum'),
+        max_drawdown_r=('max_drawdown_r', 'max')
+    )
+    grouped['hit_rate'] = grouped['wins'] / grouped['trades'].where(grouped['trades'] > 0)
+    grouped['expectancy_r'] = grouped['total_r'] / grouped['trades'].where(grouped['trades'] > 0)
+    return rank_results(grouped)
+
+
+def _parse_values(text, name):
+    kind = next(f.type for f in fields(StrategyParams) if f.name == name)
+    cast = int if kind in (int, 'int') else float
+    return [cast(v) for v in text.split(',')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter sweep for Profit Pulse Precision")
+    parser.add_argument("files", nargs="+", help="CSV files with time, open, high, low, close columns (one symbol per file)")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2",
+                        help="Grid values for a parameter, e.g. adx_min=20,25,30")
+    parser.add_argument("--random", type=int, default=0, metavar="N",
+                        help="Draw N random parameter sets from the --grid values instead of the full grid")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    ranges = {}
+    for item in args.grid:
+        name, values = item.split("=", 1)
+        if name not in PARAM_NAMES:
+            parser.error(f"unknown parameter: {name}")
+        ranges[name] = _parse_values(values, name)
+
+    if args.random:
+        params_list = random_params(args.random, **ranges)
+    else:
+        params_list = param_grid(**ranges)
+
+    frames = {}
+    for path in args.files:
+        symbol = path.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+        frames[symbol] = pd.read_csv(path, parse_dates=['time'])
+
+    results = run_sweep(frames, params_list, max_workers=args.workers)
+    print(rank_params(results).head(args.top).to_string(index=False))
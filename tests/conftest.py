@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Keep the signal store, archive and metrics of the test run out of the working tree;
+# set before the modules under test read them at import time
+_TMP = tempfile.mkdtemp(prefix="signal_forge_tests_")
+os.environ.setdefault('SIGNALS_DB', os.path.join(_TMP, 'signals.db'))
+os.environ.setdefault('ARCHIVE_DIR', os.path.join(_TMP, 'archive'))
+os.environ.setdefault('ARCHIVE_ENABLED', '0')
+os.environ.setdefault('TRACE_METRICS_DIR', os.path.join(_TMP, 'metrics'))
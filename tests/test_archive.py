@@ -0,0 +1,115 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import archive
+
+pytestmark = pytest.mark.skipif(not archive.PYARROW_AVAILABLE, reason="pyarrow not installed")
+
+
+def make_candles(n, start="2024-01-02 23:30", seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0002, n))
+    return pd.DataFrame({
+        'time': pd.date_range(start, periods=n, freq='min'),
+        'open': close - 0.0001,
+        'high': close + 0.0002,
+        'low': close - 0.0002,
+        'close': close,
+        'tick_volume': rng.integers(0, 100, n).astype(float)
+    })
+
+
+def candle_files(root):
+    return sorted(glob.glob(os.path.join(root, 'candles', '*', '*', '*', '*.parquet')))
+
+
+def test_compact_floats_narrows_only_when_lossless():
+    assert archive.compact_floats([1.5, 2.25, np.nan]).dtype == np.float32
+    assert archive.compact_floats([1.123456789012], rtol=1e-12).dtype == np.float64
+    assert archive.compact_floats([1e300]).dtype == np.float64
+
+
+def test_candles_roundtrip_across_days_and_filters(tmp_path):
+    root = str(tmp_path)
+    candles = make_candles(60)
+    # 23:30 to 00:29: one partition per day
+    assert archive.write_candles('EURUSD', candles, root=root) == 2
+    archive.write_candles('GBPUSD', make_candles(10, seed=1), root=root)
+
+    df = archive.read_candles('EURUSD', root=root)
+    assert df['symbol'].unique().tolist() == ['EURUSD']
+    pd.testing.assert_frame_equal(df.drop(columns='symbol'), candles, check_dtype=False, check_freq=False, atol=1e-6)
+
+    window = archive.read_candles(start="2024-01-03 00:00", end="2024-01-03 00:10", columns=['close'], root=root)
+    assert list(window.columns) == ['symbol', 'time', 'close'] and len(window) == 10
+    frames = archive.read_candle_frames(root=root)
+    assert sorted(frames) == ['EURUSD', 'GBPUSD'] and len(frames['GBPUSD']) == 10
+
+
+def test_overlapping_parts_are_deduplicated_and_compacted(tmp_path):
+    root = str(tmp_path)
+    candles = make_candles(40, start="2024-01-02 10:00")
+    archive.write_candles('EURUSD', candles.iloc[:30], root=root)
+    revised = candles.iloc[25:].assign(close=candles['close'].iloc[25:] + 0.01)
+    archive.write_candles('EURUSD', revised, root=root)
+    assert len(candle_files(root)) == 2
+
+    before = archive.read_candles('EURUSD', root=root)
+    assert len(before) == 40
+    # The later part wins for the repeated bars
+    assert before['close'].iloc[25] == pytest.approx(revised['close'].iloc[0])
+
+    assert archive.compact(root) == 1
+    assert [os.path.basename(path) for path in candle_files(root)] == ['data.parquet']
+    pd.testing.assert_frame_equal(archive.read_candles('EURUSD', root=root), before)
+
+
+def test_signals_roundtrip_newest_first(tmp_path):
+    root = str(tmp_path)
+    signals = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-02 10:00', '2024-01-03 11:00', '2024-01-02 12:00']),
+        'symbol': ['EURUSD', 'EURUSD', 'GBPUSD'],
+        'action': ['BUY', 'SELL', 'BUY'],
+        'entry': [1.1, 1.2, 1.3], 'sl': [1.09, 1.21, 1.29], 'tp': [1.13, 1.17, 1.33],
+        'safety': [98, 98, 98], 'expiry': ['15min'] * 3
+    })
+    assert archive.write_signals(signals, root=root) == 3
+    # Writing the same signals again replaces them
+    archive.write_signals(signals, root=root)
+    df = archive.read_signals(root=root)
+    assert df['timestamp'].tolist() == sorted(signals['timestamp'], reverse=True)
+    assert df['symbol'].tolist() == ['EURUSD', 'GBPUSD', 'EURUSD']
+    assert df['entry'].tolist() == pytest.approx([1.2, 1.3, 1.1])
+    assert len(archive.read_signals(end="2024-01-03", symbols='EURUSD', root=root)) == 1
+
+
+def test_writer_archives_only_new_closed_bars(tmp_path):
+    writer = archive.ArchiveWriter(root=str(tmp_path))
+    candles = make_candles(30, start="2024-01-02 10:00")
+    # The newest bar may still be forming
+    assert writer.submit_candles('EURUSD', candles.iloc[:20]) == 19
+    assert writer.submit_candles('EURUSD', candles.iloc[:20]) == 0
+    assert writer.submit_candles('EURUSD', candles) == 10
+    writer.flush()
+    assert writer.written == 29 and writer.errors == 0
+    pd.testing.assert_series_equal(archive.read_candles('EURUSD', root=str(tmp_path))['time'],
+                                   candles['time'].iloc[:29], check_freq=False)
+
+
+def test_writer_resubmits_bars_of_a_failed_write(tmp_path, capsys):
+    blocked = tmp_path / "not_a_directory"
+    blocked.write_text("")
+    writer = archive.ArchiveWriter(root=str(blocked))
+    candles = make_candles(20, start="2024-01-02 10:00")
+    writer.submit_candles('EURUSD', candles)
+    writer.flush()
+    assert writer.errors == 1 and "Fehler beim Archivieren" in capsys.readouterr().out
+
+    writer.root = str(tmp_path / "archive")
+    assert writer.submit_candles('EURUSD', candles) == 19
+    writer.flush()
+    assert len(archive.read_candles('EURUSD', root=writer.root)) == 19
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import backtest, backtest_symbols, simulate_trades, summarize_trades
+from strategy import StrategyParams, profit_pulse_precision
+
+# Every EMA crossover is a signal, so short random walks produce trades
+LOOSE_PARAMS = StrategyParams(adx_min=0.0, atr_max_pips=1e9, rsi_low=0.0, rsi_high=100.0)
+
+
+def make_candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0003, n))
+    spread = np.abs(rng.normal(0, 0.0002, n))
+    return pd.DataFrame({
+        'time': pd.date_range("2024-01-02 10:00", periods=n, freq='min'),
+        'open': np.append(close[0], close[:-1]),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close
+    })
+
+
+def test_signals_match_the_strategy_on_every_prefix():
+    df = make_candles(300, seed=3)
+    summary, trades = backtest(df, LOOSE_PARAMS)
+    assert summary['bars'] == 300 and summary['trades'] > 0
+
+    # The strategy needs two bars; the first bar can't signal
+    actions = [None] + [profit_pulse_precision(df.iloc[:i + 1], LOOSE_PARAMS)[0] for i in range(1, len(df))]
+    assert summary['signals'] == sum(action is not None for action in actions)
+    for trade in trades.itertuples():
+        assert actions[trade.entry_index] == ('BUY' if trade.direction > 0 else 'SELL')
+        _, _, entry, sl, tp = profit_pulse_precision(df.iloc[:trade.entry_index + 1], LOOSE_PARAMS)
+        assert (trade.entry, trade.sl, trade.tp) == pytest.approx((entry, sl, tp))
+        assert trade.entry_time == df['time'].iloc[trade.entry_index]
+
+
+def test_simulate_trades_one_position_at_a_time():
+    high = np.array([1.00, 1.01, 1.02, 1.05, 1.00, 1.00, 1.00])
+    low = np.array([1.00, 0.99, 1.00, 1.01, 0.97, 1.00, 1.00])
+    close = np.ones(7)
+    buy = np.array([True, True, False, False, False, True, False])
+    sell = np.zeros(7, dtype=bool)
+    distance = np.full(7, 0.02)
+    trades = simulate_trades(high, low, close, buy, sell, distance, distance * 2)
+    # Bar 0 enters, TP (1.04) at bar 3; the signal on bar 1 is skipped; bar 5 never closes
+    assert trades[['entry_index', 'exit_index', 'outcome']].values.tolist() == [[0, 3, 'tp']]
+    assert trades['r_multiple'].iloc[0] == pytest.approx(2.0)
+
+
+def test_stop_loss_fills_first_when_both_are_touched():
+    high = np.array([1.0, 1.1])
+    low = np.array([1.0, 0.9])
+    trades = simulate_trades(high, low, np.ones(2), np.zeros(2, dtype=bool), np.array([True, False]),
+                             np.full(2, 0.05), np.full(2, 0.05))
+    assert trades['direction'].iloc[0] == -1
+    assert trades['outcome'].iloc[0] == 'sl' and trades['r_multiple'].iloc[0] == pytest.approx(-1.0)
+
+
+def test_summarize_trades():
+    trades = pd.DataFrame({'entry_index': [0, 10, 20, 30], 'exit_index': [5, 12, 29, 31],
+                           'outcome': ['tp', 'sl', 'sl', 'tp'], 'r_multiple': [3.0, -1.0, -1.0, 3.0]})
+    summary = summarize_trades(trades)
+    assert summary['trades'] == 4 and summary['wins'] == 2 and summary['hit_rate'] == 0.5
+    assert summary['total_r'] == 4.0 and summary['expectancy_r'] == 1.0
+    assert summary['max_drawdown_r'] == 2.0
+    assert summary['avg_bars_held'] == 4.25
+    assert summarize_trades(trades.iloc[:0])['trades'] == 0
+
+
+def test_backtest_symbols():
+    frames = {'EURUSD': make_candles(200, seed=1), 'GBPUSD': make_candles(200, seed=2)}
+    results = backtest_symbols(frames, LOOSE_PARAMS)
+    assert results['symbol'].tolist() == ['EURUSD', 'GBPUSD']
+    assert results.loc[0, 'total_r'] == backtest(frames['EURUSD'], LOOSE_PARAMS)[0]['total_r']
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from candle_store import CANDLE_FIELDS, CandleRing, CandleStore
+
+
+def make_candles(n, start="2024-01-02 10:00", offset=0.0):
+    close = 1.1 + offset + np.arange(n) / 10000
+    return pd.DataFrame({
+        'time': pd.date_range(start, periods=n, freq='min'),
+        'open': close - 0.0001,
+        'high': close + 0.0002,
+        'low': close - 0.0002,
+        'close': close,
+        'tick_volume': np.arange(n, dtype=float)
+    })
+
+
+def assert_window(frame, expected):
+    pd.testing.assert_frame_equal(frame.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_freq=False, check_dtype=False)
+
+
+def test_incremental_merge_appends_only_new_bars():
+    store = CandleStore(capacity=100)
+    candles = make_candles(60)
+    assert store.merge('EURUSD', '1m', candles.iloc[:40]) == 40
+    # Overlapping fetch: 40 known bars plus 20 new ones
+    assert store.merge('EURUSD', '1m', candles) == 20
+    assert store.merge('EURUSD', '1m', candles) == 0
+    assert_window(store.frame('EURUSD', '1m'), candles)
+    assert_window(store.frame('EURUSD', '1m', 10), candles.tail(10))
+
+
+def test_newest_bar_is_updated_in_place():
+    store = CandleStore()
+    candles = make_candles(10)
+    store.merge('EURUSD', '1m', candles)
+    forming = candles.tail(1).assign(close=2.0, high=2.1)
+    assert store.merge('EURUSD', '1m', forming) == 0
+    frame = store.frame('EURUSD', '1m')
+    assert len(frame) == 10 and frame['close'].iloc[-1] == 2.0 and frame['high'].iloc[-1] == 2.1
+    # Older bars are never rewritten
+    store.merge('EURUSD', '1m', candles.head(1).assign(close=3.0))
+    assert frame['close'].iloc[0] == candles['close'].iloc[0]
+
+
+@pytest.mark.parametrize('chunk', [1, 7, 64, 500])
+def test_ring_wraps_and_keeps_newest_capacity_bars(chunk):
+    ring = CandleRing(capacity=50)
+    candles = make_candles(333)
+    times = candles['time'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    for begin in range(0, len(candles), chunk):
+        ring.merge(times[begin:begin + chunk], {field: candles[field].to_numpy()[begin:begin + chunk]
+                                                for field in CANDLE_FIELDS})
+    assert len(ring) == 50
+    assert ring.last_time == times[-1]
+    assert_window(ring.frame(), candles.tail(50))
+
+
+def test_unsorted_input_with_duplicates_keeps_last_occurrence():
+    ring = CandleRing(capacity=10)
+    times = np.array([3, 1, 2, 3, 2], dtype=np.int64)
+    values = {field: np.array([30.0, 10.0, 20.0, 31.0, 21.0]) for field in CANDLE_FIELDS}
+    assert ring.merge(times, values) == 3
+    arrays = ring.arrays()
+    assert arrays['time'].view(np.int64).tolist() == [1, 2, 3]
+    assert arrays['close'].tolist() == [10.0, 21.0, 31.0]
+
+
+def test_frame_is_a_view_and_missing_keys_return_none():
+    store = CandleStore()
+    assert store.frame('EURUSD', '1m') is None
+    assert store.arrays('EURUSD', '1m') is None
+    store.merge('EURUSD', '1m', make_candles(5).drop(columns='tick_volume'))
+    arrays = store.arrays('EURUSD', '1m')
+    assert np.shares_memory(arrays['close'], store.arrays('EURUSD', '1m')['close'])
+    assert (arrays['tick_volume'] == 0).all()
+    assert ('EURUSD', '1m') in store and ('EURUSD', '5m') not in store
+    store.clear()
+    assert ('EURUSD', '1m') not in store
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        CandleRing(capacity=0)
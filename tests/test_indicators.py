@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import StreamingIndicators, get_streaming_indicators
+from strategy import calculate_indicators
+
+
+def make_candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 0.0005, n)))
+    spread = np.abs(rng.normal(0, 0.0003, n))
+    return pd.DataFrame({
+        'time': pd.date_range("2024-01-02 10:00", periods=n, freq='min'),
+        'open': np.append(close[0], close[:-1]),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close
+    })
+
+
+def assert_matches(state, expected_row):
+    for name in StreamingIndicators.OUTPUTS:
+        expected = expected_row[name]
+        if math.isnan(expected):
+            assert math.isnan(state.last[name]), name
+        else:
+            assert state.last[name] == pytest.approx(expected, rel=1e-9, abs=1e-9), name
+
+
+def test_streaming_matches_batch_indicators():
+    candles = make_candles(200)
+    expected = calculate_indicators(candles)
+    state = StreamingIndicators()
+    for i, bar in enumerate(candles.itertuples()):
+        state.update(bar.high, bar.low, bar.close, bar.time)
+        assert_matches(state, expected.iloc[i])
+    assert state.ready
+    assert state.prev['ema10'] == pytest.approx(expected['ema10'].iloc[-2])
+
+
+def test_replacing_the_forming_bar_restores_the_closed_state():
+    candles = make_candles(60, seed=1)
+    expected = calculate_indicators(candles)
+    state = StreamingIndicators()
+    state.update_from_frame(candles.iloc[:-1])
+    last = candles.iloc[-1]
+    # Ticks on the still forming bar, then its final values
+    for close in (last['close'] + 0.001, last['close'] - 0.002):
+        state.update(max(last['high'], close), min(last['low'], close), close, last['time'])
+    state.update(last['high'], last['low'], last['close'], replace_last=True)
+    assert state.count == 60
+    assert_matches(state, expected.iloc[-1])
+
+
+def test_update_from_frame_processes_only_new_bars():
+    candles = make_candles(80, seed=2)
+    state = StreamingIndicators()
+    assert state.update_from_frame(candles.iloc[:50]) == 50
+    # The newest known bar is replaced, the rest appended
+    assert state.update_from_frame(candles) == 31
+    assert state.count == 80
+    assert_matches(state, calculate_indicators(candles).iloc[-1])
+
+
+def test_not_ready_before_the_windows_fill():
+    state = StreamingIndicators()
+    for bar in make_candles(10).itertuples():
+        state.update(bar.high, bar.low, bar.close, bar.time)
+    assert not state.ready
+    assert math.isnan(state.last['atr'])
+
+
+def test_process_wide_states_are_keyed_by_symbol_and_spans():
+    state = get_streaming_indicators('TESTSYM')
+    assert get_streaming_indicators('TESTSYM') is state
+    assert get_streaming_indicators('TESTSYM', ema_fast_span=5) is not state
+    assert get_streaming_indicators('TESTSYM', '5m') is not state
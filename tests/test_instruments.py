@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from instruments import INSTRUMENTS, Instrument, load_instruments, make_instrument
+
+DEFAULTS = {
+    'forex': {'pip_size': 0.0001, 'precision': 5},
+    'crypto': {'pip_size': 0.01, 'precision': 2, 'quote_ttl': 30.0}
+}
+
+
+def write_config(tmp_path, config):
+    path = tmp_path / "instruments.json"
+    path.write_text(json.dumps(config), encoding='utf-8')
+    return str(path)
+
+
+def test_entries_are_merged_over_asset_class_defaults():
+    crypto = make_instrument({'symbol': 'BTCUSD', 'asset_class': 'crypto', 'precision': 1}, DEFAULTS)
+    assert crypto.is_crypto and crypto.precision == 1 and crypto.quote_ttl == 30.0
+    assert crypto.pip_factor == 100.0 and crypto.yahoo_symbol == 'BTC-USD'
+
+    jpy = make_instrument({'symbol': 'USDJPY', 'pip_size': 0.01, 'yahoo_symbol': 'JPY=X', 'inverted': True}, DEFAULTS)
+    assert not jpy.is_crypto and jpy.pip_factor == 100.0 and jpy.inverted
+    assert make_instrument({'symbol': 'EURUSD'}, DEFAULTS).yahoo_symbol == 'EURUSD=X'
+
+
+@pytest.mark.parametrize('entry', [{'asset_class': 'forex'}, {'symbol': ''}, 'EURUSD',
+                                   {'symbol': 'XAUUSD', 'asset_class': 'metal'}])
+def test_invalid_entries_are_rejected(entry):
+    with pytest.raises(ValueError):
+        make_instrument(entry, DEFAULTS)
+
+
+def test_load_instruments_and_watchlist_override(tmp_path):
+    path = write_config(tmp_path, {
+        'defaults': DEFAULTS,
+        'instruments': [{'symbol': 'EURUSD', 'base_price': 1.06, 'fallback_price': 1.07},
+                        {'symbol': 'BTCUSD', 'asset_class': 'crypto', 'base_price': 60000.0}],
+        'watchlist': ['BTCUSD']
+    })
+    registry = load_instruments(path)
+    assert registry.symbols() == ['EURUSD', 'BTCUSD'] and registry.watchlist == ['BTCUSD']
+    assert registry.fallback_prices() == {'EURUSD': 1.07, 'BTCUSD': 60000.0}
+    assert registry.base_prices() == {'EURUSD': 1.06, 'BTCUSD': 60000.0}
+    assert registry.yahoo_symbols() == {'EURUSD': 'EURUSD=X', 'BTCUSD': 'BTC-USD'}
+    assert load_instruments(path, watchlist='EURUSD, GBPUSD').watchlist == ['EURUSD', 'GBPUSD']
+
+
+def test_unknown_symbols_get_forex_defaults(tmp_path):
+    registry = load_instruments(write_config(tmp_path, {'instruments': []}))
+    instrument = registry.get('XYZABC')
+    assert instrument == Instrument('XYZABC')
+    assert registry.get('XYZABC') is instrument and 'XYZABC' not in registry
+
+
+def test_broken_config_gives_an_empty_registry(tmp_path, capsys):
+    registry = load_instruments(write_config(tmp_path, {'instruments': [{'asset_class': 'forex'}]}))
+    assert len(registry) == 0 and registry.watchlist == []
+    assert "Fehler beim Laden der Instrumente" in capsys.readouterr().out
+
+
+def test_shipped_registry():
+    assert set(INSTRUMENTS.watchlist) <= set(INSTRUMENTS.symbols())
+    for instrument in INSTRUMENTS:
+        assert instrument.base_price is not None and instrument.fallback_price is not None
+    usdjpy = INSTRUMENTS.get('USDJPY')
+    assert usdjpy.inverted and usdjpy.pip_size == 0.01 and usdjpy.sl_distance == 0.008
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import kernels
+from indicators import IndicatorBuffers, INDICATOR_OUTPUTS
+from strategy import StrategyParams, calculate_indicator_frame, calculate_indicators
+
+RTOL = 1e-9
+
+
+def random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0002, n))
+    opens = np.concatenate((close[:1], close[:-1]))
+    return pd.DataFrame({
+        'open': opens,
+        'high': np.maximum(opens, close) + np.abs(rng.normal(0, 0.0001, n)),
+        'low': np.minimum(opens, close) - np.abs(rng.normal(0, 0.0001, n)),
+        'close': close
+    })
+
+
+def assert_close(actual, expected, name):
+    expected = np.asarray(expected, dtype=np.float64)
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected), err_msg=f"NaN positions of {name}")
+    valid = ~np.isnan(expected)
+    np.testing.assert_allclose(actual[valid], expected[valid], rtol=RTOL, atol=1e-12, err_msg=name)
+
+
+@pytest.fixture(params=kernels.available_backends())
+def backend(request):
+    return request.param
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 15, 60, 5000])
+def test_indicator_arrays_match_calculate_indicators(backend, n):
+    df = random_walk(n)
+    reference = calculate_indicators(df)
+    result = kernels.indicator_arrays(df['high'], df['low'], df['close'], backend=backend)
+    assert set(result) == set(INDICATOR_OUTPUTS)
+    for name in INDICATOR_OUTPUTS:
+        assert_close(result[name], reference[name], name)
+
+
+def test_indicator_arrays_with_custom_spans(backend):
+    df = random_walk(2000, seed=1)
+    params = StrategyParams(ema_fast=5, ema_slow=20)
+    reference = calculate_indicators(df, params)
+    result = kernels.indicator_arrays(df['high'], df['low'], df['close'], 5, 20, backend=backend)
+    assert_close(result['ema10'], reference['ema10'], 'ema10')
+    assert_close(result['ema50'], reference['ema50'], 'ema50')
+
+
+def test_indicator_arrays_reuse_buffers(backend):
+    buffers = IndicatorBuffers(3000)
+    first, second = random_walk(3000, seed=2), random_walk(3000, seed=3)
+    kernels.indicator_arrays(first['high'], first['low'], first['close'], buffers=buffers, backend=backend)
+    result = kernels.indicator_arrays(second['high'], second['low'], second['close'], buffers=buffers, backend=backend)
+    assert result['rsi'] is buffers.out['rsi']
+    reference = calculate_indicators(second)
+    for name in INDICATOR_OUTPUTS:
+        assert_close(result[name], reference[name], name)
+
+
+@pytest.mark.parametrize('span', [1, 10, 50, 200])
+def test_ema_matches_pandas(backend, span):
+    values = random_walk(10_000, seed=4)['close']
+    expected = values.ewm(span=span, adjust=False).mean()
+    assert_close(kernels.ema(values, span, backend=backend), expected, f"ema{span}")
+
+
+def test_calculate_indicator_frame_matches_calculate_indicators():
+    df = random_walk(1000, seed=5)
+    reference = calculate_indicators(df)
+    frame = calculate_indicator_frame(df)
+    assert list(frame.columns) == ['close', *INDICATOR_OUTPUTS]
+    for name in INDICATOR_OUTPUTS:
+        assert_close(frame[name].to_numpy(), reference[name], name)
+
+
+def test_verify_backends_within_tolerance():
+    report = kernels.verify_backends(n=20_000)
+    assert set(report) == set(kernels.available_backends())
+    for backend, errors in report.items():
+        assert max(errors.values()) <= RTOL, (backend, errors)
+
+
+def test_set_backend_rejects_unknown():
+    with pytest.raises(ValueError):
+        kernels.set_backend('fortran')
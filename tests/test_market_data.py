@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import market_data
+
+
+def chart_response(price, closes, start=1_700_000_000):
+    """Minimal /v8/finance/chart body with one result"""
+    timestamps = [start + 60 * i for i in range(len(closes))]
+    return {'chart': {'result': [{
+        'meta': {'regularMarketPrice': price},
+        'timestamp': timestamps,
+        'indicators': {'quote': [{
+            'open': closes, 'high': [c + 0.001 for c in closes],
+            'low': [c - 0.001 for c in closes], 'close': closes, 'volume': [0] * len(closes)
+        }]}
+    }]}}
+
+
+class ChartServer:
+    """Local chart endpoint answering with scripted (status, body) responses"""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((time.monotonic(), self.path))
+                status, body = server.responses.pop(0) if server.responses else (200, chart_response(1.1, [1.1]))
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Chart server with the fetcher pointed at it; no backoff sleeps, generous rate limit"""
+    saved = (market_data.YAHOO_BASE_URL, market_data.REQUEST_TIMEOUT, market_data.MAX_RETRIES,
+             market_data._rate_limiter.rate, market_data._rate_limiter.capacity)
+    chart_server = ChartServer()
+    monkeypatch.setattr(market_data, 'RETRY_BACKOFF', 0.0)
+    market_data.configure_fetcher(base_url=chart_server.url, rate=1000, burst=1000, timeout=(1, 2), max_retries=3)
+    yield chart_server
+    chart_server.close()
+    base_url, timeout, retries, rate, burst = saved
+    market_data.configure_fetcher(base_url=base_url, timeout=timeout, max_retries=retries, rate=rate, burst=burst)
+
+
+def test_fetch_chart_retries_server_errors(server):
+    server.responses = [(503, {}), (429, {}), (200, chart_response(1.2345, [1.23, 1.24]))]
+    result = market_data.fetch_chart('EURUSD')
+    assert result['meta']['regularMarketPrice'] == 1.2345
+    assert len(server.requests) == 3
+    assert server.requests[0][1].startswith('/v8/finance/chart/EURUSD=X?')
+
+
+def test_fetch_chart_gives_up_after_max_retries(server):
+    market_data.configure_fetcher(max_retries=2)
+    server.responses = [(500, {})] * 5
+    assert market_data.fetch_chart('EURUSD') is None
+    assert len(server.requests) == 3
+
+
+def test_fetch_chart_does_not_retry_invalid_json(server):
+    server.responses = [(200, b'not json')]
+    assert market_data.fetch_chart('EURUSD') is None
+    assert len(server.requests) == 1
+
+
+def test_fetch_chart_unknown_symbol_makes_no_request(server):
+    assert market_data.fetch_chart('NOTASYMBOL') is None
+    assert server.requests == []
+
+
+def test_fetch_chart_is_rate_limited(server):
+    market_data.configure_fetcher(rate=20, burst=2)
+    started = time.monotonic()
+    for _ in range(6):
+        assert market_data.fetch_chart('EURUSD') is not None
+    # Two requests from the burst, the other four at 20 per second
+    assert time.monotonic() - started >= 4 / 20 * 0.9
+    assert len(server.requests) == 6
+
+
+def test_retries_take_tokens_from_the_rate_limit(server):
+    market_data.configure_fetcher(rate=10, burst=1)
+    server.responses = [(503, {}), (503, {}), (200, chart_response(1.1, [1.1]))]
+    assert market_data.fetch_chart('EURUSD') is not None
+    times = [t for t, _ in server.requests]
+    assert times[2] - times[0] >= 2 / 10 * 0.9
+
+
+def test_get_yahoo_chart_data_inverts_quotes(server):
+    server.responses = [(200, chart_response(150.0, [150.0, 151.0]))]
+    price, candles = market_data.get_yahoo_chart_data('USDJPY')
+    assert price == pytest.approx(1 / 150.0)
+    assert candles['close'].tolist() == pytest.approx([1 / 150.0, 1 / 151.0])
+    # Inversion swaps high and low
+    assert (candles['high'] >= candles['low']).all()
+
+
+def test_token_bucket_reports_wait():
+    bucket = market_data.TokenBucket(rate=10, capacity=2)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(0.1, abs=0.02)
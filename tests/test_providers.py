@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+from providers import FileProvider, MarketDataProvider, MockProvider, ProviderRegistry
+
+
+class StaticProvider(MarketDataProvider):
+    """Serves fixed quotes for the symbols it knows; records every batch"""
+
+    def __init__(self, name, quotes, archive_candles=False, fail=False):
+        self.name = name
+        self.quotes = quotes
+        self.archive_candles = archive_candles
+        self.fail = fail
+        self.batches = []
+
+    def supports(self, symbol):
+        return not symbol.startswith('X')
+
+    def fetch(self, symbols):
+        self.batches.append(list(symbols))
+        if self.fail:
+            raise ConnectionError("offline")
+        return {symbol: self.quotes[symbol] for symbol in symbols if symbol in self.quotes}
+
+
+def registry(*providers):
+    registry = ProviderRegistry()
+    for provider in providers:
+        registry.register(provider)
+    registry.set_order([provider.name for provider in providers])
+    return registry
+
+
+def test_failover_asks_next_provider_only_for_missing_symbols():
+    first = StaticProvider('first', {'EURUSD': (1.1, None)})
+    second = StaticProvider('second', {'EURUSD': (9.9, None), 'GBPUSD': (1.3, None)})
+    results = registry(first, second).fetch(['EURUSD', 'GBPUSD', 'USDJPY'])
+    assert results == {'EURUSD': (1.1, None), 'GBPUSD': (1.3, None)}
+    assert first.batches == [['EURUSD', 'GBPUSD', 'USDJPY']]
+    assert second.batches == [['GBPUSD', 'USDJPY']]
+
+
+def test_failed_and_unsupporting_providers_are_skipped(capsys):
+    broken = StaticProvider('broken', {}, fail=True)
+    backup = StaticProvider('backup', {'EURUSD': (1.1, None), 'XAUUSD': (2000.0, None)})
+    providers = registry(broken, backup)
+    assert providers.fetch_one('EURUSD') == (1.1, None)
+    # Neither provider supports X... symbols
+    assert providers.fetch_one('XAUUSD') == (None, None)
+    assert broken.batches == [['EURUSD']] and backup.batches == [['EURUSD']]
+    assert "Fehler beim Datenanbieter broken" in capsys.readouterr().out
+    assert providers.stats['broken']['failures'] == 1
+    assert providers.stats['backup']['served'] == 1
+
+
+def test_unknown_provider_order_is_rejected():
+    providers = registry(StaticProvider('first', {}))
+    with pytest.raises(ValueError):
+        providers.set_order('first, missing')
+    providers.set_order('first')
+    assert providers.order == ['first']
+
+
+def test_archive_flag_does_not_touch_provider_frames():
+    mock = MockProvider(bars=50)
+    providers = registry(mock)
+    _, candles = providers.fetch_one('EURUSD')
+    assert candles.attrs['archive'] is False
+    cached = mock.fetch(['EURUSD'])['EURUSD'][1]
+    assert 'archive' not in cached.attrs
+    pd.testing.assert_frame_equal(candles, cached)
+
+
+def test_mock_provider_is_deterministic_and_advances():
+    a, b = MockProvider(bars=100), MockProvider(bars=100)
+    price_a, candles_a = a.fetch(['EURUSD'])['EURUSD']
+    price_b, candles_b = b.fetch(['EURUSD'])['EURUSD']
+    assert price_a == price_b
+    pd.testing.assert_frame_equal(candles_a, candles_b)
+
+    a.advance(3)
+    price, candles = a.fetch(['EURUSD'])['EURUSD']
+    assert len(candles) == 100
+    assert candles['time'].iloc[-1] - candles_a['time'].iloc[-1] == pd.Timedelta(minutes=3)
+    pd.testing.assert_series_equal(candles['close'].iloc[:97].reset_index(drop=True),
+                                   candles_a['close'].iloc[3:].reset_index(drop=True))
+    assert price == candles['close'].iloc[-1]
+
+
+def test_file_provider_reads_csv(tmp_path):
+    candles = MockProvider(bars=20).fetch(['EURUSD'])['EURUSD'][1]
+    candles.iloc[::-1].to_csv(tmp_path / "EURUSD.csv", index=False)
+    provider = FileProvider(root=str(tmp_path), bars=10)
+    served = provider.fetch(['EURUSD', 'GBPUSD'])
+    assert list(served) == ['EURUSD']
+    price, df = served['EURUSD']
+    assert len(df) == 10 and df['time'].is_monotonic_increasing
+    assert price == pytest.approx(candles['close'].iloc[-1])
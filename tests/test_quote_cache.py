@@ -0,0 +1,98 @@
+import threading
+import time
+
+from market_data import QuoteCache
+
+
+class CountingLoader:
+    """Loader returning an increasing price per call; optionally blocks until released"""
+
+    def __init__(self, block=False):
+        self.calls = []
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, symbol):
+        self.calls.append(symbol)
+        self.release.wait(timeout=5)
+        return float(len(self.calls)), f"candles-{len(self.calls)}"
+
+    def batch(self, symbols):
+        return {symbol: self(symbol) for symbol in symbols}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_miss_then_hit():
+    loader = CountingLoader()
+    cache = QuoteCache(loader, default_ttl=60)
+    assert cache.get('EURUSD') == 1.0
+    assert cache.get('EURUSD') == 1.0
+    assert loader.calls == ['EURUSD']
+    assert (cache.hits, cache.misses, cache.stale_hits) == (1, 1, 0)
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    loader = CountingLoader()
+    cache = QuoteCache(loader, default_ttl=60, ttls={'EURUSD': 0.0})
+    assert cache.get('EURUSD') == 1.0
+    loader.release.clear()
+    # Expired: the old price comes back at once, a single background refresh starts
+    assert cache.get('EURUSD') == 1.0
+    assert cache.get('EURUSD') == 1.0
+    assert cache.stale_hits == 2
+    loader.release.set()
+    wait_for(lambda: cache.refreshes == 2)
+    assert loader.calls == ['EURUSD', 'EURUSD']
+    assert cache.get('EURUSD') == 2.0
+
+
+def test_concurrent_misses_load_once():
+    loader = CountingLoader(block=True)
+    cache = QuoteCache(loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('GBPUSD'))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: len(loader.calls) == 1)
+    loader.release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [1.0] * 5
+    assert loader.calls == ['GBPUSD']
+
+
+def test_get_candles_does_not_count():
+    loader = CountingLoader()
+    cache = QuoteCache(loader)
+    cache.get('EURUSD')
+    assert cache.get_candles('EURUSD') == 'candles-1'
+    assert cache.get_candles('EURUSD') == 'candles-1'
+    assert (cache.hits, cache.misses, cache.stale_hits) == (0, 1, 0)
+    # Candles of a symbol not loaded yet are fetched, still without counting
+    assert cache.get_candles('USDJPY') == 'candles-2'
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_failed_load_is_counted_and_not_cached():
+    cache = QuoteCache(lambda symbol: (None, None))
+    assert cache.get('EURUSD') is None
+    assert cache.errors == 1 and cache.stats()['entries'] == 0
+
+
+def test_get_many_loads_missing_symbols_in_one_batch():
+    loader = CountingLoader()
+    batches = []
+    cache = QuoteCache(loader, batch_loader=lambda symbols: batches.append(list(symbols)) or loader.batch(symbols))
+    cache.get('EURUSD')
+    prices = cache.get_many(['EURUSD', 'GBPUSD', 'USDJPY', 'GBPUSD'])
+    assert list(prices) == ['EURUSD', 'GBPUSD', 'USDJPY']
+    assert prices['EURUSD'] == 1.0
+    assert batches == [['GBPUSD', 'USDJPY']]
+    assert (cache.hits, cache.misses) == (1, 3)
@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recorder import (DERIVED_QUOTE, LOG_MAGIC, RAW_RESPONSE, Recorder, ReplayEngine, compare_results,
+                      decode_quote, encode_quote, read_log)
+
+
+def make_candles(n, seed=0, start="2024-01-02 10:00"):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0002, n))
+    return pd.DataFrame({
+        'time': pd.date_range(start, periods=n, freq='min'),
+        'open': close - 0.0001,
+        'high': close + 0.0002,
+        'low': close - 0.0002,
+        'close': close,
+        'tick_volume': rng.integers(0, 100, n).astype(float)
+    })
+
+
+def chart_result(candles):
+    """Chart response the candles could have been parsed from (enough for recording)"""
+    return {'meta': {'regularMarketPrice': float(candles['close'].iloc[-1])},
+            'timestamp': (candles['time'].astype('int64') // 10**9).tolist()}
+
+
+def record(path, quotes):
+    recorder = Recorder(path)
+    for symbol, price, candles in quotes:
+        recorder.record_response(symbol, chart_result(candles) if candles is not None else {}, price, candles)
+    recorder.close()
+    return recorder.records
+
+
+def test_encode_decode_quote_roundtrip():
+    candles = make_candles(50)
+    price, decoded = decode_quote(encode_quote(1.2345, candles))
+    assert price == 1.2345
+    pd.testing.assert_frame_equal(decoded, candles, check_dtype=False, check_freq=False)
+
+
+def test_encode_decode_without_price_or_candles():
+    assert decode_quote(encode_quote(None, None)) == (None, None)
+    price, candles = decode_quote(encode_quote(1.5, make_candles(0)))
+    assert price == 1.5 and candles is None
+
+
+def test_write_read_log_roundtrip(tmp_path):
+    path = str(tmp_path / "quotes.sflog")
+    quotes = [('EURUSD', 1.1, make_candles(30, seed=1)), ('BTCUSD', 65000.5, None), ('EURUSD', 1.2, make_candles(31, seed=2))]
+    assert record(path, quotes) == 6
+
+    records = list(read_log(path))
+    assert [kind for kind, *_ in records] == [RAW_RESPONSE, DERIVED_QUOTE] * 3
+    assert [symbol for _, _, symbol, _ in records] == ['EURUSD', 'EURUSD', 'BTCUSD', 'BTCUSD', 'EURUSD', 'EURUSD']
+
+    derived = list(read_log(path, kinds={DERIVED_QUOTE}))
+    for (_, _, symbol, payload), (expected_symbol, expected_price, expected_candles) in zip(derived, quotes):
+        price, candles = decode_quote(payload)
+        assert symbol == expected_symbol and price == expected_price
+        if expected_candles is None:
+            assert candles is None
+        else:
+            pd.testing.assert_frame_equal(candles, expected_candles, check_dtype=False, check_freq=False)
+
+
+def test_log_appends_across_recorders(tmp_path):
+    path = str(tmp_path / "quotes.sflog")
+    record(path, [('EURUSD', 1.1, make_candles(5))])
+    record(path, [('GBPUSD', 1.3, make_candles(5))])
+    with open(path, 'rb') as f:
+        assert f.read().count(LOG_MAGIC) == 1
+    assert [symbol for _, _, symbol, _ in read_log(path, kinds={DERIVED_QUOTE})] == ['EURUSD', 'GBPUSD']
+
+
+@pytest.mark.parametrize('cut', [1, 5, 20])
+def test_read_log_skips_truncated_tail(tmp_path, cut):
+    path = str(tmp_path / "quotes.sflog")
+    record(path, [('EURUSD', 1.1, make_candles(30, seed=1)), ('GBPUSD', 1.3, make_candles(30, seed=2))])
+    complete = list(read_log(path))
+    # An interrupted recording: the last record is cut off (payload or header)
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - cut)
+    assert list(read_log(path)) == complete[:-1]
+
+
+def test_read_log_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_log.bin"
+    path.write_bytes(b"hello world")
+    with pytest.raises(ValueError):
+        list(read_log(str(path)))
+
+
+def test_replay_is_deterministic(tmp_path):
+    path = str(tmp_path / "quotes.sflog")
+    quotes = [('EURUSD', None, make_candles(300, seed=seed, start=f"2024-01-02 {10 + seed}:00")) for seed in range(3)]
+    quotes = [(symbol, float(candles['close'].iloc[-1]), candles) for symbol, _, candles in quotes]
+    record(path, quotes)
+
+    engine = ReplayEngine(path)
+    first = engine.run()
+    assert len(first) == 3 and engine.stats['responses'] == 3
+    second = ReplayEngine(path).run()
+    assert compare_results(first, second).empty
+
+
+def test_replay_keeps_the_process_quote_source(tmp_path):
+    import market_data
+
+    path = str(tmp_path / "quotes.sflog")
+    candles = make_candles(300, seed=4)
+    record(path, [('EURUSD', float(candles['close'].iloc[-1]), candles)])
+
+    live = make_candles(300, seed=5, start="2024-01-03 10:00")
+    market_data.set_quote_source(lambda symbol: (1.5, live))
+    try:
+        before, _ = market_data.get_forex_frame('EURUSD')
+        cache, store = market_data.QUOTE_CACHE, market_data.CANDLE_STORE
+        ReplayEngine(path).run()
+        assert market_data.QUOTE_CACHE is cache and market_data.CANDLE_STORE is store
+        assert market_data.get_current_forex_price('EURUSD') == 1.5
+        after, _ = market_data.get_forex_frame('EURUSD')
+        pd.testing.assert_frame_equal(after, before)
+    finally:
+        market_data.use_providers()
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from candle_store import CANDLE_FIELDS, CandleStore
+from resample import Resampler, aggregate_bars, timeframe_ns
+
+MINUTE_NS = 60_000_000_000
+START_NS = 1_699_999_200 * 1_000_000_000  # Hour aligned
+
+
+def base_bars(first, last, seed=0):
+    """1m bars for minutes first..last-1 after START_NS"""
+    rng = np.random.default_rng(seed)
+    n = last - first
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0002, n))
+    values = {
+        'open': close - 0.0001,
+        'high': close + 0.0002,
+        'low': close - 0.0002,
+        'close': close,
+        'tick_volume': np.ones(n)
+    }
+    return START_NS + np.arange(first, last, dtype=np.int64) * MINUTE_NS, values
+
+
+def test_aggregate_bars_ohlcv():
+    times, values = base_bars(0, 10)
+    buckets, bars = aggregate_bars(times, values, timeframe_ns('5m'))
+    assert buckets.tolist() == [START_NS, START_NS + 5 * MINUTE_NS]
+    assert bars['open'].tolist() == [values['open'][0], values['open'][5]]
+    assert bars['close'].tolist() == [values['close'][4], values['close'][9]]
+    assert bars['high'][0] == values['high'][:5].max()
+    assert bars['low'][1] == values['low'][5:].min()
+    assert bars['tick_volume'].tolist() == [5, 5]
+
+
+def test_incremental_updates_match_full_aggregation():
+    times, values = base_bars(0, 300)
+    store = CandleStore()
+    resampler = Resampler(store)
+    for first in range(0, 300, 7):
+        chunk = slice(first, first + 7)
+        store.merge_arrays('EURUSD', '1m', times[chunk], {f: values[f][chunk] for f in CANDLE_FIELDS})
+        resampler.update('EURUSD')
+    for timeframe in ('5m', '15m', '1h'):
+        expected_times, expected = aggregate_bars(times, values, timeframe_ns(timeframe))
+        stored = store.arrays('EURUSD', timeframe)
+        np.testing.assert_array_equal(stored['time'].view(np.int64), expected_times)
+        for field in CANDLE_FIELDS:
+            np.testing.assert_allclose(stored[field], expected[field], err_msg=f"{timeframe} {field}")
+
+
+def test_rolled_base_ring_keeps_newest_bar():
+    times, values = base_bars(0, 100)
+    store = CandleStore(capacity=50)
+    resampler = Resampler(store, timeframes=('1h',))
+    store.merge_arrays('EURUSD', '1m', times[:40], {f: values[f][:40] for f in CANDLE_FIELDS})
+    resampler.update('EURUSD')
+    stored_first = {f: float(store.arrays('EURUSD', '1h')[f][0]) for f in CANDLE_FIELDS}
+    assert stored_first['open'] == values['open'][0]
+
+    # 60 new bars at once: the ring (50 bars) no longer holds minutes 0-49 of the first hour
+    store.merge_arrays('EURUSD', '1m', times[40:], {f: values[f][40:] for f in CANDLE_FIELDS})
+    assert store.arrays('EURUSD', '1m')['time'].view(np.int64)[0] == times[50]
+    assert resampler.update('EURUSD') == {'1h': 1}
+
+    hours = store.arrays('EURUSD', '1h')
+    assert hours['time'].view(np.int64).tolist() == [START_NS, START_NS + 60 * MINUTE_NS]
+    # The first hour was not replaced by the partial re-aggregation of minutes 50-59
+    assert {f: float(hours[f][0]) for f in CANDLE_FIELDS} == stored_first
+    assert hours['open'][1] == values['open'][60]
+    assert hours['close'][1] == values['close'][99]
+
+
+def test_timeframe_ns_rejects_unknown():
+    with pytest.raises(ValueError):
+        timeframe_ns('2m')
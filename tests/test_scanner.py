@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+import market_data
+import scanner
+import signal_store
+from instruments import Instrument
+from signal_store import SignalStore
+
+PAIRS = ['EURUSD', 'USDJPY', 'BTCUSD']
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SignalStore(str(tmp_path / "signals.db"))
+    monkeypatch.setattr(signal_store, '_store', store)
+    # Only strategy signals, no random extra ones
+    monkeypatch.setattr(scanner.random, 'random', lambda: 1.0)
+    order = list(market_data.PROVIDERS.order)
+    market_data.use_providers('mock')
+    yield store
+    market_data.use_providers(order)
+
+
+def test_run_if_due_scans_once_per_interval(store):
+    scan = scanner.run_if_due(interval=300, pairs=PAIRS)
+    assert scan is not None and scan['id'] == store.latest_scan_id()
+    assert set(scan['quotes']) == set(PAIRS)
+    assert all(quote['price'] is not None for quote in scan['quotes'].values())
+    assert {'scan', 'calculate_indicators_batch'} <= {row['stage'] for row in scan['timings']}
+    assert scanner.run_if_due(interval=300, pairs=PAIRS) is None
+
+
+def test_failed_scan_releases_the_claim(store, monkeypatch):
+    def fail(pairs):
+        raise RuntimeError("provider down")
+    monkeypatch.setattr(scanner, 'run_scan', fail)
+    with pytest.raises(RuntimeError):
+        scanner.run_if_due(interval=300, pairs=PAIRS)
+    assert store.scan_claim_age() == float('inf')
+    monkeypatch.undo()
+    monkeypatch.setattr(signal_store, '_store', store)
+    assert scanner.run_if_due(interval=300, pairs=PAIRS) is not None
+
+
+def test_payload_roundtrip_keeps_signals_and_charts(store):
+    signals, snapshot = scanner.scan_pairs(PAIRS)
+    df = scanner.get_forex_data('EURUSD', snapshot=snapshot)
+    signal = scanner.finalize_signal('EURUSD', df.assign(ema10=df['close'], ema50=df['close']), 'BUY', 98,
+                                     None, None, None)
+    payload = scanner.scan_payload(signals + [signal], snapshot, started_at=0.0)
+    decoded = scanner.signals_from_payload(payload)[-1]
+    assert decoded['action'] == 'BUY' and decoded['entry'] == pytest.approx(df['close'].iloc[-1])
+    assert len(decoded['df']) == scanner.CHART_BARS
+    pd.testing.assert_series_equal(decoded['df']['close'], df['close'].tail(scanner.CHART_BARS).reset_index(drop=True),
+                                   check_names=False)
+    assert pd.api.types.is_datetime64_any_dtype(decoded['df']['time'])
+
+
+def test_signal_levels():
+    forex = Instrument('EURUSD')
+    assert scanner.signal_levels(forex, 'BUY', 1.1) == pytest.approx((1.0992, 1.1024))
+    assert scanner.signal_levels(forex, 'SELL', 1.1) == pytest.approx((1.1008, 1.0976))
+    custom = Instrument('XAUUSD', sl_distance=2.0, tp_distance=6.0)
+    assert scanner.signal_levels(custom, 'BUY', 2000.0) == pytest.approx((1998.0, 2006.0))
+    crypto = Instrument('BTCUSD', asset_class='crypto')
+    assert scanner.signal_levels(crypto, 'SELL', 50000.0) == pytest.approx((50500.0, 48500.0))
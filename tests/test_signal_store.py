@@ -0,0 +1,116 @@
+import functools
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import archive
+import signal_store
+from signal_store import SIGNAL_COLUMNS, SignalStore
+from utils import get_signals_history, history_cursor
+
+
+def make_records(timestamps, symbol='EURUSD'):
+    return [{'timestamp': ts, 'symbol': symbol, 'action': 'BUY', 'entry': 1.1 + i / 1000, 'sl': 1.09,
+             'tp': 1.12, 'safety': 80, 'expiry': '15min'} for i, ts in enumerate(timestamps)]
+
+
+def read_pages(size, **kwargs):
+    """Every page of get_signals_history, following the keyset cursor"""
+    pages, before = [], None
+    while True:
+        page = get_signals_history(limit=size, before=before, **kwargs)
+        if page.empty:
+            return pages
+        pages.append(page)
+        before = history_cursor(page)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SignalStore(str(tmp_path / "signals.db"), retention_days=30)
+
+
+def test_keyset_pages_match_full_query(store):
+    now = datetime.now()
+    # Pairs of signals share a timestamp, so pages also break inside a timestamp
+    store.add_signals(make_records([now - timedelta(minutes=i // 2) for i in range(23)]))
+    full = store.query_signals(limit=None)
+    pages, before = [], None
+    while True:
+        page = store.query_signals(limit=5, before=before)
+        if page.empty:
+            break
+        pages.append(page)
+        before = history_cursor(page)
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    pd.testing.assert_frame_equal(pd.concat(pages, ignore_index=True), full)
+
+
+def test_query_filters(store):
+    now = datetime.now()
+    store.add_signals(make_records([now - timedelta(days=2), now - timedelta(hours=1)]))
+    store.add_signals(make_records([now], symbol='GBPUSD'))
+    assert len(store.query_signals(days=1, limit=None)) == 2
+    assert store.query_signals(symbol='EURUSD', limit=None)['symbol'].tolist() == ['EURUSD', 'EURUSD']
+    assert len(store.query_signals(until=now - timedelta(days=1), limit=None)) == 1
+
+
+def test_purge_hands_expired_signals_to_on_expire(tmp_path):
+    expired = []
+    store = SignalStore(str(tmp_path / "signals.db"), retention_days=1, on_expire=expired.append)
+    now = datetime.now()
+    store.add_signals(make_records([now - timedelta(days=3), now - timedelta(days=2), now]))
+    assert store.purge() == 2
+    assert len(expired) == 1 and list(expired[0].columns) == SIGNAL_COLUMNS and len(expired[0]) == 2
+    assert len(store.query_signals(limit=None)) == 1
+    assert store.purge_if_due(interval=3600) == 0
+    assert store.purge_if_due(interval=3600) is None
+
+
+def test_import_csv_runs_once(store, tmp_path):
+    path = tmp_path / "signals_history.csv"
+    pd.DataFrame(make_records([datetime(2024, 1, 2, 10), datetime(2024, 1, 2, 11)])).to_csv(path, index=False)
+    assert store.import_csv(str(path)) == 2
+    assert store.import_csv(str(path)) == 0
+    assert SignalStore(store.path).import_csv(str(path)) == 0
+    assert len(store.query_signals(limit=None)) == 2
+
+
+def test_scan_claim_and_release(store):
+    claim = store.claim_scan(min_age=60)
+    assert claim is not None
+    assert store.claim_scan(min_age=60) is None
+    assert store.scan_claim_age() < 60
+    store.release_scan_claim(claim)
+    assert store.scan_claim_age() == float('inf')
+    assert store.claim_scan(min_age=60) is not None
+
+
+def test_synchronous_mode(tmp_path):
+    store = SignalStore(str(tmp_path / "signals.db"), synchronous='full')
+    assert store._connection().execute('PRAGMA synchronous').fetchone()[0] == 2
+    with pytest.raises(ValueError):
+        SignalStore(str(tmp_path / "other.db"), synchronous='SOMETIMES')
+
+
+@pytest.mark.skipif(not archive.PYARROW_AVAILABLE, reason="pyarrow not installed")
+def test_history_pages_through_archive_ties(tmp_path, monkeypatch):
+    store = SignalStore(str(tmp_path / "signals.db"), retention_days=1)
+    monkeypatch.setattr(signal_store, '_store', store)
+    monkeypatch.setattr(archive, 'ARCHIVE_AVAILABLE', True)
+    monkeypatch.setattr(archive, 'read_signals', functools.partial(archive.read_signals, root=str(tmp_path)))
+
+    now = datetime.now().replace(microsecond=0)
+    store.add_signals(make_records([now - timedelta(hours=i) for i in range(4)]))
+    # Archived signals: three symbols per timestamp
+    archived = [record for hours in range(30, 40, 2) for symbol in ('EURUSD', 'GBPUSD', 'USDJPY')
+                for record in make_records([now - timedelta(hours=hours)], symbol=symbol)]
+    archive.write_signals(pd.DataFrame(archived), root=str(tmp_path))
+
+    full = get_signals_history(days=3)
+    assert len(full) == 4 + len(archived)
+    assert (full['id'].iloc[:4] > 0).all() and (full['id'].iloc[4:] < 0).all()
+    for size in (2, 4, 5):
+        pages = read_pages(size, days=3)
+        pd.testing.assert_frame_equal(pd.concat(pages, ignore_index=True), full)
@@ -0,0 +1,110 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import kernels
+from candle_store import CandleStore
+from streaming import BarAggregator, ReplaySource, StreamingEngine, TCPTickSource, Tick, serve_tcp_replay
+from strategy import DEFAULT_PARAMS, StrategyParams, signal_conditions
+
+MINUTE_NS = 60_000_000_000
+START_NS = 1_699_999_980 * 1_000_000_000  # Minute aligned
+
+
+def make_ticks(symbol, bars, seed):
+    """Four ticks per minute (open, high, low, close) of a drifting random walk"""
+    rng = np.random.default_rng(seed)
+    # Alternating trends, so the EMAs cross while ADX is high
+    drift = np.repeat(rng.choice([-1, 1], bars // 60 + 1) * 0.00004, 60)[:bars]
+    close = 1.1 + np.cumsum(drift + rng.normal(0, 0.00008, bars))
+    opens = np.concatenate((close[:1], close[:-1]))
+    high = np.maximum(opens, close) + np.abs(rng.normal(0, 0.00003, bars))
+    low = np.minimum(opens, close) - np.abs(rng.normal(0, 0.00003, bars))
+    ticks = []
+    for i in range(bars):
+        start = START_NS + i * MINUTE_NS
+        for offset, price in zip((0, 15, 30, 45), (opens[i], high[i], low[i], close[i])):
+            ticks.append(Tick(symbol, start + offset * 1_000_000_000, float(price), 1.0))
+    return ticks
+
+
+def vectorized_signals(ticks, params=DEFAULT_PARAMS):
+    """(bar time, action) of every bar the batch masks flag, from pandas-aggregated bars"""
+    frame = pd.DataFrame({'time': [t.time for t in ticks], 'price': [t.price for t in ticks]})
+    frame['bucket'] = frame['time'] - frame['time'] % MINUTE_NS
+    bars = frame.groupby('bucket')['price'].agg(['first', 'max', 'min', 'last'])
+    indicators = kernels.indicator_arrays(bars['max'], bars['min'], bars['last'], params.ema_fast, params.ema_slow)
+    buy, sell = signal_conditions(indicators['ema10'], indicators['ema50'], indicators['atr'],
+                                  indicators['adx'], indicators['rsi'], params)
+    times = bars.index.to_numpy()
+    return ([(int(t), 'BUY') for t in times[buy]] + [(int(t), 'SELL') for t in times[sell]])
+
+
+def streamed_signals(engine_signals):
+    return [(int(s['bar_time'].astype('datetime64[ns]').astype(np.int64)), s['action']) for s in engine_signals]
+
+
+def run_engine(source, params=DEFAULT_PARAMS, **kwargs):
+    engine = StreamingEngine(source, params=params, store=CandleStore(), save=False, warmup=False, **kwargs)
+    return engine, asyncio.run(engine.run())
+
+
+def test_bar_aggregator_builds_ohlcv():
+    aggregator = BarAggregator('1m')
+    ticks = [Tick('X', START_NS, 1.0, 1), Tick('X', START_NS + 10, 1.5, 2), Tick('X', START_NS + 20, 0.5, 3),
+             Tick('X', START_NS + 30, 1.2, 4)]
+    assert all(aggregator.add(tick) is None for tick in ticks)
+    closed = aggregator.add(Tick('X', START_NS + MINUTE_NS, 1.3, 1))
+    assert closed == {'time': START_NS, 'open': 1.0, 'high': 1.5, 'low': 0.5, 'close': 1.2, 'tick_volume': 10}
+    # Late tick of the closed bar is ignored
+    assert aggregator.add(Tick('X', START_NS + 40, 9.9, 1)) is None
+    assert aggregator.flush()['close'] == 1.3
+
+
+def test_replay_matches_vectorized_masks():
+    ticks = make_ticks('STREAMA', 3000, seed=1)
+    expected = vectorized_signals(ticks)
+    assert expected, "test data should produce signals"
+    _, signals = run_engine(ReplaySource(ticks))
+    assert sorted(streamed_signals(signals)) == sorted(expected)
+
+
+def test_replay_with_custom_spans_matches_vectorized_masks():
+    params = StrategyParams(ema_fast=5, ema_slow=20)
+    ticks = make_ticks('STREAMB', 3000, seed=2)
+    expected = vectorized_signals(ticks, params)
+    assert expected
+    _, signals = run_engine(ReplaySource(ticks), params)
+    assert sorted(streamed_signals(signals)) == sorted(expected)
+
+
+def test_tcp_replay_matches_vectorized_masks():
+    ticks = make_ticks('STREAMC', 2000, seed=3) + make_ticks('STREAMD', 2000, seed=4)
+    ticks.sort(key=lambda tick: tick.time)
+
+    async def scenario():
+        server = await serve_tcp_replay(ticks)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            engine = StreamingEngine(TCPTickSource('127.0.0.1', port), store=CandleStore(),
+                                     queue_size=64, save=False, warmup=False)
+            return engine, await engine.run()
+
+    engine, signals = asyncio.run(scenario())
+    for symbol in ('STREAMC', 'STREAMD'):
+        expected = vectorized_signals([tick for tick in ticks if tick.symbol == symbol])
+        got = [(t, a) for (t, a), s in zip(streamed_signals(signals), signals) if s['symbol'] == symbol]
+        assert sorted(got) == sorted(expected)
+        assert engine.stats()[symbol]['bars'] == 2000
+        assert engine.stats()[symbol]['ticks'] == 8000
+
+
+def test_worker_failure_is_raised():
+    def fail(signal):
+        raise RuntimeError("consumer failed")
+
+    ticks = make_ticks('STREAME', 3000, seed=1)
+    with pytest.raises(RuntimeError, match="consumer failed"):
+        run_engine(ReplaySource(ticks), queue_size=2, on_signal=fail)
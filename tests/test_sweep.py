@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import backtest
+from strategy import DEFAULT_PARAMS, StrategyParams
+from sweep import param_grid, random_params, rank_params, run_sweep
+
+LOOSE_PARAMS = StrategyParams(adx_min=0.0, atr_max_pips=1e9, rsi_low=0.0, rsi_high=100.0)
+
+
+def make_candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0003, n))
+    spread = np.abs(rng.normal(0, 0.0002, n))
+    return pd.DataFrame({
+        'time': pd.date_range("2024-01-02 10:00", periods=n, freq='min'),
+        'open': np.append(close[0], close[:-1]),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close
+    })
+
+
+def test_param_grid_is_the_cartesian_product():
+    grid = param_grid(adx_min=[20, 25, 30], risk_reward=[2.0, 3.0])
+    assert len(grid) == 6
+    assert {(p.adx_min, p.risk_reward) for p in grid} == {(a, r) for a in (20, 25, 30) for r in (2.0, 3.0)}
+    assert all(p.rsi_low == DEFAULT_PARAMS.rsi_low for p in grid)
+    assert param_grid() == [DEFAULT_PARAMS]
+
+
+def test_random_params_are_reproducible_and_in_range():
+    draws = random_params(20, seed=7, ema_fast=(5, 15), adx_min=(10.0, 30.0), risk_reward=[2.0, 3.0])
+    assert draws == random_params(20, seed=7, ema_fast=(5, 15), adx_min=(10.0, 30.0), risk_reward=[2.0, 3.0])
+    assert all(isinstance(p.ema_fast, int) and 5 <= p.ema_fast <= 15 for p in draws)
+    assert all(10.0 <= p.adx_min <= 30.0 and p.risk_reward in (2.0, 3.0) for p in draws)
+
+
+def test_sweep_matches_single_backtests():
+    frames = {'EURUSD': make_candles(400, seed=1), 'GBPUSD': make_candles(300, seed=2)}
+    params_list = param_grid(LOOSE_PARAMS, ema_fast=[5, 10], risk_reward=[1.0, 3.0])
+    results = run_sweep(frames, params_list, max_workers=2)
+    assert len(results) == 8
+
+    expectancy = results['expectancy_r'].fillna(-np.inf).to_numpy()
+    assert (np.diff(expectancy) <= 0).all()
+    for row in results.itertuples():
+        params = StrategyParams(**{name: getattr(row, name) for name in StrategyParams.__dataclass_fields__})
+        summary, _ = backtest(frames[row.symbol], params)
+        assert (row.trades, row.signals) == (summary['trades'], summary['signals'])
+        assert row.total_r == pytest.approx(summary['total_r'])
+
+    ranked = rank_params(results)
+    assert len(ranked) == 4
+    first = results[(results['ema_fast'] == ranked['ema_fast'].iloc[0])
+                    & (results['risk_reward'] == ranked['risk_reward'].iloc[0])]
+    assert ranked['trades'].iloc[0] == first['trades'].sum()
+    assert ranked['total_r'].iloc[0] == pytest.approx(first['total_r'].sum())
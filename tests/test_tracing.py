@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+import tracing
+from tracing import METRIC_NAME, Tracer, traced
+
+
+def test_summary_percentiles_per_stage_and_symbol():
+    tracer = Tracer(enabled=True)
+    for i in range(1, 101):
+        tracer.record('fetch', i / 1000, 'EURUSD')
+    tracer.record('fetch', 1.0, 'GBPUSD')
+    tracer.record('scan', 2.0)
+
+    rows = {(row['stage'], row['symbol']): row for row in tracer.summary()}
+    assert set(rows) == {('fetch', None), ('fetch', 'EURUSD'), ('fetch', 'GBPUSD'), ('scan', None)}
+    eurusd = rows[('fetch', 'EURUSD')]
+    assert eurusd['count'] == 100 and eurusd['total_s'] == pytest.approx(5.05)
+    assert eurusd['p50_s'] == pytest.approx(0.0505) and eurusd['p99_s'] == pytest.approx(0.09901)
+    assert rows[('fetch', None)]['count'] == 101
+    assert [(row['stage'], row['symbol']) for row in tracer.summary(per_symbol=False)] == [('fetch', None), ('scan', None)]
+
+
+def test_window_bounds_samples_but_not_totals():
+    tracer = Tracer(enabled=True, window=10)
+    for i in range(100):
+        tracer.record('stage', float(i))
+    row, = tracer.summary()
+    assert row['count'] == 100 and row['total_s'] == sum(range(100))
+    assert row['p50_s'] == pytest.approx(94.5)
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span('stage'):
+        pass
+    assert tracer.summary() == []
+
+
+def test_traced_reads_the_symbol_argument(monkeypatch):
+    tracer = Tracer(enabled=True)
+    monkeypatch.setattr(tracing, 'tracer', tracer)
+
+    @traced('load', 'symbol')
+    def load(n, symbol=None):
+        return n * 2
+
+    assert load(1, 'EURUSD') == 2
+    assert load(2, symbol='GBPUSD') == 4
+    assert load(3) == 6
+    assert {(row['stage'], row['symbol'], row['count']) for row in tracer.summary()} == {
+        ('load', None, 3), ('load', 'EURUSD', 1), ('load', 'GBPUSD', 1)}
+
+    tracer.enabled = False
+    assert load(4, 'EURUSD') == 8
+    assert sum(row['count'] for row in tracer.summary(per_symbol=False)) == 3
+
+
+def test_spans_record_on_exceptions():
+    tracer = Tracer(enabled=True)
+    with pytest.raises(ValueError):
+        with tracer.span('parse', 'EURUSD'):
+            raise ValueError("bad response")
+    assert tracer.summary()[0]['count'] == 1
+
+
+def test_prometheus_export(tmp_path):
+    tracer = Tracer(enabled=True)
+    tracer.record('fetch', 0.5, 'EUR"USD')
+    path = tracer.write_prometheus('scanner', directory=str(tmp_path))
+    assert os.path.basename(path) == 'scanner.prom'
+    assert os.listdir(tmp_path) == ['scanner.prom']
+    text = open(path).read()
+    assert f"# TYPE {METRIC_NAME} summary" in text
+    assert f'{METRIC_NAME}{{process="scanner",stage="fetch",quantile="0.5"}} 0.5' in text
+    assert f'{METRIC_NAME}_count{{process="scanner",stage="fetch",symbol="EUR\\"USD"}} 1' in text
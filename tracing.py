@@ -0,0 +1,203 @@
+"""
+Lightweight latency tracing for the scan pipeline.
+
+Stages are timed with context-manager spans (time.perf_counter) and kept
+per stage and symbol in bounded windows, from which p50/p95/p99 are
+computed on demand:
+
+    with tracer.span('get_forex_data', symbol):
+        ...
+
+    @traced('calculate_indicators')
+    def calculate_indicators(df): ...
+
+With TRACING=0 span() returns a shared no-op context manager and traced
+functions only pay one attribute check, so the instrumentation can stay
+in place in production. Summaries go to the app sidebar (the scanner
+publishes them with each scan) and to Prometheus text files in
+TRACE_METRICS_DIR (node_exporter textfile collector format).
+"""
+import functools
+import inspect
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import nullcontext
+
+import numpy as np
+
+TRACING_ENABLED = os.environ.get('TRACING', '1') != '0'
+
+# Samples kept per stage and symbol for the percentiles
+TRACE_WINDOW = 1000
+
+TRACE_METRICS_DIR = os.environ.get('TRACE_METRICS_DIR', 'metrics')
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+METRIC_NAME = 'signal_forge_stage_seconds'
+
+# Returned by span() while tracing is off
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ('tracer', 'stage', 'symbol', 'start')
+
+    def __init__(self, tracer, stage, symbol):
+        self.tracer = tracer
+        self.stage = stage
+        self.symbol = symbol
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.stage, time.perf_counter() - self.start, self.symbol)
+        return False
+
+
+class Tracer:
+    """
+    Collects span durations per (stage, symbol). Thread-safe; one instance
+    per process (see tracer).
+    """
+
+    def __init__(self, enabled=TRACING_ENABLED, window=TRACE_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        # Cumulative count and sum per (stage, symbol) for the Prometheus summary
+        self._totals = {}
+
+    def span(self, stage, symbol=None):
+        """Context manager timing one execution of stage (optionally for one symbol)"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, symbol)
+
+    def record(self, stage, seconds, symbol=None):
+        """Add one duration (seconds) to stage"""
+        key = (stage, symbol)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+                self._totals[key] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[key]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+
+    def summary(self, per_symbol=True):
+        """
+        Percentiles of every stage over all symbols (symbol None) and, with
+        per_symbol, of every stage and symbol
+
+        Returns:
+        list: Dicts with stage, symbol, count, total_s, p50_s, p95_s, p99_s
+        """
+        with self._lock:
+            samples = {key: np.fromiter(values, dtype=np.float64, count=len(values))
+                       for key, values in self._samples.items()}
+            totals = {key: tuple(values) for key, values in self._totals.items()}
+
+        groups = {}
+        for (stage, symbol), values in samples.items():
+            groups.setdefault((stage, None), []).append(((stage, symbol), values))
+            if per_symbol and symbol is not None:
+                groups[(stage, symbol)] = [((stage, symbol), values)]
+
+        rows = []
+        for (stage, symbol), parts in sorted(groups.items(), key=lambda item: (item[0][0], item[0][1] or '')):
+            values = np.concatenate([values for _, values in parts])
+            p50, p95, p99 = np.percentile(values, [q * 100 for q in QUANTILES])
+            rows.append({
+                'stage': stage,
+                'symbol': symbol,
+                'count': sum(totals[key][0] for key, _ in parts),
+                'total_s': sum(totals[key][1] for key, _ in parts),
+                'p50_s': float(p50),
+                'p95_s': float(p95),
+                'p99_s': float(p99)
+            })
+        return rows
+
+    def to_prometheus(self, labels=None):
+        """Summary in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_NAME} Latency of the scan pipeline stages",
+            f"# TYPE {METRIC_NAME} summary"
+        ]
+        for row in self.summary():
+            row_labels = dict(labels or {}, stage=row['stage'])
+            if row['symbol'] is not None:
+                row_labels['symbol'] = row['symbol']
+            for q, key in zip(QUANTILES, ('p50_s', 'p95_s', 'p99_s')):
+                lines.append(f"{METRIC_NAME}{_format_labels(row_labels, quantile=q)} {row[key]:.9g}")
+            lines.append(f"{METRIC_NAME}_sum{_format_labels(row_labels)} {row['total_s']:.9g}")
+            lines.append(f"{METRIC_NAME}_count{_format_labels(row_labels)} {row['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, name, directory=TRACE_METRICS_DIR):
+        """
+        Write the summary to directory/name.prom, replacing the file
+        atomically so a collector never reads a partial file
+
+        Returns:
+        str: Path of the written file
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}.prom")
+        tmp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus({'process': name}))
+        os.replace(tmp_path, path)
+        return path
+
+
+def _format_labels(labels, **extra):
+    labels = dict(labels, **extra)
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+# Process-wide tracer
+tracer = Tracer()
+
+
+def traced(stage, symbol_arg=None):
+    """
+    Decorator timing every call of the function as stage; symbol_arg names
+    the parameter holding the symbol for the per-symbol percentiles
+    """
+    def decorator(fn):
+        position = None
+        if symbol_arg is not None:
+            position = list(inspect.signature(fn).parameters).index(symbol_arg)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            symbol = None
+            if position is not None:
+                symbol = args[position] if position < len(args) else kwargs.get(symbol_arg)
+            with tracer.span(stage, symbol):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_tracing(enabled):
+    """Turn tracing on or off at runtime"""
+    tracer.enabled = enabled
@@ -1,5 +1,9 @@
 import pandas as pd
 from datetime import datetime, timedelta
+from signal_store import SIGNAL_COLUMNS, get_signal_store
+import archive
+from instruments import get_instrument
+from tracing import traced
 
 def format_price(price, pair=""):
     """
@@ -15,18 +19,21 @@ def format_price(price, pair=""):
     if price is None:
         return "N/A"
         
-    if 'JPY' in pair:
-        # JPY pairs typically have 2 decimal places
-        return f"{price:.2f}"
-    elif any(crypto in pair for crypto in ['BTC', 'SOL', 'ETH']):
-        # Crypto prices with more precision
-        if 'BTC' in pair:
-            return f"{price:.1f}"
-        else:
-            return f"{price:.2f}"
-    else:
-        # Most forex pairs have 4 or 5 decimal places
-        return f"{price:.5f}"
+    # Decimal places per instrument (JPY pairs 2, most forex pairs 5, see instruments.json)
+    return f"{price:.{get_instrument(pair).precision}f}"
+
+def make_signal_record(symbol, action, entry, sl, tp, safety, expiry_time):
+    """Build a signal history record stamped with the current time"""
+    return {
+        'timestamp': datetime.now(),
+        'symbol': symbol,
+        'action': action,
+        'entry': entry,
+        'sl': sl,
+        'tp': tp,
+        'safety': safety,
+        'expiry': expiry_time
+    }
 
 def save_signal(symbol, action, entry, sl, tp, safety, expiry_time):
     """
@@ -41,64 +48,74 @@ def save_signal(symbol, action, entry, sl, tp, safety, expiry_time):
     safety (int): Signal confidence
     expiry_time (str): Signal expiry time
     """
-    # Create a new signal record
-    new_signal = {
-        'timestamp': datetime.now(),
-        'symbol': symbol,
-        'action': action,
-        'entry': entry,
-        'sl': sl,
-        'tp': tp,
-        'safety': safety,
-        'expiry': expiry_time
-    }
-    
-    try:
-        # Try to load existing signals
-        signals_df = pd.read_csv('signals_history.csv', parse_dates=['timestamp'])
-    except:
-        # If file doesn't exist, create a new DataFrame
-        signals_df = pd.DataFrame(columns=[
-            'timestamp', 'symbol', 'action', 'entry', 'sl', 'tp', 'safety', 'expiry'
-        ])
-    
-    # Append new signal
-    signals_df = pd.concat([signals_df, pd.DataFrame([new_signal])], ignore_index=True)
-    
-    # Keep only the last 3 days of signals
-    cutoff_date = datetime.now() - timedelta(days=3)
-    signals_df = signals_df[signals_df['timestamp'] >= cutoff_date]
+    save_signals([make_signal_record(symbol, action, entry, sl, tp, safety, expiry_time)])
+
+@traced('save_signal')
+def save_signals(records):
+    """
+    Append several signal records to the signals history in one write
     
-    # Save updated signals
-    signals_df.to_csv('signals_history.csv', index=False)
+    Parameters:
+    records (list): Dicts as returned by make_signal_record
+    """
+    # One transaction; retention runs separately via SignalStore.purge_if_due
+    get_signal_store().add_signals(records)
     
-def get_signals_history(days=3):
+def history_cursor(signals_df):
+    """Keyset cursor (timestamp, id) of the last row of a history page"""
+    last = signals_df.iloc[-1]
+    return (last['timestamp'], int(last['id']))
+
+def get_signals_history(days=3, symbol=None, limit=None, offset=0, before=None):
     """
     Get signals history for the specified number of days
     
     Parameters:
     days (int): Number of days to look back
+    symbol (str): Only signals of this pair (optional)
+    limit (int): Page size (None for all signals)
+    offset (int): Signals to skip (page * limit)
+    before (tuple): Keyset cursor of the previous page (see history_cursor);
+                    constant cost for deep pages
     
     Returns:
-    DataFrame: Signals history
+    DataFrame: Signals history (newest first), SIGNAL_COLUMNS plus id
+               (negative for archived signals)
     """
+    columns = ['id'] + SIGNAL_COLUMNS
     try:
-        # Try to load existing signals
-        signals_df = pd.read_csv('signals_history.csv', parse_dates=['timestamp'])
-        
-        # Filter for the last X days
-        cutoff_date = datetime.now() - timedelta(days=days)
-        signals_df = signals_df[signals_df['timestamp'] >= cutoff_date]
+        store = get_signal_store()
+        if days <= store.retention_days or not archive.ARCHIVE_AVAILABLE:
+            # Indexed range query, only the requested page is read
+            signals_df = store.query_signals(days=days, symbol=symbol, limit=limit, offset=offset, before=before)
+            return signals_df[columns]
         
-        # Sort by timestamp (newest first)
-        signals_df = signals_df.sort_values('timestamp', ascending=False)
-        
-        return signals_df
-    except:
-        # If file doesn't exist or other error, return empty DataFrame
-        return pd.DataFrame(columns=[
-            'timestamp', 'symbol', 'action', 'entry', 'sl', 'tp', 'safety', 'expiry'
-        ])
+        # Older than the retention horizon: the rest comes from the Parquet archive
+        now = datetime.now()
+        cutoff = now - timedelta(days=store.retention_days)
+        end = None if limit is None else offset + limit
+        if before is None or before[0] >= cutoff:
+            recent = store.query_signals(since=cutoff, symbol=symbol, limit=end, before=before)[columns]
+        else:
+            recent = pd.DataFrame(columns=columns)
+        if end is not None and len(recent) >= end:
+            return recent.iloc[offset:end].reset_index(drop=True)
+        archive_end = cutoff
+        if before is not None:
+            # Include the cursor's own timestamp: rows sharing it may not have been shown yet
+            archive_end = min(cutoff, pd.Timestamp(before[0]) + pd.Timedelta(microseconds=1))
+        archived = archive.read_signals(start=now - timedelta(days=days), end=archive_end, symbols=symbol)
+        # Archived rows have no id; number them within their timestamp instead
+        # (-1, -2, ... in read order), so (timestamp, id) stays a unique cursor
+        archived = archived.assign(id=-(archived.groupby('timestamp').cumcount() + 1))[columns]
+        if before is not None:
+            timestamps = archived['timestamp']
+            archived = archived[(timestamps < before[0]) | ((timestamps == before[0]) & (archived['id'] < before[1]))]
+        signals_df = pd.concat([recent, archived], ignore_index=True) if len(recent) else archived
+        return signals_df.iloc[offset:end].reset_index(drop=True)
+    except Exception as e:
+        print(f"Fehler beim Laden des Signalverlaufs: {e}")
+        return pd.DataFrame(columns=columns)
 
 def get_mt5_connection_status():
     """